@@ -1,21 +1,75 @@
-from flask import Flask
+from flask import Flask, Response
 from flask_cors import CORS
 from flask_restful import Api
 from dotenv import load_dotenv
 import os
+import sys
+
+if __package__ in (None, ""):
+    # Started as a script (python backend/app.py): make the backend package importable
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.config import Config
+from backend.services.warmup import readiness, start_background_warmup
+from backend.routes.resume_routes import register_routes
+from backend.services.metrics import metrics
+from backend.services.nlp_processor import nlp_processor
+from backend.services.matching_engine import matching_engine
+from backend.services.resume_cache import resume_cache
+from backend.services.analysis_service import analysis_queue
+from backend.services.persistence import writer_stats
+from backend.services.profiling import profiler
+from backend.services.dedup import duplicate_detector
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
+app.config['MAX_CONTENT_LENGTH'] = Config.MAX_UPLOAD_MB * 1024 * 1024
 # Enable CORS for all domains
 CORS(app)
 api = Api(app)
+register_routes(api)
+
+# Cache hit ratios and queue depths, read on every scrape of /metrics
+metrics.register_stats("nlp_cache", nlp_processor.stats, counters=("hits", "misses"))
+metrics.register_stats("embedding_cache", matching_engine.embedding_cache.stats,
+                       counters=("hits", "disk_hits", "misses"))
+metrics.register_stats("resume_cache", resume_cache.stats, counters=("hits", "misses", "near_duplicates"))
+metrics.register_stats("dedup", duplicate_detector.stats, counters=("found",))
+metrics.register_stats("analysis_queue", analysis_queue.stats, counters=("coalesced", "rejected"))
+metrics.register_stats("persistence", writer_stats, counters=("written", "flushes", "dropped", "failed"))
+metrics.register_stats("profiler", profiler.stats, counters=("profiled", "skipped_busy"))
+if matching_engine.encode_scheduler is not None:
+    metrics.register_stats("encode_scheduler", matching_engine.encode_scheduler.stats,
+                           counters=("batches", "requests", "texts"))
+metrics.register_stats("component_ready", lambda: {
+    name: state == "ready" for name, state in readiness()["components"].items()
+})
+
+# Accept connections right away, models load in the background
+if Config.WARMUP_ON_START:
+    start_background_warmup()
 
-# Placeholder for route registration
 @app.route('/')
 def home():
     return {"message": "ResumeXpert API is running"}
 
+@app.route('/health')
+def health():
+    """Liveness probe: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: 200 once all models are loaded, 503 while warming up."""
+    status = readiness()
+    return status, (200 if status["ready"] else 503)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint: stage latencies, error counts, cache and queue gauges."""
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
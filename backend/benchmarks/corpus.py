@@ -0,0 +1,106 @@
+"""
+Deterministic synthetic corpus built from the knowledge-base files.
+
+Each resume targets one role from role_requirements.json. skill_density is the
+fraction of that role's critical + recommended skills the resume mentions; a few
+off-role skills from skills_database.json are mixed in as noise. Resumes are
+written as PDF and/or DOCX files, job descriptions are plain text.
+The same (size, density, seed) always produces the same corpus.
+
+Usage:
+    python -m backend.benchmarks.corpus --dir corpus/ --resumes 200 --density 0.5
+"""
+import argparse
+import json
+import os
+import random
+from backend.benchmarks.documents import write_docx, write_pdf
+from backend.services.knowledge_base import DATA_DIR, SOURCE_FILES
+
+LINES_PER_PAGE = 45
+
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Labs", "Stark Industries", "Wayne Enterprises"]
+VERBS = ["Built", "Designed", "Maintained", "Migrated", "Optimized", "Shipped", "Automated"]
+OBJECTS = ["internal dashboards", "a payments service", "data pipelines", "customer-facing APIs",
+           "the reporting platform", "mobile back ends", "release tooling"]
+
+def _load(name):
+    with open(os.path.join(DATA_DIR, SOURCE_FILES[name]), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _resume_lines(rng, index, role, skills, experience_lines):
+    lines = [f"Candidate {index}", f"{role} | candidate{index}@example.com", "", "Summary",
+             f"{role} with {rng.randint(1, 12)} years of experience delivering production software.", "",
+             "Experience"]
+    for _ in range(experience_lines):
+        used = ", ".join(rng.sample(skills, min(len(skills), rng.randint(1, 3)))) if skills else "modern tooling"
+        lines.append(f"{rng.choice(VERBS)} {rng.choice(OBJECTS)} at {rng.choice(COMPANIES)} using {used}.")
+    lines += ["", "Skills", ", ".join(skills), "", "Education",
+              f"B.Sc. Computer Science, class of {rng.randint(2005, 2023)}"]
+    return lines
+
+def _jd_text(rng, role, requirements):
+    critical = requirements.get("critical_skills", [])
+    recommended = requirements.get("recommended_skills", [])
+    nice = rng.sample(recommended, min(len(recommended), max(1, len(recommended) // 2))) if recommended else []
+    return (
+        f"We are hiring a {role}. {requirements.get('description', '')} "
+        f"Must have experience with {', '.join(critical)}. "
+        f"Nice to have: {', '.join(nice)}. "
+        f"You will work with {rng.choice(COMPANIES)} teams on {rng.choice(OBJECTS)}."
+    )
+
+def generate_corpus(directory, resumes=50, jds=10, skill_density=0.5, formats=("pdf", "docx"),
+                    experience_lines=20, seed=42):
+    """
+    Writes the resume files into directory and returns
+    {"resumes": [{"id", "path", "role", "skills", "text"}], "jds": [{"id", "role", "text"}]}.
+    skills: the skills actually written into the resume (ground truth for extraction).
+    """
+    rng = random.Random(seed)
+    skills_db = _load("skills")
+    roles = _load("roles")
+    role_names = sorted(roles)
+    all_skills = sorted({skill for skills in skills_db.values() for skill in skills})
+    os.makedirs(directory, exist_ok=True)
+
+    corpus = {"resumes": [], "jds": []}
+    for i in range(resumes):
+        role = role_names[i % len(role_names)]
+        pool = roles[role].get("critical_skills", []) + roles[role].get("recommended_skills", [])
+        chosen = [skill for skill in pool if rng.random() < skill_density]
+        noise = [skill for skill in rng.sample(all_skills, 3) if skill not in chosen]
+        skills = chosen + noise[:rng.randint(0, 3)]
+
+        lines = _resume_lines(rng, i, role, skills, experience_lines)
+        file_format = formats[i % len(formats)]
+        path = os.path.join(directory, f"resume_{i:04d}.{file_format}")
+        if file_format == "pdf":
+            write_pdf(path, [lines[start:start + LINES_PER_PAGE] for start in range(0, len(lines), LINES_PER_PAGE)])
+        else:
+            write_docx(path, lines)
+        corpus["resumes"].append({"id": f"resume_{i:04d}", "path": path, "role": role,
+                                  "skills": skills, "text": "\n".join(lines)})
+
+    for i in range(jds):
+        role = role_names[i % len(role_names)]
+        corpus["jds"].append({"id": f"jd_{i:03d}", "role": role, "text": _jd_text(rng, role, roles[role])})
+    return corpus
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", required=True, help="Output directory for the resume files")
+    parser.add_argument("--resumes", type=int, default=50)
+    parser.add_argument("--jds", type=int, default=10)
+    parser.add_argument("--density", type=float, default=0.5, help="Fraction of the role's skills per resume")
+    parser.add_argument("--formats", nargs="+", default=["pdf", "docx"], choices=["pdf", "docx"])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.dir, args.resumes, args.jds, args.density, tuple(args.formats), seed=args.seed)
+    with open(os.path.join(args.dir, "corpus.json"), 'w', encoding='utf-8') as f:
+        json.dump(corpus, f, indent=2)
+    print(f"Wrote {len(corpus['resumes'])} resumes and {len(corpus['jds'])} job descriptions to {args.dir}")
+
+if __name__ == "__main__":
+    main()
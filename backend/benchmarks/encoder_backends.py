@@ -0,0 +1,118 @@
+"""
+Report: accuracy vs speed of the semantic model backends, relative to fp32 torch.
+
+Every backend encodes the same fixed corpus (job descriptions x resumes). The
+report gives encode throughput and how far each backend's JD/resume similarity
+scores are from the fp32 reference (mean / max absolute difference in score
+points, and Spearman rank correlation of the resume ranking per JD).
+
+Usage:
+    python -m backend.benchmarks.encoder_backends                      # all backends
+    python -m backend.benchmarks.encoder_backends --backends torch int8
+    python -m backend.benchmarks.encoder_backends --export-onnx        # export, then report
+"""
+import argparse
+import json
+import random
+import time
+import numpy as np
+from scipy.stats import spearmanr
+from backend.benchmarks.pdf_extraction import SAMPLE_SKILLS
+from backend.services.encoders import BACKENDS, OnnxEncoder, create_encoder, export_onnx
+from backend.services.matching_engine import MODEL_NAME
+
+JOB_DESCRIPTIONS = [
+    "Python Developer with experience in Flask and REST APIs. Must know SQL databases like PostgreSQL.",
+    "Data Scientist skilled in Machine Learning, Pandas and statistics to build predictive models.",
+    "DevOps Engineer to run Docker and Kubernetes workloads on AWS with CI/CD pipelines.",
+    "Frontend Developer building React applications with modern JavaScript and CSS.",
+]
+
+ROLES = ["Backend Developer", "Data Analyst", "Graphic Designer", "Cloud Engineer", "QA Tester", "Student"]
+
+def fixed_corpus(count=60, seed=7):
+    """Deterministic resumes mixing relevant and unrelated profiles."""
+    rng = random.Random(seed)
+    resumes = []
+    for i in range(count):
+        role = ROLES[i % len(ROLES)]
+        skills = ", ".join(rng.sample(SAMPLE_SKILLS, rng.randint(2, 6)))
+        resumes.append(
+            f"{role} with {rng.randint(1, 9)} years of experience. Worked with {skills}. "
+            f"Led a team of {rng.randint(2, 12)} and shipped {rng.randint(1, 5)} products."
+        )
+    return resumes
+
+def _scores(encoder, resumes, batch_size):
+    start = time.perf_counter()
+    resume_vectors = encoder.encode(resumes, batch_size=batch_size)
+    jd_vectors = encoder.encode(JOB_DESCRIPTIONS, batch_size=batch_size)
+    seconds = time.perf_counter() - start
+    # Rows: JDs, columns: resumes (percentages, like the API)
+    return (jd_vectors @ resume_vectors.T) * 100, seconds
+
+def run(backends=BACKENDS, count=60, batch_size=32, repeat=3):
+    resumes = fixed_corpus(count)
+    texts = len(resumes) + len(JOB_DESCRIPTIONS)
+    results = {}
+    reference = None
+    # fp32 torch first: it is the reference for every other backend
+    for backend in sorted(backends, key=lambda b: b != "torch"):
+        if backend == "onnx" and not OnnxEncoder.available():
+            results[backend] = {"status": "unavailable", "reason": "onnxruntime or local ONNX export missing"}
+            continue
+        try:
+            encoder = create_encoder(MODEL_NAME, backend)
+            start = time.perf_counter()
+            encoder.load()
+            load_seconds = time.perf_counter() - start
+
+            _scores(encoder, resumes[:4], batch_size)  # warm-up
+            timings = []
+            for _ in range(repeat):
+                scores, seconds = _scores(encoder, resumes, batch_size)
+                timings.append(seconds)
+        except Exception as e:
+            results[backend] = {"status": "failed", "reason": str(e)}
+            continue
+
+        best = min(timings)
+        report = {
+            "status": "ok",
+            "load_seconds": round(load_seconds, 2),
+            "texts_per_second": round(texts / best, 1),
+            "ms_per_text": round(best / texts * 1000, 3),
+        }
+        if backend == "torch":
+            reference = scores
+        elif reference is not None:
+            diff = np.abs(scores - reference)
+            report.update({
+                "mean_abs_score_diff": round(float(diff.mean()), 3),
+                "max_abs_score_diff": round(float(diff.max()), 3),
+                "min_rank_correlation": round(float(min(
+                    spearmanr(row, ref_row)[0] for row, ref_row in zip(scores, reference)
+                )), 4),
+                "speedup_vs_fp32": round(results["torch"]["ms_per_text"] / report["ms_per_text"], 2),
+            })
+        results[backend] = report
+
+    return {"model": MODEL_NAME, "resumes": len(resumes), "job_descriptions": len(JOB_DESCRIPTIONS),
+            "backends": results}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=BACKENDS)
+    parser.add_argument("--count", type=int, default=60, help="Number of resumes in the corpus")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--export-onnx", action="store_true",
+                        help="Export the locally cached model to Config.ONNX_MODEL_DIR first")
+    args = parser.parse_args()
+
+    if args.export_onnx:
+        print(f"Exported ONNX model to {export_onnx(MODEL_NAME)}")
+    print(json.dumps(run(args.backends, args.count, args.batch_size, args.repeat), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark: tiered PDF extraction (PyPDF2 first, pdfplumber fallback) vs pdfplumber only.
+
+Usage:
+    python -m backend.benchmarks.pdf_extraction                 # generated sample corpus
+    python -m backend.benchmarks.pdf_extraction --dir resumes/  # your own PDFs
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import tempfile
+import time
+from backend.benchmarks.documents import write_pdf
+from backend.services.resume_parser import iter_pdf_pages
+
+SAMPLE_SKILLS = [
+    "Python", "Java", "SQL", "Flask", "Django", "React", "Docker", "Kubernetes",
+    "AWS", "PostgreSQL", "Machine Learning", "Pandas", "Git", "CI/CD", "Linux",
+]
+
+def generate_sample_corpus(directory, count=20, seed=42):
+    """Writes simple single-column resumes (1-4 pages) and returns their paths."""
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        pages = []
+        for page in range(rng.randint(1, 4)):
+            lines = [f"Candidate {i} - page {page + 1}"]
+            for _ in range(rng.randint(25, 45)):
+                skills = ", ".join(rng.sample(SAMPLE_SKILLS, 3))
+                lines.append(f"Delivered production systems using {skills} for {rng.randint(1, 9)} years.")
+            pages.append(lines)
+        path = os.path.join(directory, f"resume_{i:03d}.pdf")
+        write_pdf(path, pages)
+        paths.append(path)
+    return paths
+
+def _extract(path, tiered):
+    pages = list(iter_pdf_pages(path, tiered=tiered))
+    return "\n".join(text for _, text, _ in pages if text), [tier for _, _, tier in pages]
+
+def _word_overlap(a, b):
+    """Jaccard overlap of the word sets, as a rough check that both tiers agree."""
+    words_a, words_b = set(a.split()), set(b.split())
+    if not words_a and not words_b:
+        return 1.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+def run(paths, repeat=3):
+    layout_seconds = tiered_seconds = 0.0
+    tier_counts = {"fast": 0, "layout": 0}
+    overlaps = []
+    for path in paths:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            layout_text, _ = _extract(path, tiered=False)
+            layout_seconds += time.perf_counter() - start
+
+            start = time.perf_counter()
+            tiered_text, tiers = _extract(path, tiered=True)
+            tiered_seconds += time.perf_counter() - start
+
+        for tier in tiers:
+            tier_counts[tier] += 1
+        overlaps.append(_word_overlap(layout_text, tiered_text))
+
+    runs = len(paths) * repeat
+    return {
+        "documents": len(paths),
+        "layout_ms_per_doc": round(layout_seconds / runs * 1000, 2),
+        "tiered_ms_per_doc": round(tiered_seconds / runs * 1000, 2),
+        "speedup": round(layout_seconds / tiered_seconds, 2) if tiered_seconds else None,
+        "pages_by_tier": tier_counts,
+        "min_word_overlap": round(min(overlaps), 3) if overlaps else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", help="Directory of PDFs to benchmark (default: generated corpus)")
+    parser.add_argument("--count", type=int, default=20, help="Size of the generated corpus")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.dir:
+        paths = sorted(glob.glob(os.path.join(args.dir, "*.pdf")))
+        print(json.dumps(run(paths, args.repeat), indent=2))
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = generate_sample_corpus(tmp, args.count)
+            print(json.dumps(run(paths, args.repeat), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark: write-behind bulk persistence vs one insert (one round-trip) per row.
+
+Each synthetic analysis produces the rows of a real one: 1 resume_analysis row plus
+one role_scores row per role, its recommendations and a roadmap. Both strategies write
+to the SQLite stand-in; --latency-ms adds a simulated network round-trip per call,
+as a remote Supabase insert would pay.
+
+Usage:
+    python -m backend.benchmarks.persistence
+    python -m backend.benchmarks.persistence --analyses 2000 --latency-ms 2
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from backend.services.persistence import TABLES, SQLiteStore, WriteBehindWriter, analysis_rows
+
+ROLES = ["Java Developer", "Python Developer", "Data Scientist", "Frontend Developer",
+         "DevOps Engineer", "Full Stack Developer", "Data Analyst", "Backend Developer"]
+
+def sample_result(i):
+    return {
+        "file": f"resume_{i}.pdf",
+        "skills": {"Programming Languages": ["Python", "Java"], "Databases": ["SQL"]},
+        "match": {"overall_score": 71.5, "keyword_match": 60.2, "semantic_match": 79.0},
+        "role_analysis": [
+            {"role": role, "score": 90.0 - 10 * n, "missing_critical_skills": ["Docker"], "matched_skills": ["Python"]}
+            for n, role in enumerate(ROLES)
+        ],
+        "recommendations": [
+            {"type": "Critical Skill", "text": "Learn Docker.", "priority": "High"},
+            {"type": "High-Impact Skill", "text": "Learning Pandas would raise your match.", "priority": "High"},
+            {"type": "Strategy", "text": "Build projects.", "priority": "Medium"},
+        ],
+        "roadmap": [{"week": "1-2", "topic": "Docker basics"}],
+    }
+
+class LatencyStore(SQLiteStore):
+    """SQLite store that sleeps latency seconds per call, like a network round-trip."""
+    def __init__(self, path, latency):
+        super().__init__(path)
+        self.latency = latency
+
+    def insert_many(self, table, rows):
+        if self.latency:
+            time.sleep(self.latency)
+        super().insert_many(table, rows)
+
+def per_row(store, batches):
+    for rows in batches:
+        for table in TABLES:
+            for row in rows[table]:
+                store.insert_many(table, [row])
+
+def write_behind(store, batches, batch_size):
+    writer = WriteBehindWriter(store, batch_size=batch_size, flush_interval=0.05, max_queue=len(batches) + 1)
+    submit_start = time.perf_counter()
+    for rows in batches:
+        writer.submit(rows)
+    submit_seconds = time.perf_counter() - submit_start
+    writer.close()
+    return submit_seconds
+
+def run(analyses=1000, latency_ms=0.0, batch_size=500):
+    batches = [analysis_rows(sample_result(i), "Python developer JD")[1] for i in range(analyses)]
+    total_rows = sum(len(rows) for batch in batches for rows in batch.values())
+    results = {"analyses": analyses, "rows": total_rows, "latency_ms": latency_ms}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LatencyStore(os.path.join(tmp, "per_row.sqlite3"), latency_ms / 1000)
+        start = time.perf_counter()
+        per_row(store, batches)
+        seconds = time.perf_counter() - start
+        results["per_row_rows_per_second"] = round(total_rows / seconds, 1)
+
+        store = LatencyStore(os.path.join(tmp, "bulk.sqlite3"), latency_ms / 1000)
+        start = time.perf_counter()
+        submit_seconds = write_behind(store, batches, batch_size)
+        seconds = time.perf_counter() - start
+        assert store.count("role_scores") == analyses * len(ROLES)
+        results["write_behind_rows_per_second"] = round(total_rows / seconds, 1)
+        # What a request actually waits for: enqueueing its rows
+        results["write_behind_submit_us_per_analysis"] = round(submit_seconds / analyses * 1e6, 2)
+
+    results["speedup"] = round(results["write_behind_rows_per_second"] / results["per_row_rows_per_second"], 1)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--analyses", type=int, default=1000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated round-trip per insert call")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    print(json.dumps(run(args.analyses, args.latency_ms, args.batch_size), indent=2))
+
+if __name__ == "__main__":
+    main()
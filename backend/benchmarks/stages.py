@@ -0,0 +1,225 @@
+"""
+Stage-level benchmark suite: latency percentiles and throughput of each hot path
+over a generated corpus (see corpus.py), with an optional regression gate.
+
+Stages (one sample per resume, every sample uncached, best of --rounds rounds):
+    parse_resume, extract_skills, score_roles, calculate_keyword_score,
+    calculate_semantic_score, evaluate (keyword + semantic), evaluate_sections
+    (the same with per-section scores), pipeline (parse -> sections -> skills ->
+    roles -> recommendations -> JD match, as in analysis_service.analyze_resume)
+
+Results are printed as JSON (and written to --output). With --baseline, a stage
+fails when its p50 or p95 is more than --tolerance slower than the stored
+baseline (and at least --min-delta-ms slower); the exit code is then 1.
+Baselines are machine specific: record one with --save-baseline on the machine
+that runs the gate.
+
+Usage:
+    python -m backend.benchmarks.stages --encoder stub                       # model-free
+    python -m backend.benchmarks.stages --encoder stub --save-baseline baseline.json
+    python -m backend.benchmarks.stages --encoder stub --baseline baseline.json --tolerance 0.5
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from backend.benchmarks.corpus import generate_corpus
+from backend.config import Config
+from backend.services.embedding_cache import EmbeddingCache
+from backend.services.matching_engine import MatchingEngine
+from backend.services.nlp_processor import nlp_processor
+from backend.services.recommendation_engine import recommendation_engine
+from backend.services.resume_parser import parse_resume, clean_text, segment_sections
+from backend.services.role_scorer import role_scorer
+from backend.services.skill_extractor import skill_extractor
+
+# Run settings that must match for a baseline comparison to mean anything
+COMPARABLE = ("encoder", "resumes", "density", "formats", "rounds", "semantic_chunking")
+
+def _summary(latencies):
+    ms = np.array(latencies, dtype=np.float64) * 1000
+    return {
+        "count": len(ms),
+        "mean_ms": round(float(ms.mean()), 3),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "throughput_per_s": round(len(ms) / (ms.sum() / 1000), 1) if ms.sum() else None,
+    }
+
+def _fresh_engine(encoder):
+    """Matching engine sharing the loaded encoder, with an empty in-memory embedding cache."""
+    engine = MatchingEngine(encoder.name)
+    engine.encoder = encoder
+    engine.embedding_cache = EmbeddingCache(encoder.cache_id)
+    engine.warm_up()
+    return engine
+
+def _time(samples, fn):
+    latencies = []
+    for sample in samples:
+        start = time.perf_counter()
+        fn(sample)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def _skill_recall(expected, extracted):
+    """Share of the skills written into each resume that extraction found."""
+    found = total = 0
+    for skills, result in zip(expected, extracted):
+        names = {s.lower() for values in result.values() for s in values}
+        found += sum(1 for s in skills if s.lower() in names)
+        total += len(skills)
+    return round(found / total, 4) if total else None
+
+def _best_of(rounds):
+    """Per metric, the best of several rounds (timer noise only ever makes a round slower)."""
+    best = dict(rounds[0])
+    for summary in rounds[1:]:
+        for key, value in summary.items():
+            if key.endswith("_ms"):
+                best[key] = min(best[key], value)
+            elif key == "throughput_per_s" and value is not None:
+                best[key] = max(best[key] or 0, value)
+    return best
+
+def run(encoder="stub", resumes=100, jds=10, density=0.5, formats=("pdf", "docx"), seed=42, rounds=3):
+    config = {
+        "encoder": encoder, "resumes": resumes, "jds": jds, "density": density,
+        "formats": list(formats), "seed": seed, "rounds": rounds,
+        "semantic_chunking": Config.SEMANTIC_CHUNKING,
+    }
+    results = {"config": config, "stages": {}}
+    shared = MatchingEngine(encoder)
+    shared.warm_up()
+    nlp_processor.warm_up()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus = generate_corpus(tmp, resumes, jds, density, tuple(formats), seed=seed)
+        docs = corpus["resumes"]
+        jd_for = [corpus["jds"][i % len(corpus["jds"])]["text"] for i in range(len(docs))]
+        paths = [doc["path"] for doc in docs]
+
+        # Warm-up on one document, so one-off costs (imports, pools) are not sampled
+        warm = parse_resume(paths[0])
+        skill_extractor.extract_skills(warm)
+        shared.evaluate(warm, jd_for[0])
+
+        raw_texts = [parse_resume(path, raw=True) for path in paths]
+        texts = [clean_text(raw_text) for raw_text in raw_texts]
+        skills = [skill_extractor.extract_skills(text) for text in texts]
+        results["skill_recall"] = _skill_recall([doc["skills"] for doc in docs], skills)
+        pairs = list(zip(texts, jd_for))
+        spans = [[(s.start, s.end) for s in segment_sections(raw_text)] for raw_text in raw_texts]
+
+        def semantic(round_engine):
+            return lambda pair: round_engine.calculate_semantic_score(*pair)
+
+        def evaluate(round_engine):
+            return lambda pair: round_engine.evaluate(*pair)
+
+        def evaluate_sections(round_engine):
+            return lambda sample: round_engine.evaluate(sample[0], sample[1], sections=sample[2])
+
+        def pipeline(round_engine):
+            def analyze(sample):
+                path, jd_text = sample
+                raw_text = parse_resume(path, raw=True)
+                text = clean_text(raw_text)
+                sections = segment_sections(raw_text)
+                extracted = skill_extractor.extract_skills(text, sections=sections)
+                role_analysis = role_scorer.score_roles(extracted)
+                recommendation_engine.generate_recommendations(role_analysis, extracted_skills=extracted)
+                return round_engine.evaluate(text, jd_text, sections=[(s.start, s.end) for s in sections])
+            return analyze
+
+        # stage -> (samples, factory of the timed function); factories get a fresh engine per round
+        stages = {
+            "parse_resume": (paths, lambda _: parse_resume),
+            "extract_skills": (texts, lambda _: skill_extractor.extract_skills),
+            "score_roles": (skills, lambda _: role_scorer.score_roles),
+            "calculate_keyword_score": (pairs, lambda _: lambda pair: shared.calculate_keyword_score(*pair)),
+            "calculate_semantic_score": (pairs, semantic),
+            "evaluate": (pairs, evaluate),
+            "evaluate_sections": ([pair + (span,) for pair, span in zip(pairs, spans)], evaluate_sections),
+            "pipeline": (list(zip(paths, jd_for)), pipeline),
+        }
+        for stage, (samples, factory) in stages.items():
+            summaries = []
+            for _ in range(rounds):
+                # Every sample is measured uncached: no earlier parse or embedding is reused
+                nlp_processor.clear_cache()
+                fn = factory(_fresh_engine(shared.encoder))
+                summaries.append(_summary(_time(samples, fn)))
+            results["stages"][stage] = _best_of(summaries)
+
+    return results
+
+def compare(results, baseline, tolerance=0.5, min_delta_ms=0.1):
+    """Returns the regressions of results against baseline (empty list if none or not comparable)."""
+    mismatched = [key for key in COMPARABLE if baseline.get("config", {}).get(key) != results["config"].get(key)]
+    if mismatched:
+        print(f"Baseline was recorded with different settings ({', '.join(mismatched)}), not comparing",
+              file=sys.stderr)
+        return []
+
+    regressions = []
+    for stage, current in results["stages"].items():
+        reference = baseline.get("stages", {}).get(stage)
+        if not reference:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            limit = reference[metric] * (1 + tolerance)
+            if current[metric] > limit and current[metric] - reference[metric] >= min_delta_ms:
+                regressions.append({
+                    "stage": stage, "metric": metric,
+                    "baseline": reference[metric], "current": current[metric],
+                    "ratio": round(current[metric] / reference[metric], 2) if reference[metric] else None,
+                })
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--encoder", default="stub", choices=["torch", "int8", "onnx", "stub"],
+                        help="Semantic model backend (stub needs no model download)")
+    parser.add_argument("--resumes", type=int, default=100)
+    parser.add_argument("--jds", type=int, default=10)
+    parser.add_argument("--density", type=float, default=0.5, help="Fraction of the role's skills per resume")
+    parser.add_argument("--formats", nargs="+", default=["pdf", "docx"], choices=["pdf", "docx"])
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rounds", type=int, default=3, help="Rounds per stage; the best round is reported")
+    parser.add_argument("--output", help="Also write the results JSON here")
+    parser.add_argument("--save-baseline", help="Store these results as the baseline")
+    parser.add_argument("--baseline", help="Fail if a stage regressed past this baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown (0.5 = 50%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.1,
+                        help="Ignore slowdowns smaller than this (timer noise on sub-ms stages)")
+    args = parser.parse_args()
+
+    results = run(args.encoder, args.resumes, args.jds, args.density, tuple(args.formats), args.seed,
+                  args.rounds)
+
+    regressions = []
+    if args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_delta_ms)
+        results["regressions"] = regressions
+    elif args.baseline:
+        print(f"Baseline {args.baseline} not found, not comparing", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    print(output)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(output)
+    if regressions:
+        for r in regressions:
+            print(f"REGRESSION {r['stage']} {r['metric']}: {r['baseline']} -> {r['current']} ms", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -17,3 +17,170 @@ class Config:
     # Secret key for Flask session management and cryptographic signing
     # Defaults to a dev key if not set (DO NOT use default in production)
     SECRET_KEY = os.getenv("SECRET_KEY", "dev_secret_key_change_in_prod")
+
+    # Bulk NLP settings used when streaming many texts through spaCy's nlp.pipe
+    # Batch size trades memory for throughput; N_PROCESS > 1 spreads work across cores
+    NLP_BATCH_SIZE = int(os.getenv("NLP_BATCH_SIZE", "64"))
+    NLP_N_PROCESS = int(os.getenv("NLP_N_PROCESS", "1"))
+
+    # Embedding cache for the semantic model
+    # Directory for the persistent memory-mapped store (empty string disables the disk tier)
+    EMBEDDING_CACHE_DIR = os.getenv(
+        "EMBEDDING_CACHE_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "embeddings")
+    )
+    # Storage precision on disk: float32 (exact) or float16 (half the size)
+    EMBEDDING_CACHE_DTYPE = os.getenv("EMBEDDING_CACHE_DTYPE", "float32")
+    # Size limit of the in-process LRU tier
+    EMBEDDING_CACHE_MEMORY_MB = int(os.getenv("EMBEDDING_CACHE_MEMORY_MB", "64"))
+    # Size limit of the disk tier's vectors file; once full, the disk tier starts over empty
+    EMBEDDING_CACHE_DISK_MB = int(os.getenv("EMBEDDING_CACHE_DISK_MB", "1024"))
+
+    # Persistent keyword index (corpus-level IDF / BM25 statistics over stored resumes and JDs)
+    KEYWORD_INDEX_PATH = os.getenv(
+        "KEYWORD_INDEX_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "keyword_index.npz")
+    )
+    # Analysed resumes / JDs kept in the corpus statistics (the oldest are dropped beyond this)
+    KEYWORD_INDEX_MAX_DOCS = int(os.getenv("KEYWORD_INDEX_MAX_DOCS", "50000"))
+    # The index is written to disk after this many additions, and at exit
+    KEYWORD_INDEX_SAVE_EVERY = int(os.getenv("KEYWORD_INDEX_SAVE_EVERY", "200"))
+
+    # Load the spaCy and SentenceTransformer models in a background thread at startup
+    # The API accepts connections immediately and /ready reports when models are loaded
+    WARMUP_ON_START = os.getenv("WARMUP_ON_START", "1") == "1"
+
+    # PDF parsing limits, so one pathological upload cannot stall a worker
+    # Pages beyond PDF_MAX_PAGES and text beyond PDF_MAX_TEXT_BYTES are dropped (result flagged truncated)
+    PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "50"))
+    PDF_MAX_TEXT_BYTES = int(os.getenv("PDF_MAX_TEXT_BYTES", str(2 * 1024 * 1024)))
+    # Per-document time budget in seconds; partial text is returned once it is spent
+    PDF_TIME_BUDGET = float(os.getenv("PDF_TIME_BUDGET", "20"))
+    # PDFs with at least this many pages are split across a process pool
+    PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "16"))
+    PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+    # Try PyPDF2's plain text-stream extraction first and only fall back to
+    # pdfplumber's layout analysis for pages that fail the quality checks
+    PDF_TIERED_EXTRACTION = os.getenv("PDF_TIERED_EXTRACTION", "1") == "1"
+
+    # Cache of parsed resume text and derived features (skills, entities), keyed by file hash
+    # SQLite file path (":memory:" keeps it in-process only)
+    RESUME_CACHE_PATH = os.getenv(
+        "RESUME_CACHE_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "resume_cache.sqlite3")
+    )
+    RESUME_CACHE_TTL_HOURS = float(os.getenv("RESUME_CACHE_TTL_HOURS", "168"))
+    RESUME_CACHE_MAX_MB = int(os.getenv("RESUME_CACHE_MAX_MB", "256"))
+
+    # Bulk ingest pipeline (python -m backend.services.bulk_ingest)
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "32"))
+    # Max documents buffered between stages (bounds memory regardless of archive size)
+    INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "128"))
+
+    # Knowledge base (skills, roles, roadmaps) compiled into one versioned snapshot
+    # Pickled snapshot for fast cold starts (empty string disables it)
+    KB_SNAPSHOT_PATH = os.getenv(
+        "KB_SNAPSHOT_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "knowledge_base.pickle")
+    )
+    # Seconds between checks of the source files' mtimes (negative disables hot reload)
+    KB_RELOAD_INTERVAL = float(os.getenv("KB_RELOAD_INTERVAL", "2"))
+
+    # /analyze API: analyses run on a bounded worker pool instead of the Flask request threads
+    ANALYZE_WORKERS = int(os.getenv("ANALYZE_WORKERS", str(min(4, os.cpu_count() or 1))))
+    # Jobs allowed to wait for a worker before new uploads are rejected with 429
+    ANALYZE_QUEUE_SIZE = int(os.getenv("ANALYZE_QUEUE_SIZE", "32"))
+    # Seconds a request waits for its result before answering 202 with a job id
+    ANALYZE_LATENCY_BUDGET = float(os.getenv("ANALYZE_LATENCY_BUDGET", "2"))
+    # Seconds finished jobs stay retrievable at /analyze/<job_id>
+    ANALYZE_JOB_TTL = int(os.getenv("ANALYZE_JOB_TTL", "600"))
+    # Largest accepted upload
+    MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "10"))
+
+    # Micro-batching of semantic model encodes across concurrent requests
+    ENCODE_BATCHING = os.getenv("ENCODE_BATCHING", "1") == "1"
+    # A batch is sent to the model once it holds this many texts...
+    ENCODE_MAX_BATCH_SIZE = int(os.getenv("ENCODE_MAX_BATCH_SIZE", "64"))
+    # ...or once its oldest request has waited this long (the added latency bound)
+    ENCODE_MAX_WAIT_MS = float(os.getenv("ENCODE_MAX_WAIT_MS", "5"))
+    # A caller stops waiting for its batched encode after this many seconds (TimeoutError)
+    ENCODE_TIMEOUT = float(os.getenv("ENCODE_TIMEOUT", "60"))
+
+    # Chunked semantic encoding of long resumes / JDs (the model reads ~256 word pieces)
+    # off | mean | max (pooled chunk vectors) | chunk (chunk-to-chunk matching)
+    SEMANTIC_CHUNKING = os.getenv("SEMANTIC_CHUNKING", "mean")
+    CHUNK_MAX_WORDS = int(os.getenv("CHUNK_MAX_WORDS", "180"))
+    CHUNK_OVERLAP_WORDS = int(os.getenv("CHUNK_OVERLAP_WORDS", "40"))
+    # Upper bound on chunks per document, which bounds the worst-case encoding cost
+    CHUNK_MAX_PER_DOC = int(os.getenv("CHUNK_MAX_PER_DOC", "8"))
+
+    # Semantic model backend: torch (fp32), int8 (dynamically quantized), onnx, stub (tests)
+    ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "torch")
+    # Intra-op threads for torch / ONNX Runtime (0 keeps the library default)
+    ENCODER_THREADS = int(os.getenv("ENCODER_THREADS", "0"))
+    # Local ONNX export (model.onnx + tokenizer.json) used by the onnx backend
+    ONNX_MODEL_DIR = os.getenv(
+        "ONNX_MODEL_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "onnx", "all-MiniLM-L6-v2")
+    )
+
+    # Reverse-matching indexes (top-k JDs for a resume / resumes for a JD)
+    # Directory of the memory-mapped indexes (empty string keeps them in memory)
+    VECTOR_INDEX_DIR = os.getenv(
+        "VECTOR_INDEX_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "vector_index")
+    )
+    # float32, or float16 for half the memory
+    VECTOR_INDEX_DTYPE = os.getenv("VECTOR_INDEX_DTYPE", "float32")
+    # Clusters scanned per query once clusters are trained (0 = exact search)
+    VECTOR_INDEX_NPROBE = int(os.getenv("VECTOR_INDEX_NPROBE", "0"))
+    # A snapshot is written (and the journal emptied) after this many adds / removes
+    VECTOR_INDEX_SNAPSHOT_EVERY = int(os.getenv("VECTOR_INDEX_SNAPSHOT_EVERY", "1000"))
+
+    # Write-behind persistence of analyses (resume_analysis, role_scores, recommendations, learning_roadmaps)
+    # auto: Supabase when SUPABASE_URL / SUPABASE_KEY are set, otherwise the local SQLite stand-in
+    # supabase | sqlite | off
+    PERSISTENCE_BACKEND = os.getenv("PERSISTENCE_BACKEND", "auto")
+    PERSISTENCE_SQLITE_PATH = os.getenv(
+        "PERSISTENCE_SQLITE_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "analyses.sqlite3")
+    )
+    # A bulk insert is sent once this many rows are buffered, or every FLUSH_INTERVAL seconds
+    PERSISTENCE_BATCH_SIZE = int(os.getenv("PERSISTENCE_BATCH_SIZE", "500"))
+    PERSISTENCE_FLUSH_INTERVAL = float(os.getenv("PERSISTENCE_FLUSH_INTERVAL", "1"))
+    # Analyses waiting to be written; beyond this rows are dropped rather than slowing requests
+    PERSISTENCE_QUEUE_SIZE = int(os.getenv("PERSISTENCE_QUEUE_SIZE", "10000"))
+
+    # Stage latency histograms, error counters and cache / queue gauges on /metrics
+    # (0 turns every span into a no-op)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+    # Sampled profiling (cProfile + tracemalloc) of single analyses, see services/profiling.py
+    # Fraction of analyses profiled (0 = only when forced)
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    # Let clients force a profile with the "X-Profile: 1" request header
+    PROFILE_ALLOW_HEADER = os.getenv("PROFILE_ALLOW_HEADER", "0") == "1"
+    PROFILE_DIR = os.getenv(
+        "PROFILE_DIR",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "profiles")
+    )
+    # Oldest dumps are deleted beyond this size
+    PROFILE_MAX_MB = int(os.getenv("PROFILE_MAX_MB", "200"))
+    # Keep the uploaded file and form fields next to its profile so it can be replayed.
+    # Off by default: resumes and job descriptions are personal data.
+    PROFILE_STORE_INPUTS = os.getenv("PROFILE_STORE_INPUTS", "0") == "1"
+
+    # Near-duplicate detection (MinHash + LSH over the cleaned resume text)
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1") == "1"
+    # Estimated Jaccard similarity of word shingles above which a resume counts as a near duplicate
+    DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.9"))
+    # Signature length (4 bytes each per indexed resume) and shingle size in words
+    DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "128"))
+    DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", "3"))
+    DEDUP_INDEX_PATH = os.getenv(
+        "DEDUP_INDEX_PATH",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "dedup_index.npz")
+    )
+    # The index file is updated after this many adds / removals (and at exit), merged with other processes' saves
+    DEDUP_SAVE_EVERY = int(os.getenv("DEDUP_SAVE_EVERY", "100"))
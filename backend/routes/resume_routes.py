@@ -0,0 +1,68 @@
+import os
+from flask import request, url_for
+from flask_restful import Resource
+from backend.config import Config
+from backend.services.job_queue import QueueFull
+from backend.services.analysis_service import analysis_queue, analysis_key, analyze_resume, AnalysisInputError
+
+ALLOWED_EXTENSIONS = ('.pdf', '.docx')
+
+def job_response(job):
+    """
+    200 with the result once finished, 202 while queued/running. A failed job answers
+    422 with the reason when the upload could not be analysed, otherwise 500 with a
+    generic message (the details are logged, not returned).
+    """
+    body = job.to_dict()
+    if job.status == "done":
+        return body, 200
+    if job.status == "failed":
+        if isinstance(job.exception, AnalysisInputError):
+            return body, 422
+        body["error"] = "Internal error while analysing the resume"
+        return body, 500
+    body["status_url"] = url_for("analyze_job", job_id=job.id)
+    return body, 202, {"Location": body["status_url"]}
+
+class AnalyzeResource(Resource):
+    def post(self):
+        """
+        Uploads a resume and runs the full analysis.
+        Form fields: file (PDF/DOCX), jd (optional job description), target_role (optional).
+        Answers 200 with the result if it is ready within the latency budget,
+        otherwise 202 with a job id to poll. 429 when the analysis queue is full.
+        """
+        upload = request.files.get("file")
+        if upload is None or not upload.filename:
+            return {"error": "No resume file uploaded (form field 'file')"}, 400
+        filename = os.path.basename(upload.filename)
+        if not filename.lower().endswith(ALLOWED_EXTENSIONS):
+            return {"error": "Unsupported file format, upload a PDF or DOCX"}, 400
+
+        file_bytes = upload.read()
+        jd_text = request.form.get("jd") or None
+        target_role = request.form.get("target_role") or None
+        profile = Config.PROFILE_ALLOW_HEADER and request.headers.get("X-Profile") == "1"
+
+        try:
+            job, coalesced = analysis_queue.submit(
+                analysis_key(file_bytes, jd_text, target_role),
+                analyze_resume, file_bytes, filename, jd_text, target_role, profile
+            )
+        except QueueFull:
+            return {"error": "Too many analyses in progress, retry shortly"}, 429, {"Retry-After": "5"}
+
+        job.wait(Config.ANALYZE_LATENCY_BUDGET)
+        return job_response(job)
+
+class AnalyzeJobResource(Resource):
+    def get(self, job_id):
+        """Status (and result once done) of an analysis job."""
+        job = analysis_queue.get(job_id)
+        if job is None:
+            return {"error": "Unknown or expired job id"}, 404
+        return job_response(job)
+
+def register_routes(api):
+    api.add_resource(AnalyzeResource, '/analyze')
+    api.add_resource(AnalyzeJobResource, '/analyze/<string:job_id>', endpoint="analyze_job")
@@ -0,0 +1,118 @@
+import os
+import hashlib
+from backend.config import Config
+from backend.services.job_queue import JobQueue
+from backend.services.resume_cache import resume_cache
+from backend.services.role_scorer import role_scorer
+from backend.services.matching_engine import matching_engine
+from backend.services.recommendation_engine import recommendation_engine
+from backend.services.persistence import persist_analysis
+from backend.services.metrics import metrics
+from backend.services.profiling import profiler
+from backend.services.resume_parser import section_at
+
+class AnalysisInputError(ValueError):
+    """The upload itself cannot be analysed (e.g. no extractable text); reported to the client."""
+
+def analysis_key(file_bytes, jd_text, target_role=None):
+    """Identical uploads (same file, JD and target role) share one computation."""
+    file_hash = hashlib.sha256(file_bytes).hexdigest()
+    jd_hash = hashlib.sha256((jd_text or "").encode('utf-8')).hexdigest()
+    return f"{file_hash}:{jd_hash}:{target_role or ''}"
+
+def section_scores(sections, entities, match):
+    """
+    Per-section view of one analysis: the section spans and skills from the resume
+    cache, the entities bucketed by offset, and the section scores of the JD match.
+    """
+    starts = [section["start"] for section in sections]
+    by_section = [[] for _ in sections]
+    for ent in entities:
+        if len(ent) >= 4:
+            by_section[section_at(starts, ent[2])].append({"text": ent[0], "label": ent[1]})
+
+    scores = (match or {}).get("sections") or [None] * len(sections)
+    return [
+        dict(section, entities=section_entities, match=score)
+        for section, section_entities, score in zip(sections, by_section, scores)
+    ]
+
+def analyze_resume(file_bytes, filename, jd_text=None, target_role=None, profile=False):
+    """
+    Runs _analyze, under cProfile / tracemalloc when sampled by the profiler
+    (or when profile is set). The result then carries the dump's name as profile_id.
+    """
+    with profiler.maybe_profile(file_bytes, filename, forced=profile,
+                                jd_text=jd_text, target_role=target_role) as dump_dir:
+        result = _analyze(file_bytes, filename, jd_text, target_role)
+    if dump_dir:
+        result["profile_id"] = os.path.basename(dump_dir)
+    return result
+
+@metrics.timed("analyze")
+def _analyze(file_bytes, filename, jd_text=None, target_role=None, cache=None, persist=True):
+    """
+    Full analysis pipeline for one uploaded resume:
+    parse -> skills -> roles -> JD match -> recommendations -> roadmap.
+    Parsing and skill extraction are served from the resume cache on re-uploads.
+    The JD match is also broken down by resume section (section_scores) in the same pass.
+    The whole analysis uses one knowledge-base snapshot, recorded as kb_version.
+    The result is queued for write-behind persistence; the request never waits on the database.
+    Raises AnalysisInputError (a ValueError) if no text can be extracted.
+    cache: resume cache to use (default: the shared one); persist=False skips the
+    database write (profile replays).
+    """
+    cache = cache or resume_cache
+    snapshot = cache.current_snapshot()
+    resume = cache.load_resume_bytes(file_bytes, filename, snapshot=snapshot)
+    if not resume:
+        raise AnalysisInputError("No text could be extracted from the resume")
+
+    skills = resume["skills"]
+    role_analysis = role_scorer.score_roles(skills, snapshot=snapshot)
+    recommendations = recommendation_engine.generate_recommendations(
+        role_analysis, target_role, extracted_skills=skills, snapshot=snapshot
+    )
+
+    # Every analysed resume and JD feeds the corpus IDF used by keyword scoring
+    matching_engine.index_document(f"resume:{hashlib.sha256(file_bytes).hexdigest()}", resume["text"])
+    sections = resume.get("sections") or []
+    match = None
+    if jd_text:
+        matching_engine.index_document(f"jd:{hashlib.sha256(jd_text.encode('utf-8')).hexdigest()}", jd_text)
+        match = matching_engine.evaluate(resume["text"], jd_text,
+                                         sections=[(s["start"], s["end"]) for s in sections])
+
+    roadmap_role = target_role or (role_analysis[0]["role"] if role_analysis else None)
+    result = {
+        "file": filename,
+        "skills": skills,
+        "entities": [{"text": ent[0], "label": ent[1]} for ent in resume["entities"]],
+        "role_analysis": role_analysis,
+        "match": {key: value for key, value in match.items() if key != "sections"} if match else None,
+        "section_scores": section_scores(sections, resume["entities"], match) if sections else None,
+        "recommendations": recommendations,
+        "roadmap_role": roadmap_role,
+        "roadmap": recommendation_engine.get_roadmap(roadmap_role, snapshot) if roadmap_role else [],
+        "kb_version": snapshot.version,
+        # Set when parsing and skills were derived from an earlier, nearly identical upload
+        "near_duplicate": resume.get("near_duplicate"),
+    }
+
+    if not persist:
+        result["analysis_id"] = None
+        return result
+    try:
+        result["analysis_id"] = persist_analysis(result, jd_text, resume["text"])
+    except Exception as e:
+        print(f"Error queueing analysis for persistence: {e}")
+        metrics.record_error("persistence")
+        result["analysis_id"] = None
+    return result
+
+# Shared by every request thread; analyses run here instead of on the Flask threads
+analysis_queue = JobQueue(
+    workers=Config.ANALYZE_WORKERS,
+    max_pending=Config.ANALYZE_QUEUE_SIZE,
+    ttl=Config.ANALYZE_JOB_TTL,
+)
@@ -0,0 +1,363 @@
+"""
+Streaming bulk ingest of resume archives.
+
+Stages (each connected to the next by a bounded queue, so memory stays flat):
+    source -> parse (process pool) -> NLP/skills (nlp.pipe batches)
+           -> role scoring + JD matching (batched encodes) -> NDJSON output
+
+A checkpoint file lists every finished document, so an interrupted run
+can be restarted with the same arguments and picks up where it stopped.
+
+Near duplicates within a run (same resume re-uploaded with trivial edits) are
+detected with MinHash/LSH: they skip spaCy and reuse the skills of the first
+copy, and are reported as duplicate clusters.
+
+Usage:
+    python -m backend.services.bulk_ingest resumes/ --jd job.txt --output results.ndjson
+    python -m backend.services.bulk_ingest resumes.zip --workers 8
+"""
+import os
+import sys
+import json
+import hashlib
+import queue
+import zipfile
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeout
+from backend.config import Config
+from backend.services.resume_parser import parse_resume_bytes
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx')
+
+# Marks the end of the stream on every queue
+_DONE = object()
+
+# How often a blocked queue operation re-checks whether the run was stopped
+_POLL_SECONDS = 0.1
+
+class _Stopped(Exception):
+    """Raised inside a stage once another stage failed, to unwind it."""
+
+def iter_sources(source):
+    """
+    Yields (doc_id, filename, read_bytes) for every resume in a directory or zip.
+    read_bytes is a callable, so file contents are only read when they are parsed.
+    """
+    if zipfile.is_zipfile(source):
+        archive = zipfile.ZipFile(source)
+        for info in archive.infolist():
+            if not info.is_dir() and info.filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                yield (f"{os.path.basename(source)}:{info.filename}", info.filename,
+                       lambda name=info.filename: archive.read(name))
+        return
+
+    for root, dirs, files in os.walk(source):
+        dirs.sort()
+        for name in sorted(files):
+            if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                path = os.path.join(root, name)
+
+                def read_bytes(path=path):
+                    with open(path, 'rb') as f:
+                        return f.read()
+                yield os.path.relpath(path, source), name, read_bytes
+
+def _init_parse_worker():
+    # The ingest pool already uses every core; don't start nested PDF pools
+    Config.PDF_WORKERS = 1
+
+def _parse_task(file_bytes, filename):
+    """Runs in the process pool."""
+    try:
+        return parse_resume_bytes(file_bytes, filename), None
+    except Exception as e:
+        return None, str(e)
+
+class Checkpoint:
+    """Append-only list of finished document ids."""
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.done = {line.rstrip("\n") for line in f if line.strip()}
+        self._file = open(path, 'a', encoding='utf-8') if path else None
+
+    def mark(self, doc_ids):
+        if self._file is not None:
+            self._file.writelines(doc_id + "\n" for doc_id in doc_ids)
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+class BulkIngest:
+    def __init__(self, jd_text=None, workers=None, batch_size=None, queue_size=None, top_roles=3, dedup=None):
+        self.jd_text = jd_text
+        self.workers = workers or Config.INGEST_WORKERS
+        self.batch_size = batch_size or Config.INGEST_BATCH_SIZE
+        self.queue_size = queue_size or Config.INGEST_QUEUE_SIZE
+        self.top_roles = top_roles
+        self.dedup = Config.DEDUP_ENABLED if dedup is None else dedup
+        # First copy of each near-duplicate cluster -> the ids of all its copies
+        self.duplicate_clusters = {}
+        self._errors = []
+        # Set when any stage fails: every blocked put / get gives up and the stages unwind
+        self._stop = threading.Event()
+
+    def _stage(self, target, *args):
+        """Runs a stage in a thread; a failure is recorded (re-raised by run()) and stops the run."""
+        def runner():
+            try:
+                target(*args)
+            except _Stopped:
+                pass
+            except BaseException as e:
+                self._errors.append(e)
+                self._stop.set()
+        thread = threading.Thread(target=runner, daemon=True)
+        thread.start()
+        return thread
+
+    def _put(self, q, item):
+        """put() that gives up (raises _Stopped) once the run is stopped, instead of blocking forever."""
+        while True:
+            if self._stop.is_set():
+                raise _Stopped()
+            try:
+                q.put(item, timeout=_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+
+    def _get(self, q):
+        while True:
+            if self._stop.is_set():
+                raise _Stopped()
+            try:
+                return q.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                continue
+
+    def _parse_stage(self, sources, parsed_q):
+        """Submits files to the process pool, keeping at most queue_size in flight."""
+        pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_parse_worker)
+        try:
+            for doc_id, filename, read_bytes in sources:
+                try:
+                    future = pool.submit(_parse_task, read_bytes(), filename)
+                except Exception as e:
+                    future = None
+                    error = str(e)
+                # Futures are queued in input order; _put() waits while the queue is full
+                self._put(parsed_q, (doc_id, filename, future) if future else (doc_id, filename, error))
+            self._put(parsed_q, _DONE)
+        finally:
+            # On a stopped run, files not yet parsed are dropped rather than waited for
+            pool.shutdown(wait=not self._stop.is_set(), cancel_futures=self._stop.is_set())
+
+    def _batches(self, in_q):
+        batch = []
+        while True:
+            item = self._get(in_q)
+            if item is _DONE:
+                break
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _result(self, future):
+        """Waits for a parse result, giving up once the run is stopped."""
+        while True:
+            if self._stop.is_set():
+                raise _Stopped()
+            try:
+                return future.result(timeout=_POLL_SECONDS)
+            except FuturesTimeout:
+                continue
+
+    def _nlp_stage(self, parsed_q, skills_q):
+        """
+        Collects parsed texts and extracts skills batch by batch through nlp.pipe.
+        Each batch pins one knowledge-base snapshot, which the scoring stage reuses.
+        """
+        from backend.services.skill_extractor import skill_extractor
+        from backend.services.knowledge_base import knowledge_base
+        from backend.services.dedup import DuplicateDetector
+
+        # Run-local index (not persisted); first copy's skills kept per cluster root
+        detector = DuplicateDetector(path="") if self.dedup else None
+        root_of, root_skills = {}, {}
+
+        for batch in self._batches(parsed_q):
+            snapshot = knowledge_base.current()
+            records = []
+            for doc_id, filename, outcome in batch:
+                record = {"id": doc_id, "file": filename, "text": None, "error": None,
+                          "kb_version": snapshot.version}
+                if isinstance(outcome, str):
+                    record["error"] = outcome
+                else:
+                    text, error = self._result(outcome)
+                    record["text"], record["error"] = text, error
+                    if text is None and error is None:
+                        record["error"] = "No text could be extracted"
+                records.append(record)
+
+            fresh, duplicates = [], []
+            for record in records:
+                if not record["text"]:
+                    continue
+                match = None
+                if detector is not None:
+                    signature = detector.signature(record["text"])
+                    match = detector.find(signature)
+                    detector.add(record["id"], signature)
+                if match is None:
+                    fresh.append(record)
+                    continue
+                root = root_of.get(match[0], match[0])
+                root_of[record["id"]] = root
+                self.duplicate_clusters.setdefault(root, [root]).append(record["id"])
+                record["duplicate_of"], record["similarity"] = root, round(match[1], 3)
+                duplicates.append(record)
+
+            skills = skill_extractor.extract_skills_many(
+                [r["text"] for r in fresh], batch_size=self.batch_size, snapshot=snapshot
+            )
+            for record, extracted in zip(fresh, skills):
+                record["skills"] = extracted
+                if detector is not None:
+                    root_skills[record["id"]] = extracted
+            # Copies skip spaCy: the matcher runs on their own text, lemma matches come from the first copy
+            for record in duplicates:
+                prior = root_skills[record["duplicate_of"]]
+                record["skills"] = skill_extractor.update_skills(record["text"], prior, None, snapshot)
+            self._put(skills_q, (snapshot, records))
+        self._put(skills_q, _DONE)
+
+    def _scoring_stage(self, skills_q, out_q):
+        """Role scoring and JD matching per batch (one matrix product / one batched encode)."""
+        from backend.services.role_scorer import role_scorer
+        from backend.services.matching_engine import matching_engine
+
+        if self.jd_text:
+            matching_engine.index_document(f"jd:{hashlib.sha256(self.jd_text.encode('utf-8')).hexdigest()}",
+                                           self.jd_text)
+        while True:
+            item = self._get(skills_q)
+            if item is _DONE:
+                break
+            snapshot, records = item
+            valid = [r for r in records if r["text"]]
+            ranked_roles = role_scorer.score_roles_many(
+                [r["skills"] for r in valid], top_k=self.top_roles, snapshot=snapshot
+            )
+            for record, roles in zip(valid, ranked_roles):
+                record["top_roles"] = [
+                    {"role": r["role"], "score": r["score"], "missing_critical_skills": r["missing_critical_skills"]}
+                    for r in roles
+                ]
+            for record in valid:
+                matching_engine.index_document(f"resume:{record['id']}", record["text"])
+            if self.jd_text and valid:
+                ranked = matching_engine.rank(
+                    self.jd_text, [r["text"] for r in valid], batch_size=self.batch_size
+                )
+                for result in ranked:
+                    match = dict(result)
+                    valid[match.pop("index")]["match"] = match
+            self._put(out_q, records)
+        matching_engine.save_keyword_index()
+        self._put(out_q, _DONE)
+
+    def run(self, source, output, checkpoint_path=None):
+        """
+        Processes every resume in source (directory or zip) and writes one JSON line per
+        document to output (a file object). Returns the number of documents processed.
+        """
+        checkpoint = Checkpoint(checkpoint_path)
+        sources = (s for s in iter_sources(source) if s[0] not in checkpoint.done)
+
+        parsed_q = queue.Queue(maxsize=self.queue_size)
+        skills_q = queue.Queue(maxsize=max(2, self.queue_size // self.batch_size))
+        out_q = queue.Queue(maxsize=max(2, self.queue_size // self.batch_size))
+
+        threads = [
+            self._stage(self._parse_stage, sources, parsed_q),
+            self._stage(self._nlp_stage, parsed_q, skills_q),
+            self._stage(self._scoring_stage, skills_q, out_q),
+        ]
+
+        processed = 0
+        try:
+            while True:
+                try:
+                    records = self._get(out_q)
+                except _Stopped:
+                    break
+                if records is _DONE:
+                    break
+                for record in records:
+                    record.pop("text", None)
+                    output.write(json.dumps(record) + "\n")
+                output.flush()
+                # Only checkpoint what has actually been written
+                checkpoint.mark(r["id"] for r in records)
+                processed += len(records)
+        except BaseException:
+            self._stop.set()
+            raise
+        finally:
+            checkpoint.close()
+            for thread in threads:
+                # Stages poll the stop flag, so they exit within a poll interval (plus one batch)
+                thread.join(timeout=None if not self._stop.is_set() else 60)
+        if self._errors:
+            raise self._errors[0]
+        return processed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Bulk-ingest a directory or zip of resumes into NDJSON results."
+    )
+    parser.add_argument("source", help="Directory or .zip archive of PDF/DOCX resumes")
+    parser.add_argument("--jd", help="Text file with a job description to match every resume against")
+    parser.add_argument("--output", help="NDJSON output file (default: stdout)")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--workers", type=int, help="Parser processes (default: Config.INGEST_WORKERS)")
+    parser.add_argument("--batch-size", type=int, help="NLP / encoding batch size")
+    parser.add_argument("--top-roles", type=int, default=3)
+    parser.add_argument("--duplicates", help="Write the near-duplicate clusters found in this run to this JSON file")
+    parser.add_argument("--no-dedup", action="store_true", help="Analyse near duplicates in full")
+    args = parser.parse_args(argv)
+
+    jd_text = None
+    if args.jd:
+        with open(args.jd, 'r', encoding='utf-8') as f:
+            jd_text = f.read()
+
+    ingest = BulkIngest(jd_text=jd_text, workers=args.workers, batch_size=args.batch_size, top_roles=args.top_roles,
+                        dedup=False if args.no_dedup else None)
+    if args.output:
+        checkpoint_path = args.checkpoint or args.output + ".checkpoint"
+        with open(args.output, 'a', encoding='utf-8') as output:
+            count = ingest.run(args.source, output, checkpoint_path)
+    else:
+        count = ingest.run(args.source, sys.stdout, args.checkpoint)
+    print(f"Processed {count} resumes.", file=sys.stderr)
+    clusters = sorted(ingest.duplicate_clusters.values(), key=len, reverse=True)
+    if clusters:
+        print(f"Found {len(clusters)} near-duplicate clusters "
+              f"({sum(len(c) - 1 for c in clusters)} copies reused the first copy's analysis).", file=sys.stderr)
+    if args.duplicates:
+        with open(args.duplicates, 'w', encoding='utf-8') as f:
+            json.dump(clusters, f, indent=2)
+
+if __name__ == "__main__":
+    main()
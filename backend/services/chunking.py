@@ -0,0 +1,150 @@
+import re
+import numpy as np
+
+# Sentence ends (. ! ?) followed by whitespace, or bullet characters left over from PDF extraction
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+|\s*[•●▪‣⁃]\s*')
+WORD = re.compile(r'\S+')
+
+class Chunk:
+    """A window of a document: its text and character offsets into the source text."""
+    __slots__ = ("text", "start", "end")
+
+    def __init__(self, text, start, end):
+        self.text = text
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f"Chunk({self.start}:{self.end}, {self.text[:30]!r})"
+
+def _sentences(text):
+    """(start, end) character spans of the sentences in text."""
+    spans = []
+    position = 0
+    for boundary in SENTENCE_BOUNDARY.finditer(text):
+        if boundary.start() > position:
+            spans.append((position, boundary.start()))
+        position = boundary.end()
+    if position < len(text):
+        spans.append((position, len(text)))
+    return spans
+
+def _word_units(text):
+    """Word spans of text grouped by sentence: list of lists of (start, end)."""
+    units = []
+    for start, end in _sentences(text):
+        words = [(m.start(), m.end()) for m in WORD.finditer(text, start, end)]
+        if words:
+            units.append(words)
+    return units
+
+def split_chunks(text, max_words=180, overlap_words=40, max_chunks=8):
+    """
+    Splits text into overlapping windows of at most max_words words.
+    1. Windows are filled with whole sentences; a sentence longer than a window is split on words.
+    2. Each window starts with the last ~overlap_words words of the previous one,
+       so no sentence loses its context at a window edge.
+    3. At most max_chunks windows are returned, spread evenly over the document
+       (first and last always kept), so the cost per document is bounded.
+    Returns: list of Chunk. Short texts give a single chunk equal to the whole (stripped) text.
+    """
+    if not text or not text.strip():
+        return []
+
+    # Flatten to a word list, remembering where sentences start
+    words = []
+    sentence_starts = set()
+    for sentence in _word_units(text):
+        sentence_starts.add(len(words))
+        words.extend(sentence)
+
+    if len(words) <= max_words:
+        return [Chunk(text[words[0][0]:words[-1][1]], words[0][0], words[-1][1])]
+
+    spans = []
+    start = 0
+    while start < len(words):
+        end = min(start + max_words, len(words))
+        if end < len(words):
+            # Prefer to end the window on a sentence boundary in its second half
+            boundaries = [b for b in sentence_starts if start + max_words // 2 < b <= end]
+            if boundaries:
+                end = max(boundaries)
+        spans.append((start, end))
+        if end >= len(words):
+            break
+
+        # Step back by the overlap, snapping to a sentence start where possible
+        next_start = max(end - overlap_words, start + 1)
+        snapped = [b for b in sentence_starts if next_start <= b < end]
+        start = min(snapped) if snapped else next_start
+
+    if max_chunks and len(spans) > max_chunks:
+        keep = np.unique(np.linspace(0, len(spans) - 1, max_chunks).round().astype(int))
+        spans = [spans[i] for i in keep]
+
+    return [
+        Chunk(text[words[s][0]:words[e - 1][1]], words[s][0], words[e - 1][1])
+        for s, e in spans
+    ]
+
+def _share_windows(counts, budget):
+    """
+    Splits a budget of windows over spans with the given word counts: one per non-empty
+    span (the longest spans first, if there are more spans than windows), the rest in
+    proportion to the word counts, by largest remainder. The caps sum to at most budget.
+    """
+    caps = [0] * len(counts)
+    filled = sorted((i for i, count in enumerate(counts) if count), key=lambda i: -counts[i])[:budget]
+    for i in filled:
+        caps[i] = 1
+    spare = budget - len(filled)
+    total = sum(counts[i] for i in filled)
+    if spare > 0 and total:
+        shares = {i: spare * counts[i] / total for i in filled}
+        for i in filled:
+            caps[i] += int(shares[i])
+        left = spare - sum(int(share) for share in shares.values())
+        for i in sorted(filled, key=lambda i: int(shares[i]) - shares[i])[:left]:
+            caps[i] += 1
+    return caps
+
+def split_sections(text, spans, max_words=180, overlap_words=40, max_chunks=8):
+    """
+    split_chunks applied within each (start, end) span, so no window straddles
+    two sections. max_chunks is the budget for the whole text: it is shared out in
+    proportion to the spans' word counts, with one window per non-empty span as long
+    as there are enough (spans left without a window get no chunks).
+    Returns: (list of Chunk with offsets into text, index of the span of each chunk).
+    """
+    counts = [len(WORD.findall(text, start, end)) for start, end in spans]
+    caps = _share_windows(counts, max_chunks) if max_chunks else [max_chunks] * len(spans)
+    chunks, owners = [], []
+    for index, ((start, end), count, cap) in enumerate(zip(spans, counts, caps)):
+        if not count or (max_chunks and not cap):
+            continue
+        for chunk in split_chunks(text[start:end], max_words, overlap_words, cap):
+            chunks.append(Chunk(chunk.text, chunk.start + start, chunk.end + start))
+            owners.append(index)
+    return chunks, owners
+
+def pool(embeddings, method="mean"):
+    """Pools chunk embeddings (rows) into one L2-normalized document vector (mean or max)."""
+    if len(embeddings) == 0:
+        return np.zeros(embeddings.shape[1], dtype=embeddings.dtype)
+    if method == "max":
+        vector = embeddings.max(axis=0)
+    else:
+        vector = embeddings.mean(axis=0)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+def chunk_similarity(doc_chunks, query_chunks):
+    """
+    Chunk-to-chunk score: every query chunk is matched to its most similar
+    document chunk, and the best similarities are averaged.
+    For a JD as query, this measures how well each part of the JD is covered.
+    """
+    if len(doc_chunks) == 0 or len(query_chunks) == 0:
+        return 0.0
+    return float(np.mean(np.max(doc_chunks @ query_chunks.T, axis=0)))
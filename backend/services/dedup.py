@@ -0,0 +1,456 @@
+"""
+Near-duplicate resume detection: word shingles -> MinHash signatures -> LSH banding.
+
+- MinHasher turns a cleaned text (see resume_parser.clean_text) into num_perm
+  uint32 minimums; the share of equal positions between two signatures
+  estimates the Jaccard similarity of their shingle sets.
+- LSHIndex keeps all signatures in one contiguous uint32 matrix and, per band,
+  a sorted array of band hashes, so a lookup is one binary search per band
+  (no per-document Python objects; ~4 * num_perm bytes per resume).
+- DuplicateDetector combines both for the pipeline (find / add / remove / clusters)
+  and shares the index file between processes.
+"""
+import atexit
+import bisect
+import difflib
+import json
+import os
+import re
+import threading
+import zlib
+import numpy as np
+from backend.config import Config
+from backend.services.file_lock import file_lock
+
+# Mersenne prime 2^61 - 1 for the universal hash family (a * x + b) mod p
+PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+_WORDS = re.compile(r"\w+")
+_TOKENS = re.compile(r"\S+")
+
+def shingle_hashes(text, size=3):
+    """Unique 32-bit hashes of the text's lower-cased word size-grams."""
+    words = _WORDS.findall((text or "").lower())
+    if len(words) < size:
+        shingles = [" ".join(words)] if words else []
+    else:
+        shingles = [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+    return np.unique(np.fromiter(
+        (zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles)
+    ))
+
+def optimal_bands(threshold, num_perm, false_negative_weight=50.0):
+    """
+    (bands, rows) minimizing the false-positive plus weighted false-negative area of
+    the LSH S-curve 1 - (1 - s^rows)^bands around threshold. A missed duplicate costs
+    a full analysis while a false candidate costs one signature comparison, so misses
+    are weighted heavily (at 0.9 / 128 permutations: 10 bands of 12 rows, 96% of
+    pairs at the threshold become candidates).
+    """
+    best, best_error = (1, num_perm), float("inf")
+    below = np.linspace(0.0, threshold, 200)
+    above = np.linspace(threshold, 1.0, 200)
+    for bands in range(1, num_perm + 1):
+        rows = num_perm // bands
+        # Areas approximated by the mean over an even grid (np.trapz is gone in numpy 2)
+        false_positive = (1 - (1 - below ** rows) ** bands).mean() * threshold
+        false_negative = ((1 - above ** rows) ** bands).mean() * (1 - threshold)
+        error = false_positive + false_negative_weight * false_negative
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+def text_diff(old_text, new_text):
+    """
+    Word-level diff of two versions of a text.
+    Returns {"added": [segments], "removed": [segments], "added_spans": [(start, end)],
+    "kept": [(old_start, old_end, new_start)]}: added_spans are the char offsets of the
+    added segments in new_text, kept has one entry per unchanged word, in order.
+    """
+    old_spans = [m.span() for m in _TOKENS.finditer(old_text)]
+    new_spans = [m.span() for m in _TOKENS.finditer(new_text)]
+    old_words = [old_text[start:end] for start, end in old_spans]
+    new_words = [new_text[start:end] for start, end in new_spans]
+    added, removed, added_spans, kept = [], [], [], []
+    for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(None, old_words, new_words, autojunk=False).get_opcodes():
+        if tag == "equal":
+            kept.extend(
+                (old_spans[i][0], old_spans[i][1], new_spans[j][0]) for i, j in zip(range(i1, i2), range(j1, j2))
+            )
+        if tag in ("replace", "delete"):
+            removed.append(" ".join(old_words[i1:i2]))
+        if tag in ("replace", "insert"):
+            added.append(" ".join(new_words[j1:j2]))
+            added_spans.append((new_spans[j1][0], new_spans[j2 - 1][1]))
+    return {"added": added, "removed": removed, "added_spans": added_spans, "kept": kept}
+
+def map_span(diff, old_text, new_text, start, end):
+    """
+    Offsets in new_text of old_text[start:end] through the kept words of a text_diff,
+    or None if an edit touched the span.
+    """
+    kept = diff["kept"]
+    first = bisect.bisect_right(kept, (start, float("inf"))) - 1
+    last = bisect.bisect_right(kept, (end - 1, float("inf"))) - 1
+    if first < 0 or last < first or start >= kept[first][1] or end > kept[last][1]:
+        return None
+    new_start = kept[first][2] + start - kept[first][0]
+    new_end = kept[last][2] + end - kept[last][0]
+    # Words removed or inserted inside the span show up as a different text
+    if new_text[new_start:new_end] != old_text[start:end]:
+        return None
+    return new_start, new_end
+
+class MinHasher:
+    def __init__(self, num_perm=128, shingle_size=3, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+        self.b = rng.randint(0, (1 << 61) - 1, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text):
+        hashes = shingle_hashes(text, self.shingle_size)
+        if hashes.size == 0:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        # uint64 products wrap around; the result is still a good hash of x
+        permuted = ((hashes[:, None] * self.a + self.b) % PRIME) & MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+def estimate_similarity(signature, signatures):
+    """Estimated Jaccard similarity of one signature to each row of signatures."""
+    return (signatures == signature).mean(axis=-1)
+
+class LSHIndex:
+    """
+    Banded LSH over MinHash signatures, backed by numpy arrays.
+    New rows go to a dict keyed by (band, hash) and are merged into the per-band
+    sorted arrays in bulk, so adds stay cheap and lookups stay a few binary
+    searches plus one dict lookup per band. Removed rows are masked out, and the
+    arrays are compacted once they make up more than half of the rows.
+    """
+    def __init__(self, num_perm=128, threshold=0.9, bands=None, merge_every=4096):
+        self.num_perm = num_perm
+        self.threshold = threshold
+        self.bands, self.rows_per_band = (bands, num_perm // bands) if bands else optimal_bands(threshold, num_perm)
+        self.merge_every = merge_every
+        self._multipliers = np.random.RandomState(7).randint(
+            1, 1 << 62, size=self.rows_per_band, dtype=np.uint64
+        ) | np.uint64(1)
+
+        self.count = 0
+        self.doc_ids = []
+        self.rows = {}
+        self.signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self.keys = np.zeros((0, self.bands), dtype=np.uint64)
+        self.alive = np.zeros(0, dtype=bool)
+        # Per band: band hashes of rows [0, indexed) sorted, and the row of each
+        self.indexed = 0
+        self.sorted_keys = np.zeros((self.bands, 0), dtype=np.uint64)
+        self.sorted_rows = np.zeros((self.bands, 0), dtype=np.int32)
+        # (band, hash) -> rows, for rows [indexed, count)
+        self._pending = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def band_keys(self, signatures):
+        """(n, bands) hashes of each band of each signature."""
+        signatures = np.atleast_2d(signatures)
+        used = signatures[:, :self.bands * self.rows_per_band].astype(np.uint64)
+        return (used.reshape(len(signatures), self.bands, self.rows_per_band) * self._multipliers).sum(axis=2)
+
+    def _grow(self, needed):
+        capacity = max(needed, 2 * len(self.alive), 1024)
+        for name in ("signatures", "keys"):
+            old = getattr(self, name)
+            new = np.zeros((capacity, old.shape[1]), dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self.count] = self.alive[:self.count]
+        self.alive = alive
+
+    def add_many(self, doc_ids, signatures):
+        signatures = np.asarray(signatures, dtype=np.uint32).reshape(-1, self.num_perm)
+        with self._lock:
+            for doc_id in doc_ids:
+                self.remove(doc_id)
+            end = self.count + len(doc_ids)
+            if end > len(self.alive):
+                self._grow(end)
+            keys = self.band_keys(signatures)
+            self.signatures[self.count:end] = signatures
+            self.keys[self.count:end] = keys
+            self.alive[self.count:end] = True
+            for offset, doc_id in enumerate(doc_ids):
+                row = self.count + offset
+                self.rows[doc_id] = row
+                self.doc_ids.append(doc_id)
+                for band, key in enumerate(keys[offset].tolist()):
+                    self._pending.setdefault((band, key), []).append(row)
+            self.count = end
+            if self.count - self.indexed >= self.merge_every:
+                self._merge()
+
+    def add(self, doc_id, signature):
+        self.add_many([doc_id], np.asarray(signature)[None, :])
+
+    def remove(self, doc_id):
+        with self._lock:
+            row = self.rows.pop(doc_id, None)
+            if row is None:
+                return False
+            self.alive[row] = False
+            self.doc_ids[row] = None
+            if self.count - len(self.rows) > max(self.merge_every, len(self.rows)):
+                self._compact()
+            return True
+
+    def _compact(self):
+        """Rebuilds the arrays from the live rows only."""
+        live = np.flatnonzero(self.alive[:self.count])
+        doc_ids = [self.doc_ids[row] for row in live]
+        signatures = self.signatures[live]
+        self.count = self.indexed = 0
+        self.doc_ids, self.rows, self._pending = [], {}, {}
+        self.alive[:] = False
+        self.sorted_keys = np.zeros((self.bands, 0), dtype=np.uint64)
+        self.sorted_rows = np.zeros((self.bands, 0), dtype=np.int32)
+        if doc_ids:
+            self.add_many(doc_ids, signatures)
+            self._merge()
+
+    def update(self, other, skip=()):
+        """Adds the live rows of another index that this one does not have (except skip)."""
+        with self._lock:
+            rows = [row for row in np.flatnonzero(other.alive[:other.count])
+                    if other.doc_ids[row] not in self.rows and other.doc_ids[row] not in skip]
+            if rows:
+                self.add_many([other.doc_ids[row] for row in rows], other.signatures[rows])
+            return len(rows)
+
+    def _merge(self):
+        """Merges the pending rows into each band's sorted array."""
+        pending = np.arange(self.indexed, self.count, dtype=np.int32)
+        keys, rows = [], []
+        for band in range(self.bands):
+            new_keys = self.keys[pending, band]
+            order = np.argsort(new_keys, kind="stable")
+            positions = np.searchsorted(self.sorted_keys[band], new_keys[order])
+            keys.append(np.insert(self.sorted_keys[band], positions, new_keys[order]))
+            rows.append(np.insert(self.sorted_rows[band], positions, pending[order]))
+        self.sorted_keys, self.sorted_rows = np.vstack(keys), np.vstack(rows)
+        self.indexed = self.count
+        self._pending = {}
+
+    def candidates(self, signature):
+        """Rows sharing at least one band with the signature (live rows only)."""
+        query_keys = self.band_keys(signature)[0]
+        with self._lock:
+            found = []
+            # searchsorted gets numpy uint64 scalars: a Python int this large would make
+            # numpy convert the whole band array first
+            for band, key in enumerate(query_keys):
+                keys = self.sorted_keys[band]
+                start = keys.searchsorted(key, side="left")
+                if start < len(keys) and keys[start] == key:
+                    end = keys.searchsorted(key, side="right")
+                    found.append(self.sorted_rows[band, start:end])
+                pending = self._pending.get((band, int(key)))
+                if pending:
+                    found.append(np.asarray(pending))
+            if not found:
+                return np.zeros(0, dtype=np.int64)
+            rows = np.unique(np.concatenate(found))
+            return rows[self.alive[rows]]
+
+    def query(self, signature, threshold=None, exclude=None, limit=None):
+        """
+        Near duplicates of signature: [(doc_id, estimated similarity)], most similar first.
+        Only LSH candidates are compared, and only those at or above threshold are returned.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        signature = np.asarray(signature, dtype=np.uint32)
+        with self._lock:
+            rows = self.candidates(signature)
+            if rows.size == 0:
+                return []
+            similarity = estimate_similarity(signature, self.signatures[rows])
+            order = np.argsort(-similarity, kind="stable")
+            results = []
+            for i in order:
+                if similarity[i] < threshold:
+                    break
+                doc_id = self.doc_ids[rows[i]]
+                if doc_id != exclude:
+                    results.append((doc_id, float(similarity[i])))
+                    if limit and len(results) >= limit:
+                        break
+            return results
+
+    # --- Persistence ---
+
+    def save(self, path):
+        """Writes the live signatures to one .npz file (band arrays are rebuilt on load)."""
+        with self._lock:
+            live = np.flatnonzero(self.alive[:self.count])
+            meta = {"num_perm": self.num_perm, "threshold": self.threshold,
+                    "doc_ids": [self.doc_ids[row] for row in live]}
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            tmp_path = path + ".tmp.npz"
+            np.savez(tmp_path, meta=json.dumps(meta), signatures=self.signatures[live])
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Loads an index written by save (the banding is recomputed for its threshold)."""
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            signatures = data["signatures"]
+        index = cls(meta["num_perm"], meta["threshold"])
+        if meta["doc_ids"]:
+            index.add_many(meta["doc_ids"], signatures)
+            index._merge()
+        return index
+
+class DuplicateDetector:
+    """
+    Pipeline-facing wrapper: one MinHasher and one LSHIndex of every analysed resume.
+    Resumes are identified by the SHA-256 of their file bytes.
+    The index is loaded from path on first use and written back every
+    Config.DEDUP_SAVE_EVERY changes and at exit. Processes sharing the file merge
+    on save, under a file lock: resumes added by others are kept, except those
+    this process removed.
+    """
+    def __init__(self, threshold=None, num_perm=None, shingle_size=None, path=None, save_every=None):
+        self.threshold = Config.DEDUP_THRESHOLD if threshold is None else threshold
+        self.hasher = MinHasher(num_perm or Config.DEDUP_NUM_PERM, shingle_size or Config.DEDUP_SHINGLE_SIZE)
+        self.path = Config.DEDUP_INDEX_PATH if path is None else path
+        self.save_every = Config.DEDUP_SAVE_EVERY if save_every is None else save_every
+        self._index = None
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        # Removed since the last save, so a merge with the file does not bring them back
+        self._removed = set()
+        self._changes = 0
+        # mtime of the file as last read or written; a different one means another process saved
+        self._synced_mtime = None
+        self.found = 0
+
+    @property
+    def index(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._load()
+        return self._index
+
+    def _load(self):
+        if self.path:
+            atexit.register(self.save)
+        if self.path and os.path.exists(self.path):
+            try:
+                index = self._read()
+                if index is not None:
+                    return index
+            except Exception as e:
+                print(f"Error loading duplicate index: {e}")
+        return LSHIndex(self.hasher.num_perm, self.threshold)
+
+    def _read(self):
+        """The index file, or None if it was built with other parameters."""
+        mtime = os.stat(self.path).st_mtime_ns
+        index = LSHIndex.load(self.path)
+        self._synced_mtime = mtime
+        if index.num_perm != self.hasher.num_perm:
+            print(f"Duplicate index {self.path} uses {index.num_perm} permutations, starting over")
+            return None
+        if index.threshold != self.threshold:
+            # Same signatures, banded for this threshold
+            rebanded = LSHIndex(self.hasher.num_perm, self.threshold)
+            rebanded.update(index)
+            return rebanded
+        return index
+
+    def save(self):
+        if not self.path or self._index is None:
+            return
+        try:
+            with self._save_lock, file_lock(self.path):
+                if os.path.exists(self.path) and os.stat(self.path).st_mtime_ns != self._synced_mtime:
+                    on_disk = self._read()
+                    if on_disk is not None:
+                        self._index.update(on_disk, skip=self._removed)
+                self._removed.clear()
+                self._index.save(self.path)
+                self._synced_mtime = os.stat(self.path).st_mtime_ns
+        except Exception as e:
+            print(f"Error saving duplicate index: {e}")
+
+    def _changed(self):
+        with self._lock:
+            self._changes += 1
+            due = self.save_every and self._changes >= self.save_every
+            if due:
+                self._changes = 0
+        if due:
+            self.save()
+
+    def signature(self, text):
+        return self.hasher.signature(text)
+
+    def find(self, signature, exclude=None):
+        """Most similar indexed resume at or above the threshold: (doc_id, similarity), or None."""
+        matches = self.index.query(signature, self.threshold, exclude=exclude, limit=1)
+        if matches:
+            self.found += 1
+        return matches[0] if matches else None
+
+    def add(self, doc_id, signature):
+        self.index.add(doc_id, signature)
+        self._removed.discard(doc_id)
+        self._changed()
+
+    def remove(self, doc_id):
+        """Forgets a resume (e.g. once its cache entry is evicted)."""
+        if self.index.remove(doc_id):
+            self._removed.add(doc_id)
+            self._changed()
+
+    def clusters(self, doc_ids, texts=None, signatures=None, threshold=None):
+        """
+        Groups a batch into near-duplicate clusters (connected components of
+        pairs at or above threshold). Returns only clusters of two or more,
+        largest first, each as a list of doc ids in input order.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        if signatures is None:
+            signatures = [self.signature(text) for text in texts]
+        batch = LSHIndex(self.hasher.num_perm, threshold)
+        batch.add_many(list(range(len(doc_ids))), np.asarray(signatures))
+
+        parent = list(range(len(doc_ids)))
+
+        def root(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, signature in enumerate(signatures):
+            for j, _ in batch.query(signature, threshold, exclude=i):
+                parent[root(i)] = root(j)
+
+        groups = {}
+        for i in range(len(doc_ids)):
+            groups.setdefault(root(i), []).append(doc_ids[i])
+        return sorted((g for g in groups.values() if len(g) > 1), key=len, reverse=True)
+
+    def stats(self):
+        return {"indexed": len(self.index) if self._index is not None else 0, "found": self.found}
+
+# Shared by the resume cache and bulk ingest
+duplicate_detector = DuplicateDetector()
@@ -0,0 +1,284 @@
+import os
+import re
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+from backend.services.file_lock import file_lock
+
+def normalize_text(text):
+    """Whitespace-normalizes text so trivially different copies share a cache entry."""
+    return re.sub(r'\s+', ' ', text or "").strip()
+
+class _MemmapStore:
+    """
+    Append-only on-disk store of embedding rows, shared by every process using the
+    cache directory (gunicorn workers, bulk ingest parsers).
+    Files (per model):
+    - <prefix>.meta                : JSON with dim / dtype / model / generation
+    - <prefix>.<generation>.vectors : raw NumPy memmap of shape (capacity, dim)
+    - <prefix>.<generation>.index   : one hex key per line, line i is row i
+    Writers append under a file lock (<prefix>.lock). Each process picks up the
+    rows other processes appended (new index lines) on its next miss.
+    Once the vectors would exceed max_bytes, the store starts a new, empty
+    generation; a process still mapping the old files keeps reading consistent
+    rows until it notices the new generation.
+    """
+    def __init__(self, prefix, model_name, dtype, max_bytes=0):
+        self.prefix = prefix
+        self.model_name = model_name
+        self.dtype = np.dtype(dtype)
+        self.max_bytes = max_bytes
+        self.rows = {}
+        self.dim = None
+        self.generation = None
+        self.capacity = 0
+        self._vectors = None
+        self._index_file = None
+        self._index_size = 0
+        # (inode, mtime) of the meta file as last read; a different one means a new generation
+        self._meta_stamp = None
+        self._sync()
+
+    def _path(self, suffix):
+        return f"{self.prefix}.{self.generation}.{suffix}"
+
+    def _row_bytes(self):
+        return self.dim * self.dtype.itemsize
+
+    def _close(self):
+        if self._index_file is not None:
+            self._index_file.close()
+        self.rows = {}
+        self.dim = None
+        self.generation = None
+        self.capacity = 0
+        self._vectors = None
+        self._index_file = None
+        self._index_size = 0
+
+    def _sync(self):
+        """Catches up with the rows, or the new generation, written by other processes."""
+        try:
+            stat = os.stat(self.prefix + ".meta")
+            stamp = (stat.st_ino, stat.st_mtime_ns)
+            if stamp != self._meta_stamp:
+                with open(self.prefix + ".meta", 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                self._meta_stamp = stamp
+                self._close()
+                if meta.get("dtype") != self.dtype.name or meta.get("model") != self.model_name:
+                    # Written with different settings: unusable until a put starts a new generation
+                    return
+                self.dim, self.generation = meta["dim"], meta["generation"]
+            if self.generation is None:
+                return
+
+            index_path = self._path("index")
+            if os.path.getsize(index_path) > self._index_size:
+                with open(index_path, 'rb') as f:
+                    f.seek(self._index_size)
+                    data = f.read()
+                # Only whole lines: a writer may be halfway through one
+                data = data[:data.rfind(b"\n") + 1]
+                for key in data.decode('ascii').splitlines():
+                    self.rows[key] = len(self.rows)
+                self._index_size += len(data)
+            if len(self.rows) > self.capacity:
+                self.capacity = os.path.getsize(self._path("vectors")) // self._row_bytes()
+                self._open_vectors()
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            print(f"Error loading embedding cache {self.prefix}: {e}")
+            self._close()
+
+    def _start_generation(self, dim):
+        """Replaces the store with a new, empty generation (called with the file lock held)."""
+        try:
+            with open(self.prefix + ".meta", 'r', encoding='utf-8') as f:
+                current = json.load(f).get("generation", 0)
+        except (OSError, ValueError):
+            current = 0
+        # The current generation's files, and those of the single-process layout
+        old_files = [f"{self.prefix}.{current}.index", f"{self.prefix}.{current}.vectors",
+                     self.prefix + ".index", self.prefix + ".vectors"]
+        generation = current + 1
+        self._close()
+        self.dim, self.generation = dim, generation
+        open(self._path("index"), 'wb').close()
+        tmp_path = self.prefix + ".meta.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"dim": dim, "dtype": self.dtype.name, "model": self.model_name,
+                       "generation": generation}, f)
+        os.replace(tmp_path, self.prefix + ".meta")
+        stat = os.stat(self.prefix + ".meta")
+        self._meta_stamp = (stat.st_ino, stat.st_mtime_ns)
+        # Processes still mapping the old files keep reading them until they sync
+        for path in old_files:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _open_vectors(self):
+        if self.capacity:
+            self._vectors = np.memmap(
+                self._path("vectors"), dtype=self.dtype, mode='r+',
+                shape=(self.capacity, self.dim)
+            )
+
+    def _grow(self, needed):
+        """Grows the vectors file (at least doubling it) and remaps it."""
+        new_capacity = max(1024, self.capacity * 2, needed)
+        if self.max_bytes:
+            new_capacity = max(needed, min(new_capacity, self.max_bytes // self._row_bytes()))
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors = None
+        with open(self._path("vectors"), 'ab') as f:
+            if f.tell() < new_capacity * self._row_bytes():
+                f.truncate(new_capacity * self._row_bytes())
+        self.capacity = os.path.getsize(self._path("vectors")) // self._row_bytes()
+        self._open_vectors()
+
+    def get(self, key):
+        row = self.rows.get(key)
+        if row is None:
+            self._sync()
+            row = self.rows.get(key)
+            if row is None:
+                return None
+        return np.asarray(self._vectors[row], dtype=np.float32)
+
+    def put(self, key, vector):
+        if key in self.rows:
+            return
+        with file_lock(self.prefix):
+            self._sync()
+            if key in self.rows:
+                return
+            dim = int(vector.shape[0])
+            if self.generation is None:
+                self._start_generation(dim)
+            elif dim != self.dim:
+                return
+
+            row = len(self.rows)
+            if self.max_bytes and (row + 1) * self._row_bytes() > self.max_bytes:
+                # Full: start over rather than grow past the size limit
+                self._start_generation(dim)
+                row = 0
+            if row >= self.capacity:
+                self._grow(row + 1)
+            # Vector first, then the index line, so no process ever indexes a missing row
+            self._vectors[row] = vector.astype(self.dtype)
+            if self._index_file is None:
+                self._index_file = open(self._path("index"), 'ab')
+            line = (key + "\n").encode('ascii')
+            self._index_file.write(line)
+            self._index_file.flush()
+            self._index_size += len(line)
+            self.rows[key] = row
+
+    def flush(self):
+        if self._vectors is not None:
+            self._vectors.flush()
+        if self._index_file is not None:
+            self._index_file.flush()
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of text embeddings.
+    Keys are SHA-256 of (model name, normalized text).
+    Tier 1: in-process LRU bounded by bytes.
+    Tier 2 (optional): memory-mapped on-disk store that survives restarts, shared by
+    the processes using cache_dir and bounded by max_disk_bytes (0: unbounded).
+    """
+    def __init__(self, model_name, cache_dir=None, dtype="float32", max_memory_bytes=64 * 1024 * 1024,
+                 max_disk_bytes=0):
+        self.model_name = model_name
+        self.max_memory_bytes = max_memory_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+
+        # Hit/miss counters (memory hits, disk hits, full misses)
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._store = None
+        if cache_dir:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', model_name)
+                self._store = _MemmapStore(os.path.join(cache_dir, safe_name), model_name, dtype, max_disk_bytes)
+            except Exception as e:
+                print(f"Error opening embedding cache in {cache_dir}: {e}")
+
+    def key(self, text):
+        payload = self.model_name + "\0" + normalize_text(text)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _remember(self, key, vector):
+        """Adds a vector to the memory tier, evicting least recently used entries."""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = vector
+        self._memory_bytes += vector.nbytes
+        while self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+
+    def get(self, text):
+        """Returns the cached vector for text, or None."""
+        key = self.key(text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vector
+
+            if self._store is not None:
+                vector = self._store.get(key)
+                if vector is not None:
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                    return vector
+
+            self.misses += 1
+            return None
+
+    def get_many(self, texts):
+        return [self.get(text) for text in texts]
+
+    def put(self, text, vector):
+        key = self.key(text)
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            self._remember(key, vector)
+            if self._store is not None:
+                try:
+                    self._store.put(key, vector)
+                except Exception as e:
+                    print(f"Error writing embedding cache: {e}")
+
+    def flush(self):
+        with self._lock:
+            if self._store is not None:
+                self._store.flush()
+
+    def stats(self):
+        """Counters for monitoring. hit_ratio counts both memory and disk hits."""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_bytes,
+            "disk_entries": len(self._store.rows) if self._store is not None else 0,
+        }
@@ -0,0 +1,133 @@
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+import numpy as np
+
+class EncodeScheduler:
+    """
+    Dynamic micro-batching for embedding model calls.
+    Concurrent callers submit their texts; a single worker thread collects pending
+    requests until max_batch_size texts are waiting or the oldest request has waited
+    max_wait_ms, then runs one batched encode and hands every caller its own rows.
+    Texts are deduplicated and sorted by length before encoding, so each model
+    mini-batch holds similar lengths and little padding is wasted.
+    Any error while serving a batch fails that batch's callers; the worker keeps running.
+    Usage: scheduler = EncodeScheduler(encode_fn); vectors = scheduler.encode(texts)
+    """
+    def __init__(self, encode_fn, max_batch_size=64, max_wait_ms=5.0, window=1024, timeout=60.0):
+        # encode_fn(list of texts) -> array with one row per text
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.timeout = timeout
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+
+        # Metrics: totals plus a sliding window of recent samples for percentiles
+        self._metrics_lock = threading.Lock()
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        self._batch_sizes = deque(maxlen=window)
+        self._queue_waits = deque(maxlen=window)
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._worker_lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._run, name="encode-scheduler", daemon=True)
+                    self._worker.start()
+
+    def submit(self, texts):
+        """Queues texts for the next batch. Returns a Future resolving to their embeddings."""
+        future = Future()
+        if not texts:
+            future.set_result(np.zeros((0, 0), dtype=np.float32))
+            return future
+        self._ensure_worker()
+        self._queue.put((list(texts), future, time.perf_counter()))
+        return future
+
+    def encode(self, texts, timeout=None):
+        """
+        Blocking helper: submit and wait for the result. Raises TimeoutError after
+        timeout seconds (default: the scheduler's); the request is then dropped if
+        its batch has not started yet.
+        """
+        future = self.submit(texts)
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def _collect(self):
+        """Blocks for the first request, then gathers more until the batch is full or max_wait passed."""
+        pending = [self._queue.get()]
+        size = len(pending[0][0])
+        deadline = pending[0][2] + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _run(self):
+        while True:
+            pending = []
+            try:
+                pending = self._collect()
+                self._serve(pending)
+            except Exception as e:
+                # Whatever went wrong, fail this batch's callers rather than the only worker
+                for _, future, _ in pending:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _serve(self, pending):
+        started = time.perf_counter()
+        # Callers that timed out and cancelled before the batch started are skipped
+        pending = [item for item in pending if item[1].set_running_or_notify_cancel()]
+        if not pending:
+            return
+
+        # One encode for every unique text of the batch, shortest first
+        unique_texts = sorted({text for texts, _, _ in pending for text in texts}, key=len)
+        encoded = np.asarray(self.encode_fn(unique_texts), dtype=np.float32)
+        rows = {text: i for i, text in enumerate(unique_texts)}
+        results = [encoded[[rows[text] for text in texts]] for texts, _, _ in pending]
+        for (_, future, _), result in zip(pending, results):
+            future.set_result(result)
+
+        with self._metrics_lock:
+            self.batches += 1
+            self.requests += len(pending)
+            self.texts += len(unique_texts)
+            self._batch_sizes.append(len(unique_texts))
+            self._queue_waits.extend(started - submitted for _, _, submitted in pending)
+
+    def stats(self):
+        """Batch-size and queue-wait metrics (waits in milliseconds, over the recent window)."""
+        with self._metrics_lock:
+            sizes = np.array(self._batch_sizes, dtype=np.float64)
+            waits = np.array(self._queue_waits, dtype=np.float64) * 1000
+            return {
+                "batches": self.batches,
+                "requests": self.requests,
+                "texts": self.texts,
+                "pending": self._queue.qsize(),
+                "mean_batch_size": round(float(sizes.mean()), 2) if sizes.size else 0.0,
+                "max_batch_size": int(sizes.max()) if sizes.size else 0,
+                "queue_wait_p50_ms": round(float(np.percentile(waits, 50)), 3) if waits.size else 0.0,
+                "queue_wait_p99_ms": round(float(np.percentile(waits, 99)), 3) if waits.size else 0.0,
+            }
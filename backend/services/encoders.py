@@ -0,0 +1,243 @@
+"""
+Interchangeable CPU backends for the semantic model.
+
+Every encoder returns L2-normalized float32 embeddings, one row per text:
+- torch: the full-precision SentenceTransformer model (reference)
+- int8:  the same model with its Linear layers dynamically quantized to int8
+- onnx:  an ONNX Runtime export of the model (needs onnxruntime and a local export,
+         see export_onnx)
+- stub:  deterministic hashed bag-of-words vectors, no model download (tests, CI)
+The backend and thread count come from Config.ENCODER_BACKEND / Config.ENCODER_THREADS.
+"""
+import os
+import hashlib
+import numpy as np
+from backend.config import Config
+
+BACKENDS = ("torch", "int8", "onnx", "stub")
+
+def _normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+class Encoder:
+    """
+    Base class. Subclasses implement _load() and _encode(texts, batch_size).
+    cache_id identifies the vectors the backend produces, so cached embeddings
+    of one backend are never served for another.
+    """
+    name = None
+
+    def __init__(self, model_name, threads=0):
+        self.model_name = model_name
+        self.threads = threads
+        self.loaded = False
+
+    @property
+    def cache_id(self):
+        return f"{self.model_name}:{self.name}"
+
+    def load(self):
+        if not self.loaded:
+            self._load()
+            self.loaded = True
+        return self
+
+    def encode(self, texts, batch_size=32):
+        self.load()
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return _normalize(self._encode(list(texts), batch_size))
+
+class TorchEncoder(Encoder):
+    name = "torch"
+
+    @property
+    def cache_id(self):
+        # Same id as before backends existed, so existing caches stay valid
+        return self.model_name
+
+    def _load(self):
+        import torch
+        from sentence_transformers import SentenceTransformer
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        print(f"Loading Sentence Transformer model ({self.model_name}, {self.name})...")
+        self.model = self._prepare(SentenceTransformer(self.model_name, device="cpu"))
+        print("Sentence Transformer model loaded.")
+
+    def _prepare(self, model):
+        return model
+
+    def _encode(self, texts, batch_size):
+        return self.model.encode(texts, batch_size=batch_size, normalize_embeddings=True)
+
+class QuantizedTorchEncoder(TorchEncoder):
+    """fp32 model with every Linear layer dynamically quantized to int8 (weights int8, activations quantized per batch)."""
+    name = "int8"
+
+    @property
+    def cache_id(self):
+        return f"{self.model_name}:{self.name}"
+
+    def _prepare(self, model):
+        import torch
+        quantization = getattr(torch, "ao", torch).quantization
+        return quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+class OnnxEncoder(Encoder):
+    """
+    ONNX Runtime session over a local export (model.onnx + tokenizer.json in model_dir).
+    Token embeddings are mean-pooled over the attention mask, like the
+    SentenceTransformer pooling layer of all-MiniLM-L6-v2.
+    """
+    name = "onnx"
+
+    def __init__(self, model_name, threads=0, model_dir=None, max_length=256):
+        super().__init__(model_name, threads)
+        self.model_dir = model_dir or Config.ONNX_MODEL_DIR
+        self.max_length = max_length
+
+    @classmethod
+    def available(cls, model_dir=None):
+        """True if onnxruntime is installed and an export exists (checked without loading)."""
+        model_dir = model_dir or Config.ONNX_MODEL_DIR
+        try:
+            import onnxruntime  # noqa: F401
+        except ImportError:
+            return False
+        return all(
+            os.path.exists(os.path.join(model_dir, name)) for name in ("model.onnx", "tokenizer.json")
+        )
+
+    def _load(self):
+        import onnxruntime
+        from tokenizers import Tokenizer
+        options = onnxruntime.SessionOptions()
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+        self.session = onnxruntime.InferenceSession(
+            os.path.join(self.model_dir, "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(self.max_length)
+        self.tokenizer.enable_padding()
+
+    def _encode(self, texts, batch_size):
+        # Length-sorted batches keep padding small
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        output = np.zeros((len(texts), 0), dtype=np.float32)
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            encodings = self.tokenizer.encode_batch([texts[i] for i in batch])
+            inputs = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            inputs = {name: value for name, value in inputs.items() if name in self.input_names}
+            token_embeddings = self.session.run(None, inputs)[0]
+
+            mask = inputs["attention_mask"][..., None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            if output.shape[1] == 0:
+                output = np.zeros((len(texts), pooled.shape[1]), dtype=np.float32)
+            output[batch] = pooled
+        return output
+
+class StubEncoder(Encoder):
+    """
+    Deterministic, model-free encoder: words and word bigrams are hashed into a
+    fixed number of signed buckets. Shared vocabulary gives a positive similarity,
+    so rankings behave sensibly in tests without downloading a model.
+    """
+    name = "stub"
+
+    def __init__(self, model_name=None, threads=0, dimension=384):
+        super().__init__(model_name or "stub", threads)
+        self.dimension = dimension
+
+    @property
+    def cache_id(self):
+        return f"stub-{self.dimension}"
+
+    def _load(self):
+        pass
+
+    def _bucket(self, feature):
+        digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        return value % self.dimension, 1.0 if (value >> 63) else -1.0
+
+    def _encode(self, texts, batch_size):
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = "".join(c if c.isalnum() else " " for c in text.lower()).split()
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                index, sign = self._bucket(feature)
+                vectors[row, index] += sign
+        return vectors
+
+def resolve_backend(backend=None):
+    """
+    Backend that will actually be used: Config.ENCODER_BACKEND by default.
+    onnx falls back to torch when onnxruntime or the local export is missing.
+    """
+    backend = (backend or Config.ENCODER_BACKEND).lower()
+    if backend not in BACKENDS:
+        print(f"Unknown encoder backend '{backend}', using torch")
+        return "torch"
+    if backend == "onnx" and not OnnxEncoder.available():
+        print(f"ONNX export not found in {Config.ONNX_MODEL_DIR} (or onnxruntime missing), using torch")
+        return "torch"
+    return backend
+
+def create_encoder(model_name, backend=None, threads=None):
+    """Builds (without loading) the encoder for the configured backend."""
+    backend = resolve_backend(backend)
+    threads = Config.ENCODER_THREADS if threads is None else threads
+    if backend == "int8":
+        return QuantizedTorchEncoder(model_name, threads)
+    if backend == "onnx":
+        return OnnxEncoder(model_name, threads)
+    if backend == "stub":
+        return StubEncoder(model_name, threads)
+    return TorchEncoder(model_name, threads)
+
+def export_onnx(model_name, output_dir=None, opset=14):
+    """
+    Exports the (locally cached) SentenceTransformer's transformer to ONNX,
+    plus its tokenizer.json, into output_dir (default Config.ONNX_MODEL_DIR).
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    output_dir = output_dir or Config.ONNX_MODEL_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+    model.tokenizer.save_pretrained(output_dir)
+
+    sample = model.tokenizer(["an example sentence"], return_tensors="pt")
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    names = [n for n in names if n in sample]
+    dynamic_axes = {n: {0: "batch", 1: "tokens"} for n in names}
+    dynamic_axes["last_hidden_state"] = {0: "batch", 1: "tokens"}
+
+    class _TokenEmbeddings(torch.nn.Module):
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, *args):
+            return self.inner(**dict(zip(names, args))).last_hidden_state
+
+    torch.onnx.export(
+        _TokenEmbeddings(transformer), tuple(sample[n] for n in names),
+        os.path.join(output_dir, "model.onnx"),
+        input_names=names, output_names=["last_hidden_state"],
+        dynamic_axes=dynamic_axes, opset_version=opset,
+    )
+    return output_dir
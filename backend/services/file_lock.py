@@ -0,0 +1,17 @@
+import os
+import fcntl
+from contextlib import contextmanager
+
+@contextmanager
+def file_lock(path):
+    """
+    Exclusive lock between processes sharing a file (held on path + ".lock").
+    Only excludes other processes; threads of one process still need their own lock.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".lock", 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
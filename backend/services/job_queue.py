@@ -0,0 +1,119 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class QueueFull(Exception):
+    """Raised by JobQueue.submit when every worker is busy and the backlog is full."""
+
+class Job:
+    """One unit of background work. status: queued -> running -> done / failed."""
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        # The exception a failed job raised, for callers that map it to a response
+        self.exception = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        """Blocks until the job finished or timeout seconds passed. Returns True if finished."""
+        return self._done.wait(timeout)
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+        }
+
+class JobQueue:
+    """
+    Bounded worker pool for CPU-heavy requests.
+    1. At most `workers` jobs run at once and at most `max_pending` more wait for a worker;
+       anything beyond that is rejected with QueueFull (HTTP 429) instead of piling up.
+    2. Submissions with the same key while a job is queued or running are coalesced:
+       they get the existing job instead of a second computation.
+    3. Finished jobs stay retrievable by id for `ttl` seconds.
+    """
+    def __init__(self, workers, max_pending, ttl=600):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+
+        self.coalesced = 0
+        self.rejected = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analyze")
+        self._jobs = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args, **kwargs):
+        """
+        Runs fn(*args, **kwargs) in the pool, or joins the in-flight job with the same key.
+        Returns: (job, coalesced). Raises QueueFull when the backlog is full.
+        """
+        with self._lock:
+            self._expire()
+            job = self._inflight.get(key)
+            if job is not None:
+                self.coalesced += 1
+                return job, True
+            if len(self._inflight) >= self.workers + self.max_pending:
+                self.rejected += 1
+                raise QueueFull(f"{len(self._inflight)} jobs in flight")
+
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._inflight[key] = job
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job, False
+
+    def _run(self, job, fn, args, kwargs):
+        job.status = "running"
+        try:
+            job.result = fn(*args, **kwargs)
+            job.status = "done"
+        except Exception as e:
+            print(f"Error in background job {job.id}: {e}")
+            job.error = str(e)
+            job.exception = e
+            job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._inflight.pop(job.key, None)
+            job._done.set()
+
+    def _expire(self):
+        """Forgets finished jobs older than the TTL (called with the lock held)."""
+        cutoff = time.time() - self.ttl
+        stale = [job_id for job_id, job in self._jobs.items()
+                 if job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in stale:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            running = sum(1 for job in self._inflight.values() if job.status == "running")
+            return {
+                "workers": self.workers,
+                "running": running,
+                "queued": len(self._inflight) - running,
+                "max_pending": self.max_pending,
+                "coalesced": self.coalesced,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,431 @@
+import os
+import re
+import json
+import math
+import itertools
+import threading
+from array import array
+from bisect import bisect_right
+from collections import Counter
+import numpy as np
+from scipy.sparse import csr_matrix
+
+def _cosine(weights_a, weights_b):
+    """Cosine similarity of two sparse {key: weight} vectors."""
+    if not weights_a or not weights_b:
+        return 0.0
+    if len(weights_a) > len(weights_b):
+        weights_a, weights_b = weights_b, weights_a
+
+    dot = sum(w * weights_b.get(key, 0.0) for key, w in weights_a.items())
+    norm_a = math.sqrt(sum(w * w for w in weights_a.values()))
+    norm_b = math.sqrt(sum(w * w for w in weights_b.values()))
+    return float(dot / (norm_a * norm_b))
+
+class KeywordIndex:
+    """
+    Corpus-level keyword index over stored resumes and job descriptions.
+    Replaces fitting a TfidfVectorizer per resume/JD pair:
+    - one shared vocabulary with document frequencies (IDF / BM25 statistics)
+    - per-document term counts (forward store, NumPy arrays)
+    - compact inverted posting lists (array-backed doc numbers and term counts)
+    Documents can be added or removed incrementally without any refit,
+    and the whole index can be saved to / loaded from disk (doc ids must be JSON-serializable).
+    """
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+
+        self.vocabulary = {}          # term -> term id
+        self.terms = []               # term id -> term
+        self.doc_freq = array('I')    # term id -> number of live docs containing it
+
+        self._doc_numbers = {}        # external doc id -> internal doc number
+        self._doc_ids = []            # internal doc number -> external doc id (None once removed)
+        self._doc_terms = []          # internal doc number -> (term ids, counts) or None
+        self._doc_lengths = array('I')
+        self._postings = {}           # term id -> (array of doc numbers, array of counts)
+        self._removed = 0
+        self.total_length = 0
+        # Bumped on every change; cached IDF and document norms are only valid for one generation
+        self.generation = 0
+        self._norms = None
+        self._idf = None
+
+        self._analyzer = None
+        self._span_rules = None
+        self._lock = threading.RLock()
+
+    # --- Text analysis ---
+
+    def analyze(self, text):
+        """Tokenizes like the old per-pair TF-IDF: lowercase, English stop words, 1-2 grams."""
+        if self._analyzer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            self._analyzer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2)).build_analyzer()
+        return self._analyzer(text or "")
+
+    def analyze_spans(self, text):
+        """
+        The terms of analyze(text) with their character offsets, as (term, start);
+        a bigram starts at its first word. Same tokens, stop words and n-grams.
+        """
+        if self._span_rules is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2))
+            self._span_rules = (re.compile(vectorizer.token_pattern), vectorizer.get_stop_words())
+        pattern, stop_words = self._span_rules
+        words = [(m.group(), m.start()) for m in pattern.finditer((text or "").lower())
+                 if m.group() not in stop_words]
+        return words + [(f"{a} {b}", start) for (a, start), (b, _) in zip(words, words[1:])]
+
+    @property
+    def document_count(self):
+        return len(self._doc_numbers)
+
+    def idf(self, term_id):
+        """Smoothed IDF (same formula as scikit-learn). Unknown terms pass term_id=None."""
+        df = self.doc_freq[term_id] if term_id is not None else 0
+        return math.log((1 + self.document_count) / (1 + df)) + 1.0
+
+    # --- Incremental updates ---
+
+    def add(self, doc_id, text):
+        """Adds (or replaces) a document. Cost is proportional to its length only."""
+        counts = Counter(self.analyze(text))
+        with self._lock:
+            if doc_id in self._doc_numbers:
+                self.remove(doc_id)
+
+            term_ids = np.empty(len(counts), dtype=np.int32)
+            term_counts = np.empty(len(counts), dtype=np.int32)
+            for i, (term, count) in enumerate(counts.items()):
+                term_id = self.vocabulary.get(term)
+                if term_id is None:
+                    term_id = len(self.terms)
+                    self.vocabulary[term] = term_id
+                    self.terms.append(term)
+                    self.doc_freq.append(0)
+                self.doc_freq[term_id] += 1
+                term_ids[i] = term_id
+                term_counts[i] = count
+            self._append(doc_id, term_ids, term_counts)
+
+    def oldest(self, count):
+        """Ids of the count longest-stored live documents (re-added documents count as new)."""
+        with self._lock:
+            return list(itertools.islice((d for d in self._doc_ids if d is not None), count))
+
+    def _append(self, doc_id, term_ids, term_counts):
+        """Stores a document's term counts and appends it to the posting lists."""
+        number = len(self._doc_ids)
+        for term_id, count in zip(term_ids.tolist(), term_counts.tolist()):
+            posting = self._postings.get(term_id)
+            if posting is None:
+                posting = self._postings[term_id] = (array('I'), array('I'))
+            posting[0].append(number)
+            posting[1].append(count)
+
+        length = int(term_counts.sum())
+        self._doc_numbers[doc_id] = number
+        self._doc_ids.append(doc_id)
+        self._doc_terms.append((term_ids, term_counts))
+        self._doc_lengths.append(length)
+        self.total_length += length
+        self.generation += 1
+
+    def remove(self, doc_id):
+        """Removes a document. Postings are cleaned lazily and compacted in bulk."""
+        with self._lock:
+            number = self._doc_numbers.pop(doc_id, None)
+            if number is None:
+                return False
+            term_ids, _ = self._doc_terms[number]
+            for term_id in term_ids:
+                self.doc_freq[term_id] -= 1
+            self.total_length -= self._doc_lengths[number]
+            self._doc_ids[number] = None
+            self._doc_terms[number] = None
+            self._removed += 1
+            self.generation += 1
+
+            # Compact once a quarter of the stored documents are dead
+            if self._removed * 4 > len(self._doc_ids):
+                self._compact()
+            return True
+
+    def _compact(self):
+        """
+        Renumbers live documents and rebuilds the posting lists from the forward store.
+        Terms no live document contains any more are dropped and the term ids renumbered,
+        so the vocabulary tracks the live corpus instead of everything ever added.
+        """
+        live = [
+            (doc_id, self._doc_terms[number])
+            for number, doc_id in enumerate(self._doc_ids) if doc_id is not None
+        ]
+        df = np.frombuffer(self.doc_freq, dtype=np.uint32) if self.doc_freq else np.zeros(0, np.uint32)
+        kept = np.flatnonzero(df)
+        if len(kept) < len(df):
+            remap = np.full(len(df), -1, dtype=np.int32)
+            remap[kept] = np.arange(len(kept), dtype=np.int32)
+            self.terms = [self.terms[term_id] for term_id in kept.tolist()]
+            self.vocabulary = {term: term_id for term_id, term in enumerate(self.terms)}
+            self.doc_freq = array('I', df[kept].tobytes())
+            live = [(doc_id, (remap[term_ids], term_counts)) for doc_id, (term_ids, term_counts) in live]
+        self._doc_numbers = {}
+        self._doc_ids = []
+        self._doc_terms = []
+        self._doc_lengths = array('I')
+        self._postings = {}
+        self._removed = 0
+        self.total_length = 0
+        for doc_id, (term_ids, term_counts) in live:
+            self._append(doc_id, term_ids, term_counts)
+        # Term ids changed even if no document is left to bump it
+        self.generation += 1
+
+    # --- Scoring ---
+
+    def _weights(self, text):
+        """TF-IDF weights of a text as {term id or term: weight}, using corpus IDF."""
+        return self._weights_of(Counter(self.analyze(text)))
+
+    def _weights_of(self, counts):
+        weights = {}
+        for term, count in counts.items():
+            term_id = self.vocabulary.get(term)
+            # Terms the corpus has never seen are keyed by their string
+            weights[term if term_id is None else term_id] = count * self.idf(term_id)
+        return weights
+
+    def score_pair(self, text_a, text_b):
+        """Cosine similarity of the TF-IDF vectors of two texts (0..1)."""
+        with self._lock:
+            weights_a = self._weights(text_a)
+            weights_b = self._weights(text_b)
+        return _cosine(weights_a, weights_b)
+
+    def score_sections(self, query_text, text, starts):
+        """
+        Cosine scores of text and of each of its sections against the query,
+        from one tokenization of text: every term is bucketed by its offset
+        (starts: sorted section start offsets), and the whole-text counts are the
+        sum of the buckets. Returns (whole-text score, list of section scores);
+        the whole-text score equals score_pair(text, query_text).
+        """
+        buckets = [Counter() for _ in starts]
+        for term, start in self.analyze_spans(text):
+            buckets[max(0, bisect_right(starts, start) - 1)][term] += 1
+        whole = Counter()
+        for counts in buckets:
+            whole.update(counts)
+        with self._lock:
+            query = self._weights(query_text)
+            vectors = [self._weights_of(counts) for counts in [whole] + buckets]
+        scores = [_cosine(query, weights) for weights in vectors]
+        return scores[0], scores[1:]
+
+    def vectorize(self, texts):
+        """
+        TF-IDF matrix (one L2-normalized row per text) in a column space shared by
+        all the given texts. Rows can be compared with a single sparse product.
+        """
+        columns = {}
+        indptr, indices, data = [0], [], []
+        with self._lock:
+            for text in texts:
+                for key, weight in self._weights(text).items():
+                    column = columns.setdefault(key, len(columns))
+                    indices.append(column)
+                    data.append(weight)
+                indptr.append(len(indices))
+
+        matrix = csr_matrix(
+            (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64), indptr),
+            shape=(len(indptr) - 1, max(1, len(columns)))
+        )
+        norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+        norms[norms == 0] = 1.0
+        return csr_matrix(matrix.multiply(1.0 / norms[:, None]))
+
+    def score_many(self, query_text, texts):
+        """Cosine scores of many texts against one query, as a NumPy array."""
+        matrix = self.vectorize([query_text] + list(texts))
+        return (matrix[1:] @ matrix[0].T).toarray().ravel()
+
+    def _idf_array(self):
+        """IDF of every term id (same formula as idf()), cached per generation."""
+        if self._idf is None or self._idf[0] != self.generation:
+            df = np.frombuffer(self.doc_freq, dtype=np.uint32).astype(np.float64) if self.doc_freq else np.zeros(0)
+            self._idf = (self.generation, np.log((1 + self.document_count) / (1 + df)) + 1.0)
+        return self._idf[1]
+
+    def score_subset(self, query_text, doc_ids):
+        """
+        TF-IDF cosine of the query against the given stored documents only: the
+        query terms' posting lists are filtered down to the subset, so the cost is
+        independent of how many other documents the index holds (the approximate
+        vector search scores just its candidates).
+        Returns: scores aligned with doc_ids (0 for unknown or removed ids).
+        """
+        scores = np.zeros(len(doc_ids))
+        with self._lock:
+            weights = self._weights(query_text)
+            if not weights or not doc_ids:
+                return scores
+            query_norm = math.sqrt(sum(w * w for w in weights.values()))
+            numbers = np.array([self._doc_numbers.get(doc_id, -1) for doc_id in doc_ids], dtype=np.int64)
+            known = numbers >= 0
+            local = np.full(len(self._doc_ids), -1, dtype=np.int64)
+            local[numbers[known]] = np.flatnonzero(known)
+            idf = self._idf_array()
+
+            positions, contributions = [], []
+            for key, weight in weights.items():
+                posting = self._postings.get(key) if isinstance(key, int) else None
+                if posting is None:
+                    continue
+                slots = local[np.frombuffer(posting[0], dtype=np.uint32)]
+                inside = slots >= 0
+                if inside.any():
+                    positions.append(slots[inside])
+                    contributions.append(np.frombuffer(posting[1], dtype=np.uint32)[inside] * (weight * idf[key]))
+            if not positions:
+                return scores
+            dots = np.bincount(np.concatenate(positions), weights=np.concatenate(contributions),
+                               minlength=len(doc_ids))
+            norms = np.zeros(len(doc_ids))
+            norms[known] = self._document_norms()[numbers[known]]
+        nonzero = norms > 0
+        scores[nonzero] = dots[nonzero] / (norms[nonzero] * query_norm)
+        return scores
+
+    def _document_norms(self):
+        """L2 norms of every stored document's TF-IDF vector (by doc number), cached per generation."""
+        if self._norms is not None and self._norms[0] == self.generation:
+            return self._norms[1]
+        idf = self._idf_array()
+
+        live = [(n, terms) for n, terms in enumerate(self._doc_terms) if terms is not None]
+        norms = np.zeros(len(self._doc_ids))
+        if live:
+            numbers = np.concatenate([np.full(len(t[0]), n) for n, t in live])
+            term_ids = np.concatenate([t[0] for _, t in live])
+            counts = np.concatenate([t[1] for _, t in live])
+            weights = counts * idf[term_ids]
+            norms = np.sqrt(np.bincount(numbers, weights=weights * weights, minlength=len(self._doc_ids)))
+        self._norms = (self.generation, norms)
+        return norms
+
+    def score_documents(self, query_text):
+        """
+        TF-IDF cosine of the query against every stored document, through the posting lists
+        (only documents sharing a term with the query are touched).
+        Returns: (doc ids, scores) of the documents with a non-zero score.
+        """
+        with self._lock:
+            weights = self._weights(query_text)
+            if not weights or not self._doc_ids:
+                return [], np.zeros(0)
+            query_norm = math.sqrt(sum(w * w for w in weights.values()))
+            doc_norms = self._document_norms()
+
+            dots = np.zeros(len(self._doc_ids))
+            for key, weight in weights.items():
+                posting = self._postings.get(key) if isinstance(key, int) else None
+                if posting is None:
+                    continue
+                numbers = np.frombuffer(posting[0], dtype=np.uint32)
+                counts = np.frombuffer(posting[1], dtype=np.uint32)
+                dots[numbers] += weight * counts * self.idf(key)
+
+            hits = np.flatnonzero(dots * (doc_norms > 0))
+            hits = [n for n in hits.tolist() if self._doc_ids[n] is not None]
+            scores = dots[hits] / (doc_norms[hits] * query_norm)
+            return [self._doc_ids[n] for n in hits], scores
+
+    def search(self, query_text, top_k=10):
+        """
+        BM25 search over the stored documents.
+        Returns: list of (doc_id, score) sorted by score.
+        """
+        with self._lock:
+            doc_count = self.document_count
+            if doc_count == 0:
+                return []
+            avg_length = self.total_length / doc_count
+            scores = {}
+            for term in set(self.analyze(query_text)):
+                term_id = self.vocabulary.get(term)
+                if term_id is None or term_id not in self._postings:
+                    continue
+                df = self.doc_freq[term_id]
+                idf = math.log((doc_count - df + 0.5) / (df + 0.5) + 1.0)
+                numbers, counts = self._postings[term_id]
+                for number, tf in zip(numbers, counts):
+                    if self._doc_ids[number] is None:
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * self._doc_lengths[number] / avg_length)
+                    scores[number] = scores.get(number, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+            return [(self._doc_ids[number], score) for number, score in best]
+
+    # --- Persistence ---
+
+    def save(self, path):
+        """
+        Writes the index to a single .npz file (postings are rebuilt on load).
+        Removed documents and the terms only they contained are compacted away first.
+        """
+        with self._lock:
+            if self._removed:
+                self._compact()
+            live = [n for n, doc_id in enumerate(self._doc_ids) if doc_id is not None]
+            term_ids = [self._doc_terms[n][0] for n in live]
+            term_counts = [self._doc_terms[n][1] for n in live]
+            offsets = np.zeros(len(live) + 1, dtype=np.int64)
+            if live:
+                offsets[1:] = np.cumsum([len(t) for t in term_ids])
+            meta = {
+                "k1": self.k1,
+                "b": self.b,
+                "terms": self.terms,
+                "doc_ids": [self._doc_ids[n] for n in live],
+            }
+
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                np.savez_compressed(
+                    f,
+                    meta=np.array(json.dumps(meta)),
+                    doc_freq=np.frombuffer(self.doc_freq, dtype=np.uint32) if self.doc_freq else np.zeros(0, np.uint32),
+                    offsets=offsets,
+                    term_ids=np.concatenate(term_ids) if term_ids else np.zeros(0, np.int32),
+                    term_counts=np.concatenate(term_counts) if term_counts else np.zeros(0, np.int32),
+                )
+            os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            index = cls(k1=meta["k1"], b=meta["b"])
+            index.terms = meta["terms"]
+            index.vocabulary = {term: i for i, term in enumerate(index.terms)}
+            index.doc_freq = array('I', data["doc_freq"].astype(np.uint32).tobytes())
+            offsets = data["offsets"]
+            all_ids = data["term_ids"]
+            all_counts = data["term_counts"]
+
+        for number, doc_id in enumerate(meta["doc_ids"]):
+            start, end = offsets[number], offsets[number + 1]
+            index._append(
+                doc_id,
+                all_ids[start:end].astype(np.int32),
+                all_counts[start:end].astype(np.int32),
+            )
+        return index
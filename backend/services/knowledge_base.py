@@ -0,0 +1,197 @@
+import os
+import json
+import time
+import pickle
+import hashlib
+import threading
+from backend.config import Config
+from backend.services.metrics import metrics
+
+# Bump when the compiled structures change shape, so old snapshot files are rebuilt
+SNAPSHOT_FORMAT = 1
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+SOURCE_FILES = {
+    "skills": "skills_database.json",
+    "roles": "role_requirements.json",
+    "roadmaps": "learning_roadmaps.json",
+}
+
+class KnowledgeBaseSnapshot:
+    """
+    Immutable, compiled view of the three knowledge-base files.
+    - version: content hash of all three files (recorded in analysis results)
+    - skills_version: content hash of skills_database.json alone (parsed-resume cache key)
+    - matcher: compiled SkillMatcher; flattened_skills: lower-cased skill set
+    - roles: CompiledRoles (interned skill ids, role x skill matrix, inverted index)
+    - roadmaps / roadmap_index: roadmaps by role name and by lower-cased role name
+    A request takes one snapshot and uses it throughout, so a reload never mixes versions.
+    """
+    def __init__(self, version, skills_version, skills_db, role_requirements, roadmaps):
+        # Imported here: role_scorer and skill_extractor import this module
+        from backend.services.skill_matcher import SkillMatcher
+        from backend.services.role_scorer import CompiledRoles
+
+        self.version = version
+        self.skills_version = skills_version
+        self.created_at = time.time()
+
+        self.skills_db = skills_db
+        self.matcher = SkillMatcher(skills_db)
+        self.flattened_skills = {skill.lower() for skills in skills_db.values() for skill in skills}
+
+        self.role_requirements = role_requirements
+        self.roles = CompiledRoles(role_requirements)
+
+        self.roadmaps = roadmaps
+        self.roadmap_index = {role.lower(): steps for role, steps in roadmaps.items()}
+
+def _read_json(raw, name):
+    try:
+        return json.loads(raw.decode('utf-8')) if raw is not None else {}
+    except Exception as e:
+        print(f"Error loading {name}: {e}")
+        metrics.record_error("knowledge_base")
+        return {}
+
+class KnowledgeBase:
+    """
+    Loads skills, roles and roadmaps once into a KnowledgeBaseSnapshot.
+    1. Cold start: the compiled snapshot is unpickled from snapshot_path when its
+       version matches the current source files (no JSON parsing, no automaton build).
+    2. Hot reload: file mtimes are checked at most every reload_interval seconds;
+       on a change a new snapshot is built and swapped in with a single assignment.
+       Requests already holding the old snapshot finish with it.
+    """
+    def __init__(self, data_dir=None, snapshot_path=None, reload_interval=None):
+        self.data_dir = data_dir or DATA_DIR
+        self.snapshot_path = Config.KB_SNAPSHOT_PATH if snapshot_path is None else snapshot_path
+        self.reload_interval = Config.KB_RELOAD_INTERVAL if reload_interval is None else reload_interval
+
+        self.load_state = "not_loaded"
+        self.reloads = 0
+        self._snapshot = None
+        self._mtimes = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _paths(self):
+        return {name: os.path.join(self.data_dir, filename) for name, filename in SOURCE_FILES.items()}
+
+    def _get_mtimes(self):
+        mtimes = {}
+        for name, path in self._paths().items():
+            try:
+                mtimes[name] = os.path.getmtime(path)
+            except OSError:
+                mtimes[name] = None
+        return mtimes
+
+    def _read_sources(self):
+        raw = {}
+        for name, path in self._paths().items():
+            try:
+                with open(path, 'rb') as f:
+                    raw[name] = f.read()
+            except OSError as e:
+                print(f"Error loading {SOURCE_FILES[name]}: {e}")
+                raw[name] = None
+        return raw
+
+    def _load(self):
+        """Builds (or unpickles) the snapshot for the files currently on disk."""
+        mtimes = self._get_mtimes()
+        raw = self._read_sources()
+
+        combined = hashlib.sha256(str(SNAPSHOT_FORMAT).encode())
+        for name in SOURCE_FILES:
+            combined.update(hashlib.sha256(raw[name] or b"").digest())
+        version = combined.hexdigest()[:16]
+        skills_version = (
+            hashlib.sha256(raw["skills"]).hexdigest()[:16] if raw["skills"] is not None else "unavailable"
+        )
+
+        snapshot = self._read_snapshot_file(version)
+        if snapshot is None:
+            snapshot = KnowledgeBaseSnapshot(
+                version, skills_version,
+                _read_json(raw["skills"], SOURCE_FILES["skills"]),
+                _read_json(raw["roles"], SOURCE_FILES["roles"]),
+                _read_json(raw["roadmaps"], SOURCE_FILES["roadmaps"]),
+            )
+            self._write_snapshot_file(snapshot)
+        return snapshot, mtimes
+
+    def _read_snapshot_file(self, version):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                header = pickle.load(f)
+                if header != (SNAPSHOT_FORMAT, version):
+                    return None
+                return pickle.load(f)
+        except Exception as e:
+            print(f"Error reading knowledge base snapshot: {e}")
+            return None
+
+    def _write_snapshot_file(self, snapshot):
+        """Writes to a temp file and renames it, so other workers never read a partial file."""
+        if not self.snapshot_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.snapshot_path)), exist_ok=True)
+            tmp_path = f"{self.snapshot_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((SNAPSHOT_FORMAT, snapshot.version), f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            print(f"Error writing knowledge base snapshot: {e}")
+
+    def current(self):
+        """Returns the active snapshot, reloading it first if a source file changed."""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self.load_state = "loading"
+                    self._snapshot, self._mtimes = self._load()
+                    self._checked_at = time.monotonic()
+                    self.load_state = "ready"
+                return self._snapshot
+
+        if self.reload_interval >= 0 and time.monotonic() - self._checked_at >= self.reload_interval:
+            self.refresh(blocking=False)
+        return self._snapshot
+
+    def refresh(self, blocking=True):
+        """
+        Reloads the knowledge base if any source file changed on disk. Returns True if reloaded.
+        With blocking=False the call returns right away when another thread is already reloading.
+        """
+        if not self._lock.acquire(blocking=blocking):
+            return False
+        try:
+            self._checked_at = time.monotonic()
+            if self._snapshot is not None and self._get_mtimes() == self._mtimes:
+                return False
+            previous = self._snapshot
+            snapshot, mtimes = self._load()
+            # Atomic swap: readers see either the old or the new snapshot, never a mix
+            self._snapshot, self._mtimes = snapshot, mtimes
+            if previous is not None:
+                self.reloads += 1
+            self.load_state = "ready"
+            return True
+        finally:
+            self._lock.release()
+
+    def warm_up(self):
+        self.current()
+
+    @property
+    def version(self):
+        return self.current().version
+
+knowledge_base = KnowledgeBase()
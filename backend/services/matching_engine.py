@@ -1,75 +1,305 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from sentence_transformers import SentenceTransformer
 import numpy as np
+import atexit
+import os
+import threading
+from backend.config import Config
+from backend.services.embedding_cache import EmbeddingCache
+from backend.services.keyword_index import KeywordIndex
+from backend.services.encode_scheduler import EncodeScheduler
+from backend.services.profiling import run_inline
+from backend.services.chunking import split_chunks, split_sections, pool, chunk_similarity
+from backend.services.encoders import create_encoder
+from backend.services.vector_index import VectorIndex
+from backend.services.metrics import metrics
+
+# all-MiniLM-L6-v2 is a lightweight, fast, and high-quality model for semantic similarity
+MODEL_NAME = 'all-MiniLM-L6-v2'
 
 class MatchingEngine:
-    def __init__(self):
+    def __init__(self, backend=None):
         """
         Initializes the matching engine.
-        Loads the SentenceTransformer model (semantic) which might take a few seconds.
+        The semantic model takes a few seconds to load, so it is loaded lazily on
+        first use (or by the background warm-up) instead of here.
+        backend: encoder backend (torch, int8, onnx, stub); default Config.ENCODER_BACKEND.
+        """
+        self.encoder = create_encoder(MODEL_NAME, backend)
+        self._semantic_model = None
+        self._keyword_index = None
+        self._vector_indexes = {}
+        self._load_lock = threading.Lock()
+        self._keyword_lock = threading.Lock()
+        self._unsaved_documents = 0
+        # not_loaded -> loading -> ready / failed
+        self.load_state = "not_loaded"
+
+        # Repeated texts (same JD all day, re-uploaded resumes) skip the transformer
+        # Keyed by backend as well, since each backend produces slightly different vectors
+        self.embedding_cache = EmbeddingCache(
+            self.encoder.cache_id,
+            cache_dir=Config.EMBEDDING_CACHE_DIR,
+            dtype=Config.EMBEDDING_CACHE_DTYPE,
+            max_memory_bytes=Config.EMBEDDING_CACHE_MEMORY_MB * 1024 * 1024,
+            max_disk_bytes=Config.EMBEDDING_CACHE_DISK_MB * 1024 * 1024,
+        )
+        atexit.register(self.embedding_cache.flush)
+
+        # Small encodes from concurrent requests are merged into one model call
+        self.encode_scheduler = EncodeScheduler(
+            self._encode_batch,
+            max_batch_size=Config.ENCODE_MAX_BATCH_SIZE,
+            max_wait_ms=Config.ENCODE_MAX_WAIT_MS,
+            timeout=Config.ENCODE_TIMEOUT,
+        ) if Config.ENCODE_BATCHING else None
+
+    @property
+    def semantic_model(self):
+        """The semantic encoder (see encoders.py), loaded on first access."""
+        if self._semantic_model is not None:
+            return self._semantic_model
+        with self._load_lock:
+            if self._semantic_model is None:
+                self.load_state = "loading"
+                try:
+                    self._semantic_model = self.encoder.load()
+                    self.load_state = "ready"
+                except Exception:
+                    self.load_state = "failed"
+                    raise
+        return self._semantic_model
+
+    @property
+    def keyword_index(self):
+        """Pre-fitted keyword statistics shared by every request (loaded on first use)."""
+        if self._keyword_index is None:
+            with self._load_lock:
+                if self._keyword_index is None:
+                    self._keyword_index = self._load_keyword_index()
+        return self._keyword_index
+
+    def warm_up(self):
+        """Loads the model and keyword index ahead of the first request."""
+        self.keyword_index
+        return self.semantic_model is not None
+
+    def _load_keyword_index(self):
+        path = Config.KEYWORD_INDEX_PATH
+        index = None
+        if path and os.path.exists(path):
+            try:
+                index = KeywordIndex.load(path)
+            except Exception as e:
+                print(f"Error loading keyword index: {e}")
+        if path:
+            atexit.register(self.save_keyword_index)
+        return index or KeywordIndex()
+
+    def index_document(self, doc_id, text):
         """
-        print("Loading Sentence Transformer model (all-MiniLM-L6-v2)...")
-        # all-MiniLM-L6-v2 is a lightweight, fast, and high-quality model for semantic similarity
-        self.semantic_model = SentenceTransformer('all-MiniLM-L6-v2')
-        print("Sentence Transformer model loaded.")
+        Adds an analysed resume or JD to the keyword corpus statistics (re-adding an id
+        replaces it), so IDF reflects the documents this deployment actually sees.
+        The oldest documents are dropped beyond Config.KEYWORD_INDEX_MAX_DOCS, and the
+        index is saved every Config.KEYWORD_INDEX_SAVE_EVERY additions.
+        """
+        if not text:
+            return
+        index = self.keyword_index
+        index.add(doc_id, text)
+        limit = Config.KEYWORD_INDEX_MAX_DOCS
+        if limit and index.document_count > limit:
+            # Evict in chunks, so the scan for the oldest ids is not repeated on every add
+            for old_id in index.oldest(index.document_count - limit + max(1, limit // 100)):
+                index.remove(old_id)
+        with self._keyword_lock:
+            self._unsaved_documents += 1
+            save = Config.KEYWORD_INDEX_SAVE_EVERY and self._unsaved_documents >= Config.KEYWORD_INDEX_SAVE_EVERY
+            if save:
+                self._unsaved_documents = 0
+        if save:
+            self.save_keyword_index()
+
+    def remove_document(self, doc_id):
+        return self.keyword_index.remove(doc_id)
+
+    def save_keyword_index(self):
+        if Config.KEYWORD_INDEX_PATH and self._keyword_index is not None:
+            try:
+                self._keyword_index.save(Config.KEYWORD_INDEX_PATH)
+            except Exception as e:
+                print(f"Error saving keyword index: {e}")
 
+    def _encode_batch(self, texts, batch_size=32):
+        with metrics.span("transformer"):
+            return self.semantic_model.encode(texts, batch_size=batch_size)
+
+    def encode(self, texts, batch_size=32):
+        """
+        Returns L2-normalized embeddings (one row per text), served from the
+        embedding cache where possible. Only cache misses reach the model,
+        and they are encoded together in one batched call.
+        Small requests go through the encode scheduler, which merges them with
+        other concurrent requests; bulk requests are already big enough and skip it.
+        """
+        vectors = self.embedding_cache.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+
+        if missing:
+            # Deduplicate so a text repeated within the call is encoded once
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            scheduler = self.encode_scheduler
+            # A profiled request encodes on its own thread, so the profile sees the model call
+            if scheduler is not None and len(unique_texts) < scheduler.max_batch_size and not run_inline():
+                encoded = scheduler.encode(unique_texts)
+            else:
+                encoded = self._encode_batch(unique_texts, batch_size)
+            by_text = {}
+            for text, vector in zip(unique_texts, encoded):
+                self.embedding_cache.put(text, vector)
+                by_text[text] = np.asarray(vector, dtype=np.float32)
+            for i in missing:
+                vectors[i] = by_text[texts[i]]
+
+        return np.vstack(vectors)
+
+    @metrics.timed("keyword_score")
     def calculate_keyword_score(self, resume_text, jd_text):
         """
         Calculates similarity based on finding exact keywords (TF-IDF).
         Good for specific technical terms (e.g., "SQL", "Python").
+        IDF comes from the pre-fitted keyword index, so nothing is fitted per request
+        and scores are stable across requests.
         """
         if not resume_text or not jd_text:
             return 0.0
             
         try:
-            # Create vectors (1-gram and 2-gram to capture phrases like "Machine Learning")
-            vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2))
-            tfidf_matrix = vectorizer.fit_transform([resume_text, jd_text])
-            
-            # Compute Cosine Similarity between the two
-            # matrix[0] is resume, matrix[1] is JD
-            similarity = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:2])[0][0]
-            
-            return float(similarity)
+            # 1-gram and 2-gram terms capture phrases like "Machine Learning"
+            return self.keyword_index.score_pair(resume_text, jd_text)
         except Exception as e:
             print(f"Error in keyword scoring: {e}")
+            metrics.record_error("keyword_score")
             return 0.0
 
+    @metrics.timed("semantic_score")
     def calculate_semantic_score(self, resume_text, jd_text):
         """
         Calculates similarity based on meaning (Embeddings).
         Good for context (e.g., matching "coding" with "software development").
+        Long texts are encoded in chunks (see _semantic_scores), so the whole
+        document counts, not only the first ~256 word pieces the model reads.
         """
         if not resume_text or not jd_text:
             return 0.0
             
         try:
-            # Encode both texts into high-dimensional vectors
-            embeddings = self.semantic_model.encode([resume_text, jd_text])
-            
-            # Compute Cosine Similarity
-            # embeddings[0] is resume, embeddings[1] is JD
-            # We reshape to (1, -1) because cosine_similarity expects 2D arrays
-            similarity = cosine_similarity([embeddings[0]], [embeddings[1]])[0][0]
-            
-            return float(similarity)
+            return float(self._semantic_scores(jd_text, [resume_text])[0])
         except Exception as e:
             print(f"Error in semantic scoring: {e}")
+            metrics.record_error("semantic_score")
             return 0.0
 
-    def evaluate(self, resume_text, jd_text):
+    def _chunk_embeddings(self, texts, batch_size=32):
         """
-        Main evaluation function.
-        Combines semantic and keyword scores.
-        Weight: 60% Semantic, 40% Keyword (as per project spec).
+        Splits every text into overlapping chunks and encodes all chunks of all
+        texts in one batched call. Returns: (embeddings, one slice per text).
+        """
+        chunk_texts, slices = [], []
+        for text in texts:
+            chunks = split_chunks(
+                text, Config.CHUNK_MAX_WORDS, Config.CHUNK_OVERLAP_WORDS, Config.CHUNK_MAX_PER_DOC
+            )
+            slices.append(slice(len(chunk_texts), len(chunk_texts) + len(chunks)))
+            chunk_texts.extend(chunk.text for chunk in chunks)
+        return self.encode(chunk_texts, batch_size=batch_size), slices
+
+    def _semantic_scores(self, jd_text, resume_texts, batch_size=32):
+        """
+        Cosine similarity of each resume to the JD according to Config.SEMANTIC_CHUNKING:
+        - "off": one embedding per text (the model truncates long texts)
+        - "mean" / "max": chunk embeddings pooled into one vector per text
+        - "chunk": chunk-to-chunk, each JD chunk matched to its best resume chunk
+        The JD and resume chunks are encoded together in one batch.
+        """
+        mode = Config.SEMANTIC_CHUNKING
+        if mode == "off":
+            # Normalized embeddings turn cosine similarity into a plain dot product
+            embeddings = self.encode([jd_text] + list(resume_texts), batch_size=batch_size)
+            return embeddings[1:] @ embeddings[0]
+
+        embeddings, slices = self._chunk_embeddings([jd_text] + list(resume_texts), batch_size)
+        jd_chunks = embeddings[slices[0]]
+        if mode == "chunk":
+            return np.array([chunk_similarity(embeddings[s], jd_chunks) for s in slices[1:]])
+
+        jd_vector = pool(jd_chunks, mode)
+        return np.array([pool(embeddings[s], mode) @ jd_vector for s in slices[1:]])
+
+    @metrics.timed("keyword_score")
+    def calculate_keyword_scores_by_section(self, resume_text, jd_text, spans):
+        """
+        Keyword score of the resume and of each (start, end) section span, from one
+        tokenization of the resume (see KeywordIndex.score_sections).
+        Returns: (whole-resume score, list of section scores).
+        """
+        if not resume_text or not jd_text:
+            return 0.0, [0.0] * len(spans)
+
+        try:
+            return self.keyword_index.score_sections(jd_text, resume_text, [start for start, _ in spans])
+        except Exception as e:
+            print(f"Error in keyword scoring: {e}")
+            metrics.record_error("keyword_score")
+            return 0.0, [0.0] * len(spans)
+
+    @metrics.timed("semantic_score")
+    def calculate_semantic_scores_by_section(self, resume_text, jd_text, spans):
+        """
+        Semantic score of the resume and of each (start, end) section span from one
+        encode: the resume is chunked within its sections, each section is scored on
+        its own chunks and the whole resume on all of them (as in _semantic_scores).
+        With chunking off, the section texts are encoded alongside the resume instead.
+        Returns: (whole-resume score, list of section scores; None for an empty section).
         """
-        keyword_score = self.calculate_keyword_score(resume_text, jd_text)
-        semantic_score = self.calculate_semantic_score(resume_text, jd_text)
-        
-        # Weighted combination
+        if not resume_text or not jd_text:
+            return 0.0, [0.0] * len(spans)
+
+        try:
+            mode = Config.SEMANTIC_CHUNKING
+            if mode == "off":
+                embeddings = self.encode([jd_text, resume_text] + [resume_text[s:e] for s, e in spans])
+                scores = (embeddings[1:] @ embeddings[0]).tolist()
+                return scores[0], scores[1:]
+
+            jd_chunks = split_chunks(jd_text, Config.CHUNK_MAX_WORDS, Config.CHUNK_OVERLAP_WORDS,
+                                     Config.CHUNK_MAX_PER_DOC)
+            chunks, owners = split_sections(resume_text, spans, Config.CHUNK_MAX_WORDS,
+                                            Config.CHUNK_OVERLAP_WORDS, Config.CHUNK_MAX_PER_DOC)
+            embeddings = self.encode([c.text for c in jd_chunks] + [c.text for c in chunks])
+            jd_embeddings, resume_embeddings = embeddings[:len(jd_chunks)], embeddings[len(jd_chunks):]
+            owners = np.asarray(owners)
+
+            if mode == "chunk":
+                def score(rows):
+                    return chunk_similarity(rows, jd_embeddings)
+            else:
+                jd_vector = pool(jd_embeddings, mode)
+
+                def score(rows):
+                    return float(pool(rows, mode) @ jd_vector)
+
+            sections = [score(resume_embeddings[owners == i]) if np.any(owners == i) else None
+                        for i in range(len(spans))]
+            return score(resume_embeddings), sections
+        except Exception as e:
+            print(f"Error in semantic scoring: {e}")
+            metrics.record_error("semantic_score")
+            return 0.0, [0.0] * len(spans)
+
+    @staticmethod
+    def _combine(keyword_score, semantic_score):
+        """Weight: 60% Semantic, 40% Keyword (as per project spec)."""
         overall_score = (semantic_score * 0.6) + (keyword_score * 0.4)
-        
+
         # Convert to percentages (0-100) for UI friendliness, rounded to 1 decimal
         return {
             "overall_score": round(overall_score * 100, 1),
@@ -77,5 +307,166 @@ class MatchingEngine:
             "semantic_match": round(semantic_score * 100, 1)
         }
 
+    def evaluate(self, resume_text, jd_text, sections=None):
+        """
+        Main evaluation function.
+        Combines semantic and keyword scores.
+        sections: optional list of (start, end) spans of the resume text; the result
+        then also carries "sections", one score dict per span, computed from the same
+        tokenization and chunk embeddings as the whole-resume scores.
+        """
+        if not sections:
+            keyword_score = self.calculate_keyword_score(resume_text, jd_text)
+            semantic_score = self.calculate_semantic_score(resume_text, jd_text)
+            return self._combine(keyword_score, semantic_score)
+
+        keyword_score, keyword_sections = self.calculate_keyword_scores_by_section(resume_text, jd_text, sections)
+        semantic_score, semantic_sections = self.calculate_semantic_scores_by_section(
+            resume_text, jd_text, sections
+        )
+        result = self._combine(keyword_score, semantic_score)
+        result["sections"] = [
+            self._combine(keyword, semantic) if semantic is not None else None
+            for keyword, semantic in zip(keyword_sections, semantic_sections)
+        ]
+        return result
+
+    def _keyword_scores_many(self, jd_text, resume_texts):
+        """
+        Keyword (TF-IDF) scores of many resumes against one JD.
+        All texts are vectorized with the index IDF into one sparse matrix
+        and all cosines come out of one sparse matrix product.
+        """
+        try:
+            return self.keyword_index.score_many(jd_text, resume_texts)
+        except Exception as e:
+            print(f"Error in keyword scoring: {e}")
+            metrics.record_error("keyword_score")
+            return np.zeros(len(resume_texts))
+
+    def _semantic_scores_many(self, jd_text, resume_texts, batch_size=32):
+        """
+        Semantic scores of many resumes against one JD.
+        Resumes are processed in blocks, so the chunk embeddings held at once stay
+        bounded however many resumes are ranked. The JD embedding is cached after
+        the first block.
+        """
+        try:
+            resume_texts = list(resume_texts)
+            block = max(1, batch_size) * 8
+            scores = [
+                self._semantic_scores(jd_text, resume_texts[i:i + block], batch_size)
+                for i in range(0, len(resume_texts), block)
+            ]
+            return np.concatenate(scores) if scores else np.zeros(0)
+        except Exception as e:
+            print(f"Error in semantic scoring: {e}")
+            metrics.record_error("semantic_score")
+            return np.zeros(len(resume_texts))
+
+    @metrics.timed("rank")
+    def rank(self, jd_text, resumes, top_k=None, batch_size=32):
+        """
+        Ranks many resumes against one job description (recruiter view).
+        resumes: list of resume texts.
+        top_k: only return the best k results (None returns all).
+        Returns: list of dicts sorted by overall_score, each with the resume's
+        position in the input ("index") plus the same fields as evaluate().
+        """
+        resumes = list(resumes)
+        count = len(resumes)
+        if count == 0:
+            return []
+
+        keyword_scores = np.zeros(count)
+        semantic_scores = np.zeros(count)
+
+        # Empty resumes score 0, just like evaluate()
+        valid = [i for i, text in enumerate(resumes) if text]
+        if jd_text and valid:
+            valid_texts = [resumes[i] for i in valid]
+            keyword_scores[valid] = self._keyword_scores_many(jd_text, valid_texts)
+            semantic_scores[valid] = self._semantic_scores_many(jd_text, valid_texts, batch_size)
+
+        overall_scores = (semantic_scores * 0.6) + (keyword_scores * 0.4)
+
+        # Partial selection of the top k before sorting only those
+        if top_k is not None and top_k < count:
+            if top_k <= 0:
+                return []
+            order = np.argpartition(-overall_scores, top_k - 1)[:top_k]
+            order = order[np.argsort(-overall_scores[order], kind='stable')]
+        else:
+            order = np.argsort(-overall_scores, kind='stable')
+
+        return [
+            {
+                "index": int(i),
+                "overall_score": round(float(overall_scores[i]) * 100, 1),
+                "keyword_match": round(float(keyword_scores[i]) * 100, 1),
+                "semantic_match": round(float(semantic_scores[i]) * 100, 1)
+            }
+            for i in order
+        ]
+
+    # --- Reverse matching: top-k JDs for a resume, top-k resumes for a JD ---
+
+    def document_vectors(self, texts, batch_size=32):
+        """
+        One normalized embedding per document, consistent with semantic scoring:
+        pooled chunk vectors (mean pooling for "chunk" mode), or a single embedding when chunking is off.
+        """
+        mode = Config.SEMANTIC_CHUNKING
+        if mode == "off":
+            return self.encode(list(texts), batch_size=batch_size)
+        embeddings, slices = self._chunk_embeddings(texts, batch_size)
+        method = "max" if mode == "max" else "mean"
+        return np.vstack([pool(embeddings[s], method) for s in slices])
+
+    def vector_index(self, kind):
+        """The persistent hybrid index of "jobs" or "resumes" (loaded on first use)."""
+        if kind not in ("jobs", "resumes"):
+            raise ValueError(f"Unknown index kind: {kind}")
+        if kind not in self._vector_indexes:
+            with self._load_lock:
+                if kind not in self._vector_indexes:
+                    directory = os.path.join(Config.VECTOR_INDEX_DIR, kind) if Config.VECTOR_INDEX_DIR else None
+                    index = VectorIndex(directory, dtype=Config.VECTOR_INDEX_DTYPE,
+                                        snapshot_every=Config.VECTOR_INDEX_SNAPSHOT_EVERY)
+                    if directory:
+                        # Adds are journaled as they happen; a clean exit also writes a snapshot
+                        atexit.register(index.save)
+                    self._vector_indexes[kind] = index
+        return self._vector_indexes[kind]
+
+    def add_to_index(self, kind, doc_ids, texts, batch_size=32):
+        """Adds (or replaces) JDs or resumes in the reverse-matching index."""
+        texts = list(texts)
+        self.vector_index(kind).add_many(list(doc_ids), texts, self.document_vectors(texts, batch_size))
+
+    def remove_from_index(self, kind, doc_id):
+        return self.vector_index(kind).remove(doc_id)
+
+    def search_index(self, kind, query_text, top_k=10, nprobe=None, exclude=None):
+        """
+        Hybrid top-k search of one text against the whole "jobs" or "resumes" index,
+        with the same 60/40 semantic/keyword weighting as evaluate().
+        """
+        if not query_text:
+            return []
+        nprobe = Config.VECTOR_INDEX_NPROBE if nprobe is None else nprobe
+        query_vector = self.document_vectors([query_text])[0]
+        return self.vector_index(kind).search(query_text, query_vector, top_k, nprobe, exclude)
+
+    def top_jobs_for_resume(self, resume_text, top_k=10, nprobe=None):
+        return self.search_index("jobs", resume_text, top_k, nprobe)
+
+    def top_resumes_for_job(self, jd_text, top_k=10, nprobe=None):
+        return self.search_index("resumes", jd_text, top_k, nprobe)
+
+    def save_vector_indexes(self):
+        for index in self._vector_indexes.values():
+            index.save()
+
 # Singleton
 matching_engine = MatchingEngine()
@@ -0,0 +1,205 @@
+"""
+Lightweight in-process instrumentation, exposed in the Prometheus text format.
+
+- metrics.span(stage): context manager timing one stage into a latency histogram,
+  labelled by stage and outcome ("ok", or "error" when an exception escapes)
+- @metrics.timed(stage): the same as a decorator for service entry points
+- metrics.record_error(stage): counts errors a service handles itself
+  (prints and returns a fallback), which a span would otherwise report as ok
+- metrics.register_stats(name, stats_fn): exposes an existing stats() dict
+  (cache hit ratios, queue depths) as gauges, read at scrape time
+- metrics.trace(): collects the spans of the current thread for one request
+  (used by the profiler, works even with metrics disabled)
+With Config.METRICS_ENABLED off and no trace active, spans are a shared no-op.
+"""
+import bisect
+import contextlib
+import functools
+import threading
+import time
+from backend.config import Config
+
+PREFIX = "resumexpert"
+
+# Latency buckets in seconds (upper bounds; +Inf is implicit)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class _NoopSpan:
+    """Returned by span() when metrics are disabled."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP = _NoopSpan()
+
+class _TraceLocal(threading.local):
+    # Per-thread list of (stage, seconds) while a trace is active
+    trace = None
+
+_local = _TraceLocal()
+
+class _Span:
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        self.metrics.observe(self.stage, seconds, "ok" if exc_type is None else "error")
+        trace = _local.trace
+        if trace is not None:
+            trace.append((self.stage, seconds))
+        return False
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '%s="%s"' % (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + pairs + "}"
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Metrics:
+    def __init__(self, enabled=True, buckets=BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        # (stage, outcome) -> [bucket counts..., +Inf count], sum of seconds
+        self._histograms = {}
+        self._sums = {}
+        self._errors = {}
+        self._stats = {}
+
+    # --- Recording ---
+
+    def span(self, stage):
+        if self.enabled or _local.trace is not None:
+            return _Span(self, stage)
+        return _NOOP
+
+    def timed(self, stage):
+        """Decorator: times every call of the function as one span of stage."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled and _local.trace is None:
+                    return fn(*args, **kwargs)
+                with _Span(self, stage):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, stage, seconds, outcome="ok"):
+        if not self.enabled:
+            return
+        key = (stage, outcome)
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            counts = self._histograms.get(key)
+            if counts is None:
+                counts = self._histograms[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += seconds
+
+    def record_error(self, stage):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._errors[stage] = self._errors.get(stage, 0) + 1
+
+    def register_stats(self, name, stats_fn, counters=()):
+        """
+        stats_fn() -> dict of numbers, read on every scrape. Each key becomes
+        <prefix>_<name>_<key>; keys listed in counters are exposed as counters.
+        """
+        self._stats[name] = (stats_fn, set(counters))
+
+    @contextlib.contextmanager
+    def trace(self):
+        """Yields the list the current thread's spans are appended to, as (stage, seconds)."""
+        previous = _local.trace
+        _local.trace = spans = []
+        try:
+            yield spans
+        finally:
+            _local.trace = previous
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._sums.clear()
+            self._errors.clear()
+
+    def snapshot(self):
+        """{stage: {outcome: {"count", "sum"}}} of the recorded spans (for tests and debugging)."""
+        with self._lock:
+            result = {}
+            for (stage, outcome), counts in self._histograms.items():
+                result.setdefault(stage, {})[outcome] = {"count": sum(counts), "sum": self._sums[(stage, outcome)]}
+            return result
+
+    # --- Exposition ---
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            histograms = {key: list(counts) for key, counts in self._histograms.items()}
+            sums = dict(self._sums)
+            errors = dict(self._errors)
+
+        name = f"{PREFIX}_stage_duration_seconds"
+        lines += [f"# HELP {name} Time spent per pipeline stage.", f"# TYPE {name} histogram"]
+        for (stage, outcome), counts in sorted(histograms.items()):
+            labels = [("stage", stage), ("outcome", outcome)]
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_label_text(labels + [('le', _number(bound))])} {cumulative}")
+            lines.append(f"{name}_sum{_label_text(labels)} {_number(sums[(stage, outcome)])}")
+            lines.append(f"{name}_count{_label_text(labels)} {cumulative}")
+
+        name = f"{PREFIX}_stage_errors_total"
+        lines += [f"# HELP {name} Errors handled inside a stage (logged, fallback returned).",
+                  f"# TYPE {name} counter"]
+        for stage, count in sorted(errors.items()):
+            lines.append(f"{name}{_label_text([('stage', stage)])} {count}")
+
+        for source, (stats_fn, counters) in sorted(self._stats.items()):
+            try:
+                stats = stats_fn() or {}
+            except Exception as e:
+                print(f"Error collecting {source} metrics: {e}")
+                continue
+            for key, value in stats.items():
+                if not isinstance(value, (int, float)):
+                    continue
+                if key in counters:
+                    metric, kind = f"{PREFIX}_{source}_{key}_total", "counter"
+                else:
+                    metric, kind = f"{PREFIX}_{source}_{key}", "gauge"
+                lines += [f"# TYPE {metric} {kind}", f"{metric} {_number(value)}"]
+
+        return "\n".join(lines) + "\n"
+
+# Shared by every service module
+metrics = Metrics(enabled=Config.METRICS_ENABLED)
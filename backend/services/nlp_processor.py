@@ -1,23 +1,203 @@
-import spacy
-import re
+import hashlib
+import threading
+from collections import OrderedDict
+from backend.config import Config
+from backend.services.metrics import metrics
+
+# Pipeline components each analysis task needs from en_core_web_md.
+# Everything else is disabled for that call (e.g. lemmas never need parser or NER).
+TASK_COMPONENTS = {
+    "tokens": {"tok2vec", "tagger", "attribute_ruler", "lemmatizer"},
+    "entities": {"ner"},
+}
+ALL_TASKS = tuple(TASK_COMPONENTS)
+
+class TextAnalysis:
+    """
+    Compact view of one parsed document, so the spaCy Doc itself can be dropped.
+    tokens: cleaned lemma list (same as preprocess_text), or None if not computed.
+    entities: list of (text, label, start_char, end_char), or None if not computed.
+    """
+    __slots__ = ("tokens", "entities")
+
+    def __init__(self, tokens=None, entities=None):
+        self.tokens = tokens
+        self.entities = entities
+
+    def has(self, task):
+        return getattr(self, task) is not None
 
 class NLPProcessor:
-    def __init__(self):
+    def __init__(self, cache_size=256):
         """
-        Initialize the NLP Processor by loading the spaCy model.
+        Initialize the NLP Processor.
+        The spaCy model is loaded lazily on first use (or by the warm-up thread),
+        so importing this module stays cheap.
         Usage: processor = NLPProcessor()
         """
+        self._nlp = None
+        self._load_lock = threading.Lock()
+        # not_loaded -> loading -> ready / failed
+        self.load_state = "not_loaded"
+
+        # Small LRU of recent analyses, keyed by a digest of the text.
+        # Lets the skill extractor, entity lookups etc. share one parse per document.
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._disabled_cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _load_model(self):
         try:
+            import spacy
             # Load the medium-sized English model
             # It contains word vectors which are useful for similarity (Phase 2),
             # though we will use Sentence Transformers for the heavy lifting.
             print("Loading spaCy model...")
-            self.nlp = spacy.load("en_core_web_md")
+            model = spacy.load("en_core_web_md")
             print("spaCy model loaded successfully.")
-        except OSError:
+            return model
+        except (OSError, ImportError):
             print("❌ Error: spaCy model 'en_core_web_md' not found.")
             print("Run: python -m spacy download en_core_web_md")
-            self.nlp = None
+            return None
+
+    @property
+    def nlp(self):
+        """The spaCy pipeline, loaded on first access (None if unavailable)."""
+        if self.load_state in ("ready", "failed"):
+            return self._nlp
+        with self._load_lock:
+            if self.load_state not in ("ready", "failed"):
+                self.load_state = "loading"
+                self._nlp = self._load_model()
+                self.load_state = "ready" if self._nlp is not None else "failed"
+        return self._nlp
+
+    @nlp.setter
+    def nlp(self, model):
+        self._nlp = model
+        self._disabled_cache = {}
+        self.load_state = "ready" if model is not None else "failed"
+
+    def warm_up(self):
+        """Forces the model to load (used by the background warm-up)."""
+        return self.nlp is not None
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._cache),
+        }
+
+    def clear_cache(self):
+        """Drops the cached analyses (benchmarks use this to measure uncached parses)."""
+        with self._lock:
+            self._cache.clear()
+
+    def _disabled_for(self, tasks):
+        """Returns the pipeline components that can be switched off for these tasks."""
+        key = frozenset(tasks)
+        disabled = self._disabled_cache.get(key)
+        if disabled is None:
+            needed = set()
+            for task in tasks:
+                needed |= TASK_COMPONENTS[task]
+            disabled = [name for name in self.nlp.pipe_names if name not in needed]
+            self._disabled_cache[key] = disabled
+        return disabled
+
+    @staticmethod
+    def _cache_key(text):
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+    @staticmethod
+    def _fill(analysis, doc, tasks):
+        """Copies what the tasks need out of the Doc into the compact view."""
+        if "tokens" in tasks:
+            analysis.tokens = [
+                token.lemma_.lower() for token in doc
+                if not token.is_stop and not token.is_punct and not token.is_space
+            ]
+        if "entities" in tasks:
+            analysis.entities = [
+                (ent.text, ent.label_, ent.start_char, ent.end_char) for ent in doc.ents
+            ]
+
+    def analyze(self, text, tasks=ALL_TASKS):
+        """
+        Parses the text once and returns a cached TextAnalysis.
+        tasks: any of "tokens", "entities". Only the components these need are run,
+        and a later call asking for more tasks only parses for the missing ones.
+        Cached analyses are never modified: missing fields go into a new object,
+        which replaces the cached one under the lock.
+        """
+        if not self.nlp or not text:
+            return TextAnalysis([], [])
+
+        key = self._cache_key(text)
+        with self._lock:
+            analysis = self._cache.get(key)
+            if analysis is not None:
+                self._cache.move_to_end(key)
+
+        if analysis is None:
+            analysis = TextAnalysis()
+        missing = [task for task in tasks if not analysis.has(task)]
+        if not missing:
+            self.hits += 1
+            return analysis
+
+        self.misses += 1
+        with metrics.span("spacy"):
+            doc = self.nlp(text, disable=self._disabled_for(missing))
+        fresh = TextAnalysis(analysis.tokens, analysis.entities)
+        self._fill(fresh, doc, missing)
+
+        with self._lock:
+            # Another thread may have cached other tasks for this text in the meantime
+            current = self._cache.get(key)
+            if current is not None:
+                for task in ALL_TASKS:
+                    if not fresh.has(task) and current.has(task):
+                        setattr(fresh, task, getattr(current, task))
+            analysis = fresh
+            self._cache[key] = analysis
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return analysis
+
+    def analyze_many(self, texts, tasks=ALL_TASKS, batch_size=None, n_process=None):
+        """
+        Bulk version of analyze() for large archives.
+        Streams texts through nlp.pipe and yields one TextAnalysis per text, in input order.
+        Docs are reduced to their compact view as they arrive and results are not cached,
+        so memory stays bounded by the batch size rather than the corpus size.
+        """
+        batch_size = batch_size or Config.NLP_BATCH_SIZE
+        n_process = n_process or Config.NLP_N_PROCESS
+
+        if not self.nlp:
+            for _ in texts:
+                yield TextAnalysis([], [])
+            return
+
+        docs = self.nlp.pipe(
+            (text or "" for text in texts),
+            batch_size=batch_size,
+            n_process=n_process,
+            disable=self._disabled_for(tasks),
+        )
+        for doc in docs:
+            analysis = TextAnalysis()
+            self._fill(analysis, doc, tasks)
+            yield analysis
 
     def preprocess_text(self, text):
         """
@@ -26,25 +206,15 @@ class NLPProcessor:
         2. Lowercasing
         3. Lemmatization (converting words to their base form, e.g., 'running' -> 'run')
         4. Removing stop words (common words like 'and', 'the') and punctuation.
-        
+        Parser and NER are disabled since only lemmas are needed.
+
         Returns:
             list: A list of cleaned string tokens.
         """
         if not self.nlp or not text:
             return []
 
-        # Create a spaCy Doc object
-        doc = self.nlp(text)
-        
-        cleaned_tokens = []
-        
-        for token in doc:
-            # Filter out stop words, punctuation, and whitespace
-            if not token.is_stop and not token.is_punct and not token.is_space:
-                # Use the lemma (base form) and convert to lower case
-                cleaned_tokens.append(token.lemma_.lower())
-                
-        return cleaned_tokens
+        return list(self.analyze(text, ("tokens",)).tokens)
 
     def get_entities(self, text):
         """
@@ -53,9 +223,9 @@ class NLPProcessor:
         """
         if not self.nlp or not text:
             return []
-        
-        doc = self.nlp(text)
-        return [(ent.text, ent.label_) for ent in doc.ents]
+
+        analysis = self.analyze(text, ("entities",))
+        return [(ent_text, label) for ent_text, label, _, _ in analysis.entities]
 
 # Singleton instance to avoid reloading the model multiple times
 nlp_processor = NLPProcessor()
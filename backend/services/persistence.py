@@ -0,0 +1,365 @@
+import os
+import json
+import time
+import uuid
+import queue
+import atexit
+import sqlite3
+import threading
+from backend.config import Config
+from backend.services.metrics import metrics
+
+# Parents before children, so foreign keys always resolve within a flush
+TABLES = ("resume_analysis", "role_scores", "recommendations", "learning_roadmaps")
+
+# Client-generated primary keys: a retried insert skips the rows that already landed
+PRIMARY_KEYS = {
+    "resume_analysis": "analysis_id",
+    "role_scores": "role_score_id",
+    "recommendations": "recommendation_id",
+    "learning_roadmaps": "roadmap_id",
+}
+
+# Columns stored as JSON (JSONB in Supabase, TEXT in the SQLite stand-in)
+JSON_COLUMNS = {
+    "section_scores", "matched_skills", "missing_skills", "additional_skills",
+    "role_missing_skills", "roadmap_json",
+}
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resume_analysis (
+    analysis_id TEXT PRIMARY KEY,
+    user_id TEXT,
+    resume_filename TEXT NOT NULL,
+    job_description_text TEXT,
+    overall_score REAL,
+    keyword_match_score REAL,
+    semantic_match_score REAL,
+    section_scores TEXT,
+    matched_skills TEXT,
+    missing_skills TEXT,
+    additional_skills TEXT,
+    ats_compatibility_score REAL,
+    resume_text TEXT,
+    created_at TEXT DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+CREATE TABLE IF NOT EXISTS role_scores (
+    role_score_id TEXT PRIMARY KEY,
+    analysis_id TEXT REFERENCES resume_analysis(analysis_id) ON DELETE CASCADE,
+    role_name TEXT NOT NULL,
+    role_score REAL,
+    role_missing_skills TEXT,
+    best_fit_role INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS recommendations (
+    recommendation_id TEXT PRIMARY KEY,
+    analysis_id TEXT REFERENCES resume_analysis(analysis_id) ON DELETE CASCADE,
+    recommendation_type TEXT,
+    recommendation_text TEXT,
+    priority TEXT
+);
+CREATE TABLE IF NOT EXISTS learning_roadmaps (
+    roadmap_id TEXT PRIMARY KEY,
+    analysis_id TEXT REFERENCES resume_analysis(analysis_id) ON DELETE CASCADE,
+    role_name TEXT,
+    roadmap_json TEXT
+);
+"""
+
+def analysis_rows(result, jd_text=None, resume_text=None, user_id=None):
+    """
+    Maps an analysis result (see analysis_service.analyze_resume) to rows of the
+    Supabase schema. IDs are generated here, so child rows reference their
+    analysis without waiting for the database to assign one.
+    Returns: (analysis_id, {table: [row, ...]})
+    """
+    analysis_id = str(uuid.uuid4())
+    match = result.get("match") or {}
+    roles = result.get("role_analysis") or []
+    best = roles[0] if roles else {}
+
+    rows = {table: [] for table in TABLES}
+    rows["resume_analysis"].append({
+        "analysis_id": analysis_id,
+        "user_id": user_id,
+        "resume_filename": result.get("file") or "",
+        "job_description_text": jd_text,
+        "overall_score": match.get("overall_score"),
+        "keyword_match_score": match.get("keyword_match"),
+        "semantic_match_score": match.get("semantic_match"),
+        "section_scores": result.get("section_scores"),
+        "matched_skills": [s for skills in (result.get("skills") or {}).values() for s in skills],
+        "missing_skills": best.get("missing_critical_skills", []),
+        "additional_skills": None,
+        "ats_compatibility_score": None,
+        "resume_text": resume_text,
+    })
+    for role in roles:
+        rows["role_scores"].append({
+            "role_score_id": str(uuid.uuid4()),
+            "analysis_id": analysis_id,
+            "role_name": role["role"],
+            "role_score": role["score"],
+            "role_missing_skills": role["missing_critical_skills"],
+            "best_fit_role": role is best,
+        })
+    for rec in result.get("recommendations") or []:
+        rows["recommendations"].append({
+            "recommendation_id": str(uuid.uuid4()),
+            "analysis_id": analysis_id,
+            "recommendation_type": rec["type"],
+            "recommendation_text": rec["text"],
+            "priority": rec["priority"],
+        })
+    if result.get("roadmap"):
+        rows["learning_roadmaps"].append({
+            "roadmap_id": str(uuid.uuid4()),
+            "analysis_id": analysis_id,
+            "role_name": result.get("roadmap_role") or best.get("role"),
+            "roadmap_json": result["roadmap"],
+        })
+    return analysis_id, rows
+
+class SupabaseStore:
+    """
+    Bulk inserts through one shared Supabase client (one HTTP request per table per flush).
+    Inserts are upserts that ignore existing primary keys, so retrying a request whose
+    response was lost does not fail on duplicates.
+    """
+    def __init__(self, client=None):
+        if client is None:
+            from supabase import create_client
+            client = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+        self.client = client
+
+    def insert_many(self, table, rows):
+        self.client.table(table).upsert(
+            rows, on_conflict=PRIMARY_KEYS[table], ignore_duplicates=True
+        ).execute()
+
+class SQLiteStore:
+    """Local stand-in with the same tables (":memory:" for tests). JSON columns are stored as text."""
+    def __init__(self, path=":memory:"):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SQLITE_SCHEMA)
+        self._lock = threading.Lock()
+
+    def _values(self, row):
+        return [
+            json.dumps(value) if key in JSON_COLUMNS and value is not None else value
+            for key, value in row.items()
+        ]
+
+    def insert_many(self, table, rows):
+        """
+        One transaction for all rows (rows of one call must share their columns).
+        Rows whose primary key already exists are skipped, as in SupabaseStore.
+        """
+        if not rows:
+            return
+        columns = list(rows[0].keys())
+        sql = (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+               f"ON CONFLICT ({PRIMARY_KEYS[table]}) DO NOTHING")
+        with self._lock:
+            with self._conn:
+                self._conn.executemany(sql, [self._values(row) for row in rows])
+
+    def count(self, table):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+class WriteBehindWriter:
+    """
+    Write-behind queue in front of a store.
+    1. submit() only enqueues (never blocks a request); if the queue is full the rows are dropped and counted.
+    2. A background thread flushes once batch_size rows are buffered or flush_interval seconds
+       have passed, as one bulk insert per table (parents first).
+    3. Failed flushes are retried with exponential backoff; after max_retries the batch is dropped and counted.
+       Stores skip rows they already have, so a retry after a lost response is safe.
+    4. close() (also registered with atexit) flushes whatever is still buffered; it cuts any
+       backoff in progress short instead of waiting for it.
+    """
+    def __init__(self, store, batch_size=500, flush_interval=1.0, max_queue=10000,
+                 max_retries=5, backoff=0.5):
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._buffer = {table: [] for table in TABLES}
+        self._buffered = 0
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+
+    def submit(self, rows):
+        """Queues {table: [rows]} for the next bulk flush. Returns False if the queue was full."""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(rows)
+            return True
+        except queue.Full:
+            self.dropped += sum(len(r) for r in rows.values())
+            print(f"Error persisting analysis: write-behind queue full, {self.dropped} rows dropped so far")
+            return False
+
+    def _absorb(self, item):
+        """Adds one submitted {table: rows} to the buffer (called with the flush lock held)."""
+        for table, rows in item.items():
+            self._buffer[table].extend(rows)
+            self._buffered += len(rows)
+
+    def _drain(self, timeout):
+        """Moves queued rows into the buffer, waiting at most timeout for the first item."""
+        try:
+            item = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return
+        with self._flush_lock:
+            while True:
+                self._absorb(item)
+                if self._buffered >= self.batch_size:
+                    return
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    return
+
+    def _run(self):
+        deadline = time.monotonic() + self.flush_interval
+        while not self._stop.is_set():
+            self._drain(max(0.0, deadline - time.monotonic()))
+            if self._buffered >= self.batch_size or time.monotonic() >= deadline:
+                self.flush()
+                deadline = time.monotonic() + self.flush_interval
+
+    def flush(self):
+        """
+        Writes everything buffered (and queued) now, one bulk insert per table. Returns rows written.
+        The buffer is taken under the flush lock but written outside it, so a slow or
+        retrying write does not hold up other flushes.
+        """
+        with self._flush_lock:
+            while True:
+                try:
+                    self._absorb(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if not self._buffered:
+                return 0
+            batch, count = self._buffer, self._buffered
+            self._buffer = {table: [] for table in TABLES}
+            self._buffered = 0
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                with metrics.span("persistence_flush"):
+                    self._write(batch)
+                self.flushes += 1
+                return count
+            except Exception as e:
+                metrics.record_error("persistence")
+                if attempt == self.max_retries:
+                    remaining = sum(len(rows) for rows in batch.values())
+                    self.failed += remaining
+                    print(f"Error persisting {remaining} rows after {attempt + 1} attempts: {e}")
+                    return count - remaining
+                # Returns at once when close() is called: shutdown retries without waiting
+                self._stop.wait(self.backoff * (2 ** attempt))
+
+    def _write(self, batch):
+        """One bulk insert per table, parents first. Written tables are emptied, so a retry only re-sends the rest."""
+        for table in TABLES:
+            if batch[table]:
+                self.store.insert_many(table, batch[table])
+                self.written += len(batch[table])
+                batch[table] = []
+
+    def close(self):
+        """Stops the background thread and flushes the rest."""
+        self._stop.set()
+        try:
+            # Wakes the background thread if it is waiting for the first queued item
+            self._queue.put_nowait({})
+        except queue.Full:
+            pass
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "buffered": self._buffered,
+            "written": self.written,
+            "flushes": self.flushes,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+def create_store(backend=None):
+    """
+    Store for Config.PERSISTENCE_BACKEND: supabase, sqlite, auto (Supabase when
+    credentials are set, otherwise SQLite) or off (returns None).
+    """
+    backend = backend or Config.PERSISTENCE_BACKEND
+    if backend == "off":
+        return None
+    if backend == "supabase" or (backend == "auto" and Config.SUPABASE_URL and Config.SUPABASE_KEY):
+        try:
+            return SupabaseStore()
+        except Exception as e:
+            print(f"Error connecting to Supabase, persisting to SQLite instead: {e}")
+    return SQLiteStore(Config.PERSISTENCE_SQLITE_PATH)
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    """Shared write-behind writer (created on first use, None when persistence is off)."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                store = create_store()
+                if store is None:
+                    return None
+                _writer = WriteBehindWriter(
+                    store,
+                    batch_size=Config.PERSISTENCE_BATCH_SIZE,
+                    flush_interval=Config.PERSISTENCE_FLUSH_INTERVAL,
+                    max_queue=Config.PERSISTENCE_QUEUE_SIZE,
+                )
+    return _writer
+
+def writer_stats():
+    """Stats of the shared writer ({} until the first analysis is persisted)."""
+    return _writer.stats() if _writer is not None else {}
+
+def persist_analysis(result, jd_text=None, resume_text=None, user_id=None):
+    """Queues an analysis for write-behind persistence. Returns its analysis_id (None if persistence is off)."""
+    writer = get_writer()
+    if writer is None:
+        return None
+    analysis_id, rows = analysis_rows(result, jd_text, resume_text, user_id)
+    writer.submit(rows)
+    return analysis_id
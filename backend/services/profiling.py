@@ -0,0 +1,305 @@
+"""
+Opt-in sampled profiling of single analyses (CPU with cProfile, memory with tracemalloc).
+
+An analysis is profiled when a random draw falls under Config.PROFILE_SAMPLE_RATE,
+or when the caller forces it (X-Profile request header, if Config.PROFILE_ALLOW_HEADER).
+Each profiled analysis writes one dump directory under Config.PROFILE_DIR:
+- report.json: input hash, stage timings (metrics spans), wall time, peak traced
+  memory, top functions by cumulative time and top allocation sites
+- profile.pstats: the raw cProfile data (open with pstats or snakeviz)
+- input.<ext> / request.json: the uploaded file and form fields, for replay
+  (only with Config.PROFILE_STORE_INPUTS: resumes contain personal data)
+Dumps are rotated oldest-first once the directory exceeds Config.PROFILE_MAX_MB.
+
+Only one analysis is profiled at a time (cProfile and tracemalloc are process-wide);
+a sampled request that finds the profiler busy simply runs unprofiled.
+Unsampled requests pay one random draw.
+
+cProfile and the stage spans only see the profiled thread, so while profiling, work
+normally handed to other threads or processes (encode scheduler, PDF process pool,
+PDF helper thread) runs inline; see run_inline(). tracemalloc cannot be limited to
+one request: the report records how many analyses were in flight
+("concurrency"), and peak memory / allocations are only the request's own when
+max_in_flight is 1.
+
+Replay a dump through the pipeline with profiling on:
+    python -m backend.services.profiling replay <dump_dir> [--jd "..."] [--repeat 3]
+"""
+import argparse
+import contextlib
+import cProfile
+import hashlib
+import io
+import json
+import os
+import pstats
+import random
+import shutil
+import threading
+import time
+import tracemalloc
+from backend.config import Config
+from backend.services.metrics import metrics
+
+TOP_FUNCTIONS = 30
+TOP_ALLOCATIONS = 20
+
+class _ProfiledThread(threading.local):
+    active = False
+
+_thread = _ProfiledThread()
+
+def run_inline():
+    """
+    True while the calling thread is being profiled: callers then do on this thread
+    what they would otherwise hand to a worker thread or process, so it shows up
+    in the profile and the stage timings.
+    """
+    return _thread.active
+
+def _top_functions(profiler, limit=TOP_FUNCTIONS):
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, name), (calls, _, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            "function": f"{os.path.relpath(filename) if os.path.isabs(filename) else filename}:{line}({name})",
+            "calls": calls,
+            "tottime_ms": round(tottime * 1000, 3),
+            "cumtime_ms": round(cumtime * 1000, 3),
+        })
+    rows.sort(key=lambda row: row["cumtime_ms"], reverse=True)
+    return rows[:limit]
+
+def _top_allocations(snapshot, limit=TOP_ALLOCATIONS):
+    return [
+        {"site": str(stat.traceback), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:limit]
+    ]
+
+def _stage_timings(spans):
+    """Sums repeated spans of the same stage: {stage: {"calls", "total_ms"}}."""
+    timings = {}
+    for stage, seconds in spans:
+        entry = timings.setdefault(stage, {"calls": 0, "total_ms": 0.0})
+        entry["calls"] += 1
+        entry["total_ms"] = round(entry["total_ms"] + seconds * 1000, 3)
+    return timings
+
+class Profiler:
+    def __init__(self, directory=None, sample_rate=None, max_bytes=None, store_inputs=None):
+        self.directory = directory or Config.PROFILE_DIR
+        self.sample_rate = Config.PROFILE_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.max_bytes = Config.PROFILE_MAX_MB * 1024 * 1024 if max_bytes is None else max_bytes
+        self.store_inputs = Config.PROFILE_STORE_INPUTS if store_inputs is None else store_inputs
+        self._busy = threading.Lock()
+        # Analyses currently inside maybe_profile, and the most seen during the current profile
+        self._flight_lock = threading.Lock()
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self.profiled = 0
+        self.skipped_busy = 0
+
+    def should_profile(self, forced=False):
+        return forced or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    @contextlib.contextmanager
+    def maybe_profile(self, file_bytes, filename, forced=False, **fields):
+        """
+        Profiles the enclosed block if sampled (or forced). Yields the dump
+        directory it will write, or None when this run is not profiled.
+        fields: request fields stored for replay (jd_text, target_role).
+        """
+        with self._flight_lock:
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+        try:
+            if not self.should_profile(forced):
+                yield None
+                return
+            if not self._busy.acquire(blocking=False):
+                self.skipped_busy += 1
+                yield None
+                return
+            try:
+                with self._profile(file_bytes, filename, fields) as dump_dir:
+                    yield dump_dir
+            finally:
+                self._busy.release()
+        finally:
+            with self._flight_lock:
+                self._in_flight -= 1
+
+    @contextlib.contextmanager
+    def _profile(self, file_bytes, filename, fields):
+        digest = hashlib.sha256(file_bytes).hexdigest()
+        dump_dir = os.path.join(
+            self.directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{digest[:12]}"
+        )
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        with self._flight_lock:
+            in_flight_at_start = self._max_in_flight = self._in_flight
+        profiler = cProfile.Profile()
+        error = None
+        start = time.perf_counter()
+        _thread.active = True
+        try:
+            with metrics.trace() as spans:
+                profiler.enable()
+                try:
+                    yield dump_dir
+                finally:
+                    profiler.disable()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _thread.active = False
+            wall = time.perf_counter() - start
+            with self._flight_lock:
+                max_in_flight = self._max_in_flight
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            ])
+            if started_tracing:
+                tracemalloc.stop()
+            report = {
+                "input_sha256": digest,
+                "filename": filename,
+                "input_bytes": len(file_bytes),
+                "created_at": time.strftime('%Y-%m-%dT%H:%M:%S'),
+                "wall_ms": round(wall * 1000, 3),
+                "peak_memory_kb": round(peak / 1024, 1),
+                # Memory figures are process-wide: other analyses contribute unless max_in_flight is 1
+                "concurrency": {"in_flight_at_start": in_flight_at_start, "max_in_flight": max_in_flight},
+                "error": error,
+                "stages": _stage_timings(spans),
+                "top_functions": _top_functions(profiler),
+                "top_allocations": _top_allocations(snapshot),
+            }
+            try:
+                self._write(dump_dir, report, profiler, file_bytes, filename, fields)
+                self.profiled += 1
+                self._rotate()
+            except Exception as e:
+                print(f"Error writing profile {dump_dir}: {e}")
+
+    def _write(self, dump_dir, report, profiler, file_bytes, filename, fields):
+        os.makedirs(dump_dir, exist_ok=True)
+        profiler.dump_stats(os.path.join(dump_dir, "profile.pstats"))
+        if self.store_inputs:
+            _, extension = os.path.splitext(filename)
+            with open(os.path.join(dump_dir, f"input{extension.lower()}"), 'wb') as f:
+                f.write(file_bytes)
+            with open(os.path.join(dump_dir, "request.json"), 'w', encoding='utf-8') as f:
+                json.dump(dict(fields, filename=filename), f, indent=2)
+        with open(os.path.join(dump_dir, "report.json"), 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    def dumps(self):
+        """Dump directories, oldest first."""
+        if not os.path.isdir(self.directory):
+            return []
+        paths = [os.path.join(self.directory, name) for name in os.listdir(self.directory)]
+        return sorted((p for p in paths if os.path.isdir(p)), key=os.path.getmtime)
+
+    def _rotate(self):
+        """Deletes the oldest dumps until the directory fits in max_bytes (the newest is always kept)."""
+        dumps = self.dumps()
+        sizes = {
+            path: sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+            for path in dumps
+        }
+        total = sum(sizes.values())
+        for path in dumps[:-1]:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= sizes[path]
+
+    def stats(self):
+        return {"sample_rate": self.sample_rate, "profiled": self.profiled, "skipped_busy": self.skipped_busy}
+
+# Shared by the analysis workers
+profiler = Profiler()
+
+def replay(dump_dir, jd_text=None, target_role=None, output_dir=None, repeat=1):
+    """
+    Runs a stored input through the analysis pipeline again (analysis_service._analyze,
+    the code a request runs) with profiling forced on. Each run gets an empty in-memory
+    resume cache and duplicate index, so parsing, the near-duplicate lookup and skill
+    extraction are measured; nothing is persisted.
+    Returns the report of the last run. Raises FileNotFoundError if the dump has no
+    stored input (it was written without Config.PROFILE_STORE_INPUTS).
+    """
+    from backend.services.analysis_service import _analyze
+    from backend.services.dedup import DuplicateDetector
+    from backend.services.nlp_processor import nlp_processor
+    from backend.services.resume_cache import ResumeCache
+
+    request_path = os.path.join(dump_dir, "request.json")
+    if not os.path.exists(request_path):
+        raise FileNotFoundError(f"{dump_dir} has no stored input (profile written without PROFILE_STORE_INPUTS=1)")
+    with open(request_path, 'r', encoding='utf-8') as f:
+        request = json.load(f)
+    filename = request["filename"]
+    _, extension = os.path.splitext(filename)
+    input_path = os.path.join(dump_dir, f"input{extension.lower()}")
+    if not os.path.exists(input_path):
+        raise FileNotFoundError(f"{dump_dir} is missing its input file {os.path.basename(input_path)}")
+    with open(input_path, 'rb') as f:
+        file_bytes = f.read()
+    jd_text = jd_text if jd_text is not None else request.get("jd_text")
+    target_role = target_role if target_role is not None else request.get("target_role")
+
+    def prepare_run():
+        # Fresh caches, built outside the profiled block; returns the analysis to call
+        nlp_processor.clear_cache()
+        cache = ResumeCache(path=":memory:", detector=DuplicateDetector(path="") if Config.DEDUP_ENABLED else None)
+        return lambda: _analyze(file_bytes, filename, jd_text, target_role, cache=cache, persist=False)
+
+    # One unprofiled run loads the models, the keyword index and lazily imported modules
+    prepare_run()()
+
+    # Kept apart from PROFILE_DIR, so replays are never rotated out by production dumps (or vice versa)
+    replayer = Profiler(output_dir or Config.PROFILE_DIR.rstrip(os.sep) + "-replays", store_inputs=False)
+    for _ in range(repeat):
+        analyze = prepare_run()
+        with replayer.maybe_profile(file_bytes, filename, forced=True) as run_dir:
+            analyze()
+    with open(os.path.join(run_dir, "report.json"), 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    report["dump_dir"] = run_dir
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    replay_parser = commands.add_parser("replay", help="Re-run a stored input with profiling on")
+    replay_parser.add_argument("dump_dir")
+    replay_parser.add_argument("--jd", help="Job description (default: the stored one)")
+    replay_parser.add_argument("--target-role", help="Target role (default: the stored one)")
+    replay_parser.add_argument("--output", help="Directory for the replay dumps")
+    replay_parser.add_argument("--repeat", type=int, default=1, help="Runs; the last one is reported")
+    replay_parser.add_argument("--top", type=int, default=15, help="Functions to print")
+    args = parser.parse_args()
+
+    try:
+        report = replay(args.dump_dir, args.jd, args.target_role, args.output, args.repeat)
+    except FileNotFoundError as e:
+        parser.exit(1, f"Cannot replay: {e}\n")
+    print(json.dumps({
+        "dump_dir": report["dump_dir"],
+        "input_sha256": report["input_sha256"],
+        "wall_ms": report["wall_ms"],
+        "peak_memory_kb": report["peak_memory_kb"],
+        "stages": report["stages"],
+        "top_functions": report["top_functions"][:args.top],
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
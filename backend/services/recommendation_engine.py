@@ -1,24 +1,138 @@
-import json
-import os
+import numpy as np
+from backend.services.knowledge_base import knowledge_base
+from backend.services.metrics import metrics
+
+class SkillGapSimulator:
+    """
+    "What-if" role scores for a candidate's skill set.
+    Starts from one full scoring pass, then adding or removing a skill only touches
+    the roles that skill contributes to (via the skill -> role inverted index).
+    """
+    def __init__(self, compiled, extracted_skills):
+        self.compiled = compiled
+        self.skill_vector = compiled.skill_vector(extracted_skills)
+        self.raw_scores = compiled.weights @ self.skill_vector
+
+    def has_skill(self, skill_id):
+        return self.skill_vector[skill_id] > 0
+
+    def _apply(self, skill_id, sign):
+        roles, weights = self.compiled.roles_for_skill(skill_id)
+        self.raw_scores[roles] += sign * weights
+        self.skill_vector[skill_id] = 1.0 if sign > 0 else 0.0
+
+    def add_skill(self, skill):
+        """Adds a skill (name) and updates only the roles it touches. Returns False if unknown or held."""
+        skill_id = self.compiled.skill_ids.get(skill.lower())
+        if skill_id is None or self.has_skill(skill_id):
+            return False
+        self._apply(skill_id, +1)
+        return True
+
+    def remove_skill(self, skill):
+        skill_id = self.compiled.skill_ids.get(skill.lower())
+        if skill_id is None or not self.has_skill(skill_id):
+            return False
+        self._apply(skill_id, -1)
+        return True
+
+    def percentages(self):
+        return (self.raw_scores / self.compiled.max_scores) * 100
+
+    def impact(self, skill_id, role_weights):
+        """Percentage points the skill would add to each role, weighted by role_weights and summed."""
+        roles, weights = self.compiled.roles_for_skill(skill_id)
+        return float(np.sum(role_weights[roles] * weights / self.compiled.max_scores[roles]) * 100)
+
+    def next_best_skills(self, count=3, focus=3, target_role=None):
+        """
+        Greedily picks the skills that raise the candidate's best role scores the most.
+        Each step scores only the missing skills of the focus roles (the current top
+        `focus` roles, or just target_role) through the inverted index, applies the
+        winner incrementally and re-ranks. A skill's impact is the percentage points it
+        adds to each focus role, weighted by how strong that role already is, so gaps in
+        the best-fit role count the most. Within a step impacts are additive, so the
+        greedy pick is also the best pair/triple for a fixed set of focus roles.
+        Returns: list of dicts with skill, impact and the per-role score changes.
+        """
+        compiled = self.compiled
+        role_count = len(compiled.role_names)
+        if role_count == 0:
+            return []
+
+        target_index = None
+        if target_role is not None:
+            if target_role not in compiled.role_names:
+                return []
+            target_index = compiled.role_names.index(target_role)
+
+        picks = []
+        for _ in range(count):
+            percentages = self.percentages()
+            if target_index is not None:
+                focus_indices = np.array([target_index])
+            else:
+                focus_indices = compiled.ranked(np.round(percentages, 1), min(focus, role_count))
+            role_weights = np.zeros(role_count)
+            focus_scores = percentages[focus_indices]
+            if focus_scores.sum() > 0:
+                role_weights[focus_indices] = focus_scores / focus_scores.sum()
+            else:
+                role_weights[focus_indices] = 1.0 / len(focus_indices)
+
+            # Candidate skills: anything the focus roles ask for that is still missing
+            candidates = np.unique(compiled.weights[focus_indices].indices)
+            candidates = [int(c) for c in candidates if not self.has_skill(c)]
+            if not candidates:
+                break
+
+            # Ties go to the skill that helps the most roles overall
+            uniform = np.ones(role_count)
+            best = max(candidates, key=lambda c: (self.impact(c, role_weights), self.impact(c, uniform), -c))
+            best_impact = self.impact(best, role_weights)
+            if best_impact <= 0:
+                break
+
+            roles, _ = compiled.roles_for_skill(best)
+            before = percentages[roles]
+            self._apply(best, +1)
+            after = self.percentages()[roles]
+            changes = sorted(
+                (
+                    {"role": compiled.role_names[r], "from": round(float(b), 1), "to": round(float(a), 1)}
+                    for r, b, a in zip(roles, before, after)
+                ),
+                key=lambda change: change["to"], reverse=True
+            )
+            picks.append({
+                "skill": compiled.skill_names[best],
+                "impact": round(best_impact, 2),
+                "roles": changes,
+            })
+        return picks
 
 class RecommendationEngine:
-    def __init__(self):
-        self.roadmaps = self._load_roadmaps()
+    def __init__(self, kb=None):
+        # Roadmaps and compiled roles come from the current knowledge-base snapshot
+        self.kb = kb or knowledge_base
 
-    def _load_roadmaps(self):
-        try:
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            file_path = os.path.join(base_dir, 'data', 'learning_roadmaps.json')
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading roadmaps: {e}")
-            return {}
+    @property
+    def roadmaps(self):
+        return self.kb.current().roadmaps
+
+    def what_if(self, extracted_skills, snapshot=None):
+        """Returns a SkillGapSimulator for incremental 'what if I learn X' scoring."""
+        return SkillGapSimulator((snapshot or self.kb.current()).roles, extracted_skills)
 
-    def generate_recommendations(self, role_analysis, target_role_name=None):
+    def next_best_skills(self, extracted_skills, count=3, focus=3, target_role=None, snapshot=None):
+        """Ranked highest-impact next skills to learn (see SkillGapSimulator.next_best_skills)."""
+        return self.what_if(extracted_skills, snapshot).next_best_skills(count, focus, target_role)
+
+    @metrics.timed("recommendations")
+    def generate_recommendations(self, role_analysis, target_role_name=None, extracted_skills=None, snapshot=None):
         """
         Generates advice based on the best fit role or a specific target role.
+        If extracted_skills is given, also suggests the highest-impact next skills.
         """
         if not role_analysis:
             return []
@@ -43,7 +157,23 @@ class RecommendationEngine:
                 "priority": "High"
             })
             
-        # 2. General Score Advice
+        # 2. Highest-impact next skills (across the best roles, or the target role)
+        if extracted_skills is not None:
+            picks = self.next_best_skills(
+                extracted_skills, count=2, target_role=target_role_name, snapshot=snapshot
+            )
+            for pick in picks:
+                # Quote the change for the target role (a shared skill may help others more)
+                by_role = {change["role"]: change for change in pick["roles"]}
+                best_change = by_role.get(target['role']) or pick["roles"][0]
+                recommendations.append({
+                    "type": "High-Impact Skill",
+                    "text": f"Learning {pick['skill']} would raise your {best_change['role']} match "
+                            f"from {best_change['from']}% to {best_change['to']}%.",
+                    "priority": "High"
+                })
+
+        # 3. General Score Advice
         score = target['score']
         if score < 50:
             recommendations.append({
@@ -60,10 +190,14 @@ class RecommendationEngine:
 
         return recommendations
 
-    def get_roadmap(self, role_name):
+    def get_roadmap(self, role_name, snapshot=None):
         """
-        Returns the learning roadmap for a specific role.
+        Returns the learning roadmap for a specific role (role names are case-insensitive).
         """
-        return self.roadmaps.get(role_name, [])
+        snapshot = snapshot or self.kb.current()
+        roadmap = snapshot.roadmaps.get(role_name)
+        if roadmap is None:
+            roadmap = snapshot.roadmap_index.get(role_name.lower(), [])
+        return roadmap
 
 recommendation_engine = RecommendationEngine()
@@ -0,0 +1,263 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from backend.config import Config
+from backend.services.resume_parser import (
+    parse_resume, parse_resume_bytes, clean_text, segment_sections, PARSER_VERSION
+)
+from backend.services.nlp_processor import nlp_processor
+from backend.services.skill_extractor import skill_extractor
+from backend.services.knowledge_base import knowledge_base
+from backend.services.dedup import duplicate_detector, text_diff, map_span
+
+class ResumeCache:
+    """
+    Content-addressed cache of parsed resumes.
+    Key: SHA-256 of the file bytes + parser version + skills database version.
+    Value: cleaned text, extracted skills and entities, and the section spans with
+    the skills found in each (JSON in a local SQLite table).
+    Entries expire after a TTL, and the least recently used ones are evicted once
+    the store grows past its size limit. Editing skills_database.json changes the
+    key, and stale entries are purged on the next lookup.
+    A new file that is a near duplicate of a cached one (same resume, trivial edits)
+    reuses that entry's skills and entities and only analyses the changed words.
+    """
+    def __init__(self, path=None, ttl_hours=None, max_mb=None, detector=None):
+        self.path = path or Config.RESUME_CACHE_PATH
+        self.ttl_seconds = (Config.RESUME_CACHE_TTL_HOURS if ttl_hours is None else ttl_hours) * 3600
+        self.max_bytes = (Config.RESUME_CACHE_MAX_MB if max_mb is None else max_mb) * 1024 * 1024
+
+        self.hits = 0
+        self.misses = 0
+        self.near_duplicates = 0
+        self.detector = detector if detector is not None else (duplicate_detector if Config.DEDUP_ENABLED else None)
+        self._skills_version = None
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS resume_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    skills_version TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_resume_cache_accessed ON resume_cache (accessed_at)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def current_snapshot(self):
+        """
+        Picks up edits to the knowledge base and purges entries built with an older
+        skills database. Returns the snapshot the lookup and extraction should use
+        (callers pass it on to load_resume so their whole analysis uses one snapshot).
+        """
+        knowledge_base.refresh()
+        snapshot = knowledge_base.current()
+        version = snapshot.skills_version
+        if version != self._skills_version:
+            with self._lock:
+                conn = self._connect()
+                stale = conn.execute(
+                    "SELECT cache_key FROM resume_cache WHERE skills_version != ?", (version,)
+                ).fetchall()
+                self._delete(conn, [row[0] for row in stale])
+                conn.commit()
+            self._skills_version = version
+        return snapshot
+
+    def make_key(self, file_bytes, skills_version):
+        return self._key(hashlib.sha256(file_bytes).hexdigest(), skills_version)
+
+    def _key(self, digest, skills_version):
+        return f"{digest}:{PARSER_VERSION}:{skills_version}"
+
+    def get(self, key, count=True):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT payload, created_at FROM resume_cache WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl_seconds:
+                if row is not None:
+                    self._delete(conn, [key])
+                    conn.commit()
+                if count:
+                    self.misses += 1
+                return None
+            conn.execute("UPDATE resume_cache SET accessed_at = ? WHERE cache_key = ?", (now, key))
+            conn.commit()
+            if count:
+                self.hits += 1
+
+        payload = json.loads(row[0])
+        payload["entities"] = [tuple(ent) for ent in payload["entities"]]
+        return payload
+
+    def put(self, key, skills_version, payload):
+        data = json.dumps(payload)
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO resume_cache VALUES (?, ?, ?, ?, ?, ?)",
+                (key, skills_version, data, len(data), now, now)
+            )
+            self._evict(conn, now)
+            conn.commit()
+
+    def _evict(self, conn, now):
+        """Drops expired entries, then least recently used ones down to 90% of the size limit."""
+        expired = conn.execute(
+            "SELECT cache_key FROM resume_cache WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).fetchall()
+        self._delete(conn, [row[0] for row in expired])
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM resume_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = self.max_bytes * 0.9
+        rows = conn.execute("SELECT cache_key, size FROM resume_cache ORDER BY accessed_at").fetchall()
+        stale = []
+        for key, size in rows:
+            if total <= target:
+                break
+            stale.append(key)
+            total -= size
+        self._delete(conn, stale)
+
+    def _delete(self, conn, keys):
+        """Deletes entries, and drops resumes left without any entry from the duplicate index."""
+        if not keys:
+            return
+        conn.executemany("DELETE FROM resume_cache WHERE cache_key = ?", [(key,) for key in keys])
+        if self.detector is None:
+            return
+        for digest in {key.split(":", 1)[0] for key in keys}:
+            # Keys are "<digest>:<parser version>:<skills version>"; ";" sorts right after ":"
+            left = conn.execute(
+                "SELECT 1 FROM resume_cache WHERE cache_key > ? AND cache_key < ? LIMIT 1",
+                (digest + ":", digest + ";")
+            ).fetchone()
+            if left is None:
+                self.detector.remove(digest)
+
+    def load_resume(self, file_path, snapshot=None):
+        """
+        Parses a resume and extracts its features, or serves them from the cache.
+        Returns: dict with "text", "skills", "entities", "sections" (see resume_parser.Section.to_dict),
+        "kb_version" (knowledge base used for the skills) and "cached" (True on a hit),
+        or None if the file could not be parsed.
+        snapshot: knowledge-base snapshot from current_snapshot() (taken here if not given).
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"File not found: {file_path}")
+        with open(file_path, 'rb') as f:
+            file_bytes = f.read()
+        return self._load(file_bytes, lambda: parse_resume(file_path, raw=True), snapshot)
+
+    def load_resume_bytes(self, file_bytes, filename, snapshot=None):
+        """Same as load_resume for an in-memory upload."""
+        return self._load(file_bytes, lambda: parse_resume_bytes(file_bytes, filename, raw=True), snapshot)
+
+    def _load(self, file_bytes, parse, snapshot=None):
+        snapshot = snapshot or self.current_snapshot()
+        skills_version = snapshot.skills_version
+        key = self.make_key(file_bytes, skills_version)
+        cached = self.get(key)
+        if cached is not None:
+            cached.setdefault("kb_version", snapshot.version)
+            cached["cached"] = True
+            return cached
+
+        # Sections are found on the raw line structure, then everything works on the cleaned text
+        raw_text = parse()
+        text = clean_text(raw_text)
+        if not text:
+            return None
+        sections = segment_sections(raw_text)
+
+        payload = None
+        if self.detector is not None:
+            digest = key.split(":", 1)[0]
+            signature = self.detector.signature(text)
+            match = self.detector.find(signature, exclude=digest)
+            if match is not None:
+                prior = self.get(self._key(match[0], skills_version), count=False)
+                if prior is not None:
+                    payload = self._from_near_duplicate(text, sections, prior, match, snapshot)
+            self.detector.add(digest, signature)
+
+        if payload is None:
+            # One spaCy parse serves both the entities and the skill extractor's tokens
+            analysis = nlp_processor.analyze(text)
+            payload = {
+                "text": text,
+                "skills": skill_extractor.extract_skills(text, snapshot, sections),
+                "entities": [tuple(ent) for ent in analysis.entities],
+                "sections": [section.to_dict() for section in sections],
+                "kb_version": snapshot.version,
+            }
+        self.put(key, skills_version, payload)
+        payload["cached"] = False
+        return payload
+
+    def _from_near_duplicate(self, text, sections, prior, match, snapshot):
+        """
+        Builds the payload of a near duplicate from the prior entry: only the words
+        added since are run through spaCy. Prior entities move with the diff alignment
+        and are dropped if an edit touched them; NER runs again on the added spans.
+        near_duplicate records how far the two differ, but not which upload it was
+        derived from (that belongs to another caller).
+        """
+        self.near_duplicates += 1
+        prior_text = prior["text"]
+        diff = text_diff(prior_text, text)
+        added_text = " ".join(diff["added"])
+
+        entities = []
+        for ent_text, label, start, end in prior["entities"]:
+            span = map_span(diff, prior_text, text, start, end)
+            if span is not None:
+                entities.append((ent_text, label) + span)
+        for start, end in diff["added_spans"]:
+            for ent_text, label, ent_start, ent_end in nlp_processor.analyze(text[start:end], ("entities",)).entities:
+                entities.append((ent_text, label, start + ent_start, start + ent_end))
+        entities.sort(key=lambda ent: ent[2])
+
+        return {
+            "text": text,
+            "skills": skill_extractor.update_skills(text, prior["skills"], added_text, snapshot, sections),
+            "entities": entities,
+            "sections": [section.to_dict() for section in sections],
+            "kb_version": snapshot.version,
+            "near_duplicate": {
+                "similarity": round(match[1], 3),
+                "added_words": sum(len(s.split()) for s in diff["added"]),
+                "removed_words": sum(len(s.split()) for s in diff["removed"]),
+            },
+        }
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "near_duplicates": self.near_duplicates,
+        }
+
+resume_cache = ResumeCache()
@@ -1,7 +1,50 @@
 import os
 import pdfplumber
 import docx
+from PyPDF2 import PdfReader
 import re
+import math
+import time
+import threading
+import tempfile
+import multiprocessing
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, wait
+from backend.config import Config
+from backend.services.metrics import metrics
+from backend.services.profiling import run_inline
+
+# Bump whenever extraction output changes, so cached parse results are invalidated
+PARSER_VERSION = "4"
+
+# Quality thresholds for the fast (PyPDF2) tier
+FAST_TIER_MIN_CHARS = 40
+FAST_TIER_MAX_AVG_WORD_LEN = 15
+FAST_TIER_MAX_SINGLE_CHAR_RATIO = 0.4
+FAST_TIER_MAX_GAPPED_LINE_RATIO = 0.3
+
+# Canonical section -> heading phrases, longest first when matched
+SECTION_HEADINGS = {
+    "summary": ["Professional Summary", "Career Objective", "Summary", "Profile", "Objective", "About Me"],
+    "experience": ["Professional Experience", "Work Experience", "Employment History", "Work History",
+                   "Experience", "Employment"],
+    "education": ["Academic Background", "Education"],
+    "skills": ["Technical Skills", "Core Competencies", "Key Skills", "Tech Stack", "Skills", "Technologies"],
+    "projects": ["Personal Projects", "Academic Projects", "Key Projects", "Projects"],
+    "certifications": ["Licenses and Certifications", "Certifications", "Certificates"],
+}
+_HEADING_NAMES = {phrase.lower(): name for name, phrases in SECTION_HEADINGS.items() for phrase in phrases}
+# A heading is a line of its own ("EXPERIENCE", "Skills:"), or starts a line followed by a colon
+# ("Skills: Python, SQL"); any other use of the words is part of a sentence or a name
+_HEADING_LINE = re.compile(
+    r'[ \t]*(' + '|'.join(re.escape(p) for p in sorted(_HEADING_NAMES, key=len, reverse=True)) + r')'
+    r'[ \t]*(?::.*)?',
+    re.IGNORECASE,
+)
+
+# Shared process pool for large PDFs (created on first use)
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
 
 def clean_text(text):
     """
@@ -19,23 +62,351 @@ def clean_text(text):
     
     return text
 
-def parse_pdf(file_path):
+class Section:
+    """A titled part of a resume: canonical name and character offsets into the cleaned text
+    (clean_text of the raw text it was segmented from)."""
+    __slots__ = ("name", "start", "end", "skills")
+
+    def __init__(self, name, start, end):
+        self.name = name
+        self.start = start
+        self.end = end
+        # Filled by skill_extractor.extract_skills(text, sections=...)
+        self.skills = []
+
+    def to_dict(self):
+        return {"name": self.name, "start": self.start, "end": self.end, "skills": self.skills}
+
+    def __repr__(self):
+        return f"Section({self.name}, {self.start}:{self.end})"
+
+def _find_headings(raw_text):
+    """
+    Yields (raw offset, section name) for each heading line: a recognised phrase in
+    Title Case or UPPER case, alone on its line or followed by a colon. Only the first
+    heading of each section counts; a repeated one stays inside the section it is in.
+    """
+    seen = set()
+    for line in re.finditer(r'[^\r\n]+', raw_text):
+        match = _HEADING_LINE.fullmatch(line.group())
+        if match is None:
+            continue
+        phrase = match.group(1)
+        if not all(word[0].isupper() for word in phrase.split() if word.lower() not in ("and", "&")):
+            continue
+        name = _HEADING_NAMES[phrase.lower()]
+        if name not in seen:
+            seen.add(name)
+            yield line.start() + match.start(1), name
+
+def segment_sections(raw_text):
+    """
+    Splits a resume into sections at recognised headings (Experience, Education,
+    Skills, Projects, Summary, Certifications). Takes the raw extracted text
+    (parse_resume(..., raw=True)), since headings are told apart from the same
+    words in sentences and names by the line they sit on.
+    Returns a list of Section covering clean_text(raw_text) in order: the text before
+    the first heading (name, contact details) is a "header" section, and each
+    section runs from its heading to the next one. Empty if no heading is found.
+    """
+    if not raw_text:
+        return []
+    headings = list(_find_headings(raw_text))
+    if not headings:
+        return []
+
+    # Map the raw offsets into the cleaned text; each heading starts on a non-space
+    # character, so the whitespace runs collapse the same way in each chunk
+    starts, offset, previous = [], 0, 0
+    for position, name in headings:
+        chunk = re.sub(r'\s+', ' ', raw_text[previous:position])
+        offset += len(chunk if previous else chunk.lstrip())
+        starts.append((offset, name))
+        previous = position
+    length = len(clean_text(raw_text))
+
+    sections = []
+    if starts[0][0] > 0:
+        sections.append(Section("header", 0, starts[0][0]))
+    for (start, name), following in zip(starts, starts[1:] + [(length, None)]):
+        sections.append(Section(name, start, following[0]))
+    return sections
+
+def section_at(starts, offset):
+    """Index of the section containing offset, given the sorted section start offsets."""
+    return max(0, bisect_right(starts, offset) - 1)
+
+def fast_text_is_usable(text):
+    """
+    Quality heuristics for text from the fast tier. Returns False when the page
+    should be re-extracted with pdfplumber's layout analysis:
+    - too little text (scanned page, text drawn as shapes, odd encodings)
+    - broken word spacing (words glued together, or spaced out letter by letter)
+    - column interleaving (lines made of fragments separated by wide gaps)
+    """
+    stripped = text.strip() if text else ""
+    if len(stripped) < FAST_TIER_MIN_CHARS or '\ufffd' in stripped or '(cid:' in stripped:
+        return False
+
+    words = stripped.split()
+    avg_word_len = sum(len(w) for w in words) / len(words)
+    if avg_word_len > FAST_TIER_MAX_AVG_WORD_LEN:
+        return False
+    single_chars = sum(1 for w in words if len(w) == 1 and w.isalpha())
+    if single_chars / len(words) > FAST_TIER_MAX_SINGLE_CHAR_RATIO:
+        return False
+
+    lines = [line for line in stripped.splitlines() if line.strip()]
+    gapped = sum(1 for line in lines if re.search(r'\S {4,}\S', line))
+    if lines and gapped / len(lines) > FAST_TIER_MAX_GAPPED_LINE_RATIO:
+        return False
+
+    return True
+
+class PdfDocument:
     """
-    Extracts text from a PDF file using pdfplumber.
+    One open PDF, parsed once for both the page count and the page texts.
+    reader: the PyPDF2 reader of the fast tier (tiered extraction only);
+    plumber: the pdfplumber document of the layout tier, opened on first use.
     """
-    text_content = []
+    def __init__(self, file_path, tiered=None):
+        tiered = Config.PDF_TIERED_EXTRACTION if tiered is None else tiered
+        self.file_path = file_path
+        self.reader = PdfReader(file_path) if tiered else None
+        self._plumber = None
+        self.page_count = len(self.reader.pages) if self.reader is not None else len(self.plumber.pages)
+
+    @property
+    def plumber(self):
+        if self._plumber is None:
+            self._plumber = pdfplumber.open(self.file_path)
+        return self._plumber
+
+    def close(self):
+        if self._plumber is not None:
+            self._plumber.close()
+            self._plumber = None
+
+def iter_pdf_pages(file_path, start=0, stop=None, tiered=None, document=None):
+    """
+    Streams (page_number, text, tier) one page at a time.
+    With tiered extraction (Config.PDF_TIERED_EXTRACTION), each page is first read with
+    PyPDF2's cheap text-stream extraction ("fast" tier) and only re-extracted with
+    pdfplumber's layout analysis ("layout" tier) when fast_text_is_usable() rejects it.
+    Each page's layout objects are released before moving on, so memory
+    does not grow with the document.
+    document: an already open PdfDocument of file_path (left open), instead of opening it here.
+    """
+    owned = document is None
+    if owned:
+        document = PdfDocument(file_path, tiered)
+    reader = document.reader
     try:
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
+        stop = document.page_count if stop is None else min(stop, document.page_count)
+
+        for page_number in range(start, stop):
+            if reader is not None:
+                try:
+                    fast_text = reader.pages[page_number].extract_text() or ""
+                except Exception:
+                    fast_text = ""
+                if fast_text_is_usable(fast_text):
+                    yield page_number, fast_text, "fast"
+                    continue
+
+            page = document.plumber.pages[page_number]
+            try:
                 # extract_text() handles layout analysis fairly well
-                page_text = page.extract_text()
-                if page_text:
-                    text_content.append(page_text)
-        
-        return "\n".join(text_content)
+                yield page_number, page.extract_text() or "", "layout"
+            finally:
+                page.close()
+    finally:
+        if owned:
+            document.close()
+
+def _extract_page_range(file_path, start, stop, stop_at=None):
+    """
+    Worker task: extracts a contiguous range of pages (runs in the process pool).
+    Stops between pages once the wall-clock time stop_at has passed, so a request
+    that timed out releases its worker without the worker being killed.
+    """
+    pages = []
+    for page in iter_pdf_pages(file_path, start, stop):
+        pages.append(page)
+        if stop_at and time.time() > stop_at:
+            break
+    return pages
+
+def _get_pdf_pool():
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # Never fork: this process runs several threads (encode worker, persistence
+            # writer, job queue) and may hold torch's locks, which a forked child would
+            # inherit in whatever state they were in
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _pdf_pool = ProcessPoolExecutor(max_workers=Config.PDF_WORKERS, mp_context=context)
+        return _pdf_pool
+
+def _extract_pages_parallel(file_path, page_limit, deadline):
+    """
+    Splits the pages into ranges and extracts them in the process pool.
+    Returns: ({page_number: (text, tier)}, timed_out)
+    """
+    workers = max(1, Config.PDF_WORKERS)
+    # A few ranges per worker keeps the pool busy when pages differ in cost
+    range_size = max(1, math.ceil(page_limit / (workers * 2)))
+    timeout = max(0.0, deadline - time.monotonic()) if deadline else None
+    # Workers run in other processes, so they get the deadline as wall-clock time
+    stop_at = time.time() + timeout if deadline else None
+    pool = _get_pdf_pool()
+    futures = [
+        pool.submit(_extract_page_range, file_path, start, min(start + range_size, page_limit), stop_at)
+        for start in range(0, page_limit, range_size)
+    ]
+
+    done, not_done = wait(futures, timeout=timeout)
+    # Only this request's work is cancelled: queued ranges are dropped and running ones
+    # stop at their next page; the shared workers keep serving other requests
+    for future in not_done:
+        future.cancel()
+
+    pages = {}
+    for future in done:
+        for page_number, page_text, tier in future.result():
+            pages[page_number] = (page_text, tier)
+    return pages, len(pages) < page_limit
+
+def _extract_pages_sequential(document, page_limit, deadline):
+    """
+    Streams the pages of an open PdfDocument on a helper thread, so one slow page
+    cannot hold the request past its deadline. On timeout the thread is told to stop
+    and finishes the page it is on in the background; the pages read so far are returned.
+    Takes ownership of document: it is closed once the last page has been read.
+    Returns: ([(page_number, text, tier)], timed_out)
+    """
+    file_path = document.file_path
+    if not deadline or run_inline():
+        # No deadline, or profiled: stay on this thread, checking the deadline between pages
+        pages = []
+        try:
+            for page in iter_pdf_pages(file_path, 0, page_limit, document=document):
+                pages.append(page)
+                if deadline and time.monotonic() > deadline and len(pages) < page_limit:
+                    return pages, True
+        finally:
+            document.close()
+        return pages, False
+
+    pages, errors = [], []
+    stop, finished = threading.Event(), threading.Event()
+
+    def extract():
+        try:
+            for page in iter_pdf_pages(file_path, 0, page_limit, document=document):
+                if stop.is_set():
+                    break
+                pages.append(page)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            # Closed here rather than by the request, which may have stopped waiting
+            document.close()
+            finished.set()
+
+    threading.Thread(target=extract, name="pdf-extract", daemon=True).start()
+    timed_out = not finished.wait(max(0.0, deadline - time.monotonic()))
+    stop.set()
+    if errors and not timed_out:
+        raise errors[0]
+    return list(pages), timed_out
+
+def parse_pdf_detailed(file_path, max_pages=None, max_bytes=None, time_budget=None, parallel=True):
+    """
+    Extracts text from a PDF file (tiered PyPDF2 / pdfplumber), within limits.
+    max_pages / max_bytes / time_budget default to the values in Config (0 disables a limit).
+    Large PDFs are extracted in parallel by a process pool (set parallel=False to disable);
+    smaller ones stream page by page on a helper thread. Either way the request returns
+    at the time budget with the pages read so far.
+    Returns: dict with
+    - text: extracted text (partial if truncated), or None on error
+    - truncated: True if a limit cut the extraction short
+    - reason: "max_pages", "max_bytes" or "time_budget" (None if not truncated)
+    - pages_parsed / page_count
+    - page_tiers: extractor used for each parsed page ("fast" or "layout")
+    """
+    max_pages = Config.PDF_MAX_PAGES if max_pages is None else max_pages
+    max_bytes = Config.PDF_MAX_TEXT_BYTES if max_bytes is None else max_bytes
+    time_budget = Config.PDF_TIME_BUDGET if time_budget is None else time_budget
+    deadline = time.monotonic() + time_budget if time_budget else None
+
+    result = {
+        "text": None, "truncated": False, "reason": None,
+        "pages_parsed": 0, "page_count": 0, "page_tiers": [],
+    }
+    document = None
+    try:
+        # The same parse serves the page count and (sequential mode) the page texts
+        document = PdfDocument(file_path)
+        page_count = document.page_count
+        result["page_count"] = page_count
+        page_limit = min(page_count, max_pages) if max_pages else page_count
+        if page_limit < page_count:
+            result["truncated"], result["reason"] = True, "max_pages"
+
+        use_pool = (parallel and Config.PDF_WORKERS > 1 and page_limit >= Config.PDF_PARALLEL_MIN_PAGES
+                    and not run_inline())
+        if use_pool:
+            # The workers open their own copies
+            document.close()
+            pages, timed_out = _extract_pages_parallel(file_path, page_limit, deadline)
+            page_texts = [(n,) + pages[n] for n in sorted(pages)]
+            if timed_out:
+                result["truncated"], result["reason"] = True, "time_budget"
+        else:
+            handed_off, document = document, None
+            page_texts, timed_out = _extract_pages_sequential(handed_off, page_limit, deadline)
+            if timed_out:
+                result["truncated"], result["reason"] = True, "time_budget"
+
+        # Assemble in page order, stopping at the text size limit
+        text_content = []
+        total_bytes = 0
+        for page_number, page_text, tier in page_texts:
+            result["pages_parsed"] += 1
+            result["page_tiers"].append(tier)
+            if not page_text:
+                continue
+            size = len(page_text.encode('utf-8'))
+            if max_bytes and total_bytes + size > max_bytes:
+                remaining = max(0, max_bytes - total_bytes)
+                text_content.append(page_text.encode('utf-8')[:remaining].decode('utf-8', 'ignore'))
+                result["truncated"], result["reason"] = True, "max_bytes"
+                break
+            text_content.append(page_text)
+            total_bytes += size
+
+        result["text"] = "\n".join(text_content)
+        return result
     except Exception as e:
         print(f"Error parsing PDF {file_path}: {e}")
-        return None
+        metrics.record_error("parse_pdf")
+        return result
+    finally:
+        if document is not None:
+            document.close()
+
+def parse_pdf(file_path):
+    """
+    Extracts text from a PDF file (fast PyPDF2 tier with pdfplumber fallback).
+    Limits from Config apply; see parse_pdf_detailed for the truncation details.
+    """
+    result = parse_pdf_detailed(file_path)
+    if result["truncated"]:
+        print(f"Warning: PDF {file_path} truncated ({result['reason']}), "
+              f"{result['pages_parsed']}/{result['page_count']} pages parsed.")
+    return result["text"]
 
 def parse_docx(file_path):
     """
@@ -48,12 +419,15 @@ def parse_docx(file_path):
         return "\n".join(full_text)
     except Exception as e:
         print(f"Error parsing DOCX {file_path}: {e}")
+        metrics.record_error("parse_docx")
         return None
 
-def parse_resume(file_path):
+@metrics.timed("parse_resume")
+def parse_resume(file_path, raw=False):
     """
     Main entry point to parse a resume. Detects file type and calls appropriate parser.
-    Returns cleaned text.
+    Returns cleaned text, or with raw=True the extracted text before clean_text
+    (line breaks kept, as segment_sections needs them).
     """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
@@ -77,6 +451,21 @@ def parse_resume(file_path):
         return None
         
     if raw_text:
-        return clean_text(raw_text)
+        return raw_text if raw else clean_text(raw_text)
     
     return None
+
+def parse_resume_bytes(file_bytes, filename, raw=False):
+    """
+    Parses a resume held in memory (uploads, zip archive members).
+    The bytes are spooled to a temporary file with the same extension and
+    passed through parse_resume, so both paths behave identically.
+    """
+    _, file_extension = os.path.splitext(filename)
+    tmp = tempfile.NamedTemporaryFile(suffix=file_extension.lower(), delete=False)
+    try:
+        with tmp:
+            tmp.write(file_bytes)
+        return parse_resume(tmp.name, raw=raw)
+    finally:
+        os.remove(tmp.name)
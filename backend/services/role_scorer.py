@@ -1,65 +1,194 @@
-import json
-import os
+import numpy as np
+from scipy.sparse import csr_matrix
+from backend.services.knowledge_base import knowledge_base
+from backend.services.metrics import metrics
+
+# Critical skills are worth 2x recommended skills
+CRITICAL_WEIGHT = 2.0
+RECOMMENDED_WEIGHT = 1.0
+
+class CompiledRoles:
+    """
+    role_requirements.json compiled for vectorized scoring.
+    - skill_ids: lower-cased skill -> integer id (interned once at load time)
+    - weights: sparse role x skill matrix (critical = 2, recommended = 1)
+    - max_scores: best possible score per role
+    - skill_roles: the same weights column-wise (CSC), i.e. an inverted index
+      from each skill to the roles it contributes to and with which weight
+    """
+    def __init__(self, role_requirements):
+        self.role_names = list(role_requirements.keys())
+        self.skill_ids = {}
+        self.skill_names = []
+        self.critical = []
+        self.recommended = []
+        self.critical_ids = []
+        self.recommended_ids = []
+
+        rows, cols, data = [], [], []
+        max_scores = []
+        for row, role in enumerate(self.role_names):
+            requirements = role_requirements[role]
+            critical = requirements.get("critical_skills", [])
+            recommended = requirements.get("recommended_skills", [])
+            critical_ids = [self._intern(s) for s in critical]
+            recommended_ids = [self._intern(s) for s in recommended]
+
+            self.critical.append(critical)
+            self.recommended.append(recommended)
+            self.critical_ids.append(np.array(critical_ids, dtype=np.int64))
+            self.recommended_ids.append(np.array(recommended_ids, dtype=np.int64))
+
+            # Duplicate entries are summed by the sparse matrix, like the original counting
+            rows.extend([row] * (len(critical_ids) + len(recommended_ids)))
+            cols.extend(critical_ids + recommended_ids)
+            data.extend([CRITICAL_WEIGHT] * len(critical_ids) + [RECOMMENDED_WEIGHT] * len(recommended_ids))
+
+            # Max Score = (Num Critical * 2) + (Num Recommended * 1)
+            max_score = (len(critical) * CRITICAL_WEIGHT) + len(recommended) * RECOMMENDED_WEIGHT
+            max_scores.append(max_score or 1)  # Avoid division by zero
+
+        self.weights = csr_matrix(
+            (np.array(data, dtype=np.float64), (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64))),
+            shape=(len(self.role_names), max(1, len(self.skill_ids)))
+        )
+        self.max_scores = np.array(max_scores, dtype=np.float64)
+        self.skill_roles = self.weights.tocsc()
+        self.skill_roles.sum_duplicates()
+
+    def _intern(self, skill):
+        skill_id = self.skill_ids.get(skill.lower())
+        if skill_id is None:
+            skill_id = self.skill_ids[skill.lower()] = len(self.skill_names)
+            # Spelling of the first occurrence is used for display
+            self.skill_names.append(skill)
+        return skill_id
+
+    def roles_for_skill(self, skill_id):
+        """Inverted index lookup: (role indices, weights) the skill contributes to."""
+        start, end = self.skill_roles.indptr[skill_id], self.skill_roles.indptr[skill_id + 1]
+        return self.skill_roles.indices[start:end], self.skill_roles.data[start:end]
+
+    def skill_vector(self, extracted_skills):
+        """Binary vector over the role skill vocabulary. Unknown skills are ignored."""
+        vector = np.zeros(self.weights.shape[1], dtype=np.float64)
+        for skills in extracted_skills.values():
+            for skill in skills:
+                skill_id = self.skill_ids.get(skill.lower())
+                if skill_id is not None:
+                    vector[skill_id] = 1.0
+        return vector
+
+    def skill_matrix(self, candidates):
+        """Sparse candidate x skill matrix for a batch of extracted skill dicts."""
+        rows, cols = [], []
+        for row, extracted_skills in enumerate(candidates):
+            ids = {
+                self.skill_ids[skill.lower()]
+                for skills in extracted_skills.values() for skill in skills
+                if skill.lower() in self.skill_ids
+            }
+            rows.extend([row] * len(ids))
+            cols.extend(ids)
+        return csr_matrix(
+            (np.ones(len(rows)), (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64))),
+            shape=(len(candidates), self.weights.shape[1])
+        )
+
+    def percentages(self, raw_scores):
+        """Raw weighted scores -> percentages rounded to 1 decimal (as shown to users)."""
+        return np.round((raw_scores / self.max_scores) * 100, 1)
+
+    def ranked(self, percentages, top_k=None):
+        """Role indices by descending score, ties kept in file order (like a stable sort)."""
+        count = len(percentages)
+        if top_k is not None and top_k < count:
+            if top_k <= 0:
+                return np.zeros(0, dtype=np.int64)
+            # Partial selection, keeping every role tied with the k-th score
+            threshold = np.partition(-percentages, top_k - 1)[top_k - 1]
+            candidates = np.flatnonzero(-percentages <= threshold)
+            order = candidates[np.lexsort((candidates, -percentages[candidates]))]
+            return order[:top_k]
+        return np.lexsort((np.arange(count), -percentages))
+
+    def describe(self, role_index, score, skill_vector):
+        """Builds the result dict of one role for a candidate's skill vector."""
+        critical = self.critical[role_index]
+        recommended = self.recommended[role_index]
+        has_critical = skill_vector[self.critical_ids[role_index]] > 0 if critical else []
+        has_recommended = skill_vector[self.recommended_ids[role_index]] > 0 if recommended else []
+
+        critical_matches = [s for s, has in zip(critical, has_critical) if has]
+        rec_matches = [s for s, has in zip(recommended, has_recommended) if has]
+        return {
+            "role": self.role_names[role_index],
+            "score": float(score),
+            "missing_critical_skills": [s for s, has in zip(critical, has_critical) if not has],
+            "matched_skills": critical_matches + rec_matches
+        }
 
 class RoleScorer:
-    def __init__(self):
-        self.role_requirements = self._load_role_requirements()
-
-    def _load_role_requirements(self):
-        try:
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            file_path = os.path.join(base_dir, 'data', 'role_requirements.json')
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading role requirements: {e}")
-            return {}
-
-    def score_roles(self, extracted_skills):
+    """
+    Scores candidates against role_requirements.json.
+    The compiled roles come from the current knowledge-base snapshot, so edits to
+    the file are picked up without a restart.
+    """
+    def __init__(self, kb=None):
+        self.kb = kb or knowledge_base
+
+    @property
+    def role_requirements(self):
+        return self.kb.current().role_requirements
+
+    @property
+    def compiled(self):
+        return self.kb.current().roles
+
+    @property
+    def role_names(self):
+        return self.compiled.role_names
+
+    @metrics.timed("score_roles")
+    def score_roles(self, extracted_skills, top_k=None, snapshot=None):
         """
         Evaluates the candidate against all defined roles.
         extracted_skills: dict { category: [list of skills] }
+        top_k: only return the k best roles (None returns all of them).
         Returns: list of dicts with role scores, sorted by best fit.
+        snapshot: knowledge-base snapshot to use (default: the current one).
+        Scoring is one sparse matrix-vector product over the role x skill matrix.
         """
-        # Flatten extracted skills into a single set for easy lookup (lowercase)
-        user_skills_set = set()
-        for category, skills in extracted_skills.items():
-            for skill in skills:
-                user_skills_set.add(skill.lower())
+        compiled = (snapshot or self.kb.current()).roles
+        if not compiled.role_names:
+            return []
 
-        results = []
+        skill_vector = compiled.skill_vector(extracted_skills)
+        percentages = compiled.percentages(compiled.weights @ skill_vector)
+        order = compiled.ranked(percentages, top_k)
+        return [compiled.describe(i, percentages[i], skill_vector) for i in order]
 
-        for role, data in self.role_requirements.items():
-            critical = data.get("critical_skills", [])
-            recommended = data.get("recommended_skills", [])
-            
-            # Calculate matches
-            critical_matches = [s for s in critical if s.lower() in user_skills_set]
-            rec_matches = [s for s in recommended if s.lower() in user_skills_set]
-            
-            missing_critical = [s for s in critical if s.lower() not in user_skills_set]
-            
-            # Scoring Logic (Customizable)
-            # Critical skills are worth 2x recommended skills
-            # Max Score = (Num Critical * 2) + (Num Recommended * 1)
-            max_score = (len(critical) * 2) + len(recommended)
-            if max_score == 0:
-                max_score = 1 # Avoid division by zero
-                
-            my_score = (len(critical_matches) * 2) + len(rec_matches)
-            
-            percentage = (my_score / max_score) * 100
-            
-            results.append({
-                "role": role,
-                "score": round(percentage, 1),
-                "missing_critical_skills": missing_critical,
-                "matched_skills": critical_matches + rec_matches
-            })
-            
-        # Sort by highest score
-        results.sort(key=lambda x: x['score'], reverse=True)
+    def score_matrix(self, candidates, snapshot=None):
+        """
+        Batch scoring: candidates is a list of extracted skill dicts.
+        Returns: NumPy array (candidates x roles) of percentages; columns follow role_names.
+        """
+        compiled = (snapshot or self.kb.current()).roles
+        if not candidates or not compiled.role_names:
+            return np.zeros((len(candidates), len(compiled.role_names)))
+        raw_scores = (compiled.skill_matrix(candidates) @ compiled.weights.T).toarray()
+        return compiled.percentages(raw_scores)
+
+    def score_roles_many(self, candidates, top_k=None, snapshot=None):
+        """Batch version of score_roles: one ranked result list per candidate."""
+        snapshot = snapshot or self.kb.current()
+        compiled = snapshot.roles
+        scores = self.score_matrix(candidates, snapshot)
+        results = []
+        for extracted_skills, percentages in zip(candidates, scores):
+            skill_vector = compiled.skill_vector(extracted_skills)
+            order = compiled.ranked(percentages, top_k)
+            results.append([compiled.describe(i, percentages[i], skill_vector) for i in order])
         return results
 
 role_scorer = RoleScorer()
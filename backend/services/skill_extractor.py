@@ -1,87 +1,130 @@
-import json
-import os
 import re
+import itertools
+from backend.services.resume_parser import section_at
 from backend.services.nlp_processor import nlp_processor
+from backend.services.knowledge_base import knowledge_base
+from backend.services.metrics import metrics
 
 class SkillExtractor:
-    def __init__(self):
-        self.skills_db = self._load_skills_db()
-        self.flattened_skills = self._flatten_skills()
+    """
+    Skill extraction against the current knowledge-base snapshot.
+    The skills database, its compiled matcher and its version all come from
+    knowledge_base, so edits to skills_database.json are picked up without a restart.
+    """
+    def __init__(self, kb=None):
+        self.kb = kb or knowledge_base
 
-    def _load_skills_db(self):
-        """Loads the skills database from the JSON file."""
-        try:
-            # Construct absolute path relative to this file
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            file_path = os.path.join(base_dir, 'data', 'skills_database.json')
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Error loading skills database: {e}")
-            return {}
+    @property
+    def skills_db(self):
+        return self.kb.current().skills_db
 
-    def _flatten_skills(self):
-        """
-        Creates a simple set of all unique skills (lower-cased) for fast lookup.
-        This handles keys like 'Amazon Web Services' mapping to 'AWS' in future versions,
-        but for now, we just list everything.
-        """
-        flat_skills = set()
-        for category, skills in self.skills_db.items():
-            for skill in skills:
-                flat_skills.add(skill.lower())
-        return flat_skills
+    @property
+    def flattened_skills(self):
+        """Set of all unique skills (lower-cased) for fast lookup."""
+        return self.kb.current().flattened_skills
+
+    @property
+    def matcher(self):
+        return self.kb.current().matcher
+
+    @property
+    def db_version(self):
+        """Version of the taxonomy, used to invalidate cached extraction results."""
+        return self.kb.current().skills_version
+
+    def refresh(self):
+        """Reloads the knowledge base if a file changed on disk. Returns True if reloaded."""
+        return self.kb.refresh()
 
-    def extract_skills(self, text):
+    @metrics.timed("extract_skills")
+    def extract_skills(self, text, snapshot=None, sections=None):
         """
         Identifies skills in the provided text.
         Strategy:
         1. Preprocess text using NLP (lemmatize, etc.)
-        2. Check for existence of multi-word skills (like 'Machine Learning') in raw text.
-        3. Check for existence of single-word skills in tokenized text.
+        2. Run the compiled skill matcher over the raw text (lowercased) in one pass.
+           Alphabetic skills ("Java") must sit on word boundaries, skills with
+           special chars ("C++", "Node.js", "CI/CD") match as plain substrings.
+        3. Any skill equal to one of the lemmatized tokens also counts as found.
+        snapshot: knowledge-base snapshot to use (default: the current one).
+        sections: optional list of resume_parser.Section; the skills occurring inside
+        each one are stored in its skills list, from the same matcher pass.
         """
-        found_skills = {category: [] for category in self.skills_db.keys()}
-        
+        snapshot = snapshot or self.kb.current()
         if not text:
-            return found_skills
+            return self._collect(snapshot, text, ())
 
-        # 1. Direct Text Search for Multi-word phrases (e.g., "Machine Learning", "C++")
-        # We search in valid raw text (lowercased) to catch "C++" which might gets split by tokenizers
-        text_lower = text.lower()
-        
-        # 2. NLP Token processing (good for stemming: 'Developing' -> 'Develop')
-        # We look at tokens to find single words
+        # NLP Token processing (good for stemming: 'Developing' -> 'Develop')
         tokens = set(nlp_processor.preprocess_text(text))
+        return self._collect(snapshot, text, tokens, sections)
+
+    def update_skills(self, text, prior_skills, added_text, snapshot=None, sections=None):
+        """
+        Skills of an edited copy of an already analysed resume, without parsing all of it again.
+        The compiled matcher still runs over the whole text (it is cheap); only added_text
+        goes through spaCy for lemma matches. Earlier skills only carry over as tokens
+        when they still occur as a whole word, or as the stem of a word whose lemma is
+        the skill ("APIs" -> "api"); a bare substring ("Go" in "Google") does not count.
+        sections: as in extract_skills.
+        """
+        snapshot = snapshot or self.kb.current()
+        lowered = (text or "").lower()
+        prior = {skill.lower() for skills in prior_skills.values() for skill in skills}
+        words = set()
+        for skill in prior:
+            if skill in lowered:
+                # The skill itself on word boundaries, or inflected by a short suffix
+                words.update(re.findall(r'\b' + re.escape(skill) + r'\w{0,3}\b', lowered))
+        tokens = words & prior
+        inflected = words - prior
+        if inflected:
+            tokens.update(nlp_processor.preprocess_text(" ".join(sorted(inflected))))
+        if added_text:
+            tokens.update(nlp_processor.preprocess_text(added_text))
+        return self._collect(snapshot, text, tokens, sections)
+
+    def extract_skills_many(self, texts, batch_size=None, n_process=None, snapshot=None):
+        """
+        Bulk version of extract_skills for re-scoring large archives.
+        Texts are streamed through spaCy in batches (optionally across processes)
+        and one result dict is yielded per text, in input order.
+        The whole stream uses one knowledge-base snapshot.
+        """
+        snapshot = snapshot or self.kb.current()
+        # One copy of the stream feeds spaCy, the other the matcher.
+        # tee only buffers the texts spaCy has read ahead, so memory stays bounded.
+        nlp_texts, match_texts = itertools.tee(texts)
+        analyses = nlp_processor.analyze_many(
+            nlp_texts, ("tokens",), batch_size=batch_size, n_process=n_process
+        )
+        for text, analysis in zip(match_texts, analyses):
+            yield self._collect(snapshot, text, set(analysis.tokens))
+
+    def _collect(self, snapshot, text, tokens, sections=None):
+        """
+        Runs the snapshot's compiled matcher and groups the hits by category.
+        With sections, each hit is also bucketed into the section its offset falls in.
+        """
+        matcher = snapshot.matcher
+        found_skills = {category: [] for category in matcher.categories}
+        if not text:
+            return found_skills
+
+        positions = {} if sections else None
+        for category, skill in matcher.match(text, tokens, positions):
+            found_skills[category].append(skill)
 
-        for category, skill_list in self.skills_db.items():
-            for skill in skill_list:
-                skill_lower = skill.lower()
-                
-                # Check 1: Exact match in tokens (Success for "Python", "Java")
-                if skill_lower in tokens:
-                    found_skills[category].append(skill)
-                    continue
-                
-                # Check 2: Substring match for complex skills or special chars (Success for "C++", "Node.js")
-                # Using regex to ensure word boundary, but allowing special chars where appropriate
-                # E.g. search for "\bnode\.js\b"
-                try:
-                    # Escape special characters like +, . for regex
-                    escaped_skill = re.escape(skill_lower)
-                    # boundary check is tricky with C++, so we do a simpler check for special chars
-                    if re.search(r'\b' + escaped_skill + r'\b', text_lower):
-                         found_skills[category].append(skill)
-                    elif skill_lower in text_lower and not skill_lower.isalpha():
-                        # Fallback for things like C++ or C# where word boundaries fail
-                         found_skills[category].append(skill)
-                except re.error:
-                    pass
+        if sections:
+            starts = [section.start for section in sections]
+            by_section = [set() for _ in sections]
+            for pid, offsets in positions.items():
+                for offset in offsets:
+                    by_section[section_at(starts, offset)].add(pid)
+            for section, pids in zip(sections, by_section):
+                section.skills = list(dict.fromkeys(
+                    skill for pid in sorted(pids) for _, skill in matcher.pattern_skills[pid]
+                ))
 
-        # Remove duplicates
-        for category in found_skills:
-            found_skills[category] = list(set(found_skills[category]))
-            
         return found_skills
 
 skill_extractor = SkillExtractor()
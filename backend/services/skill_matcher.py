@@ -0,0 +1,124 @@
+from collections import deque
+
+class SkillMatcher:
+    """
+    Multi-pattern matcher compiled once from the skills database.
+    Uses an Aho-Corasick automaton so every skill is found in a single pass over
+    the text, no matter how many skills the taxonomy contains.
+    Usage: matcher = SkillMatcher(skills_db); matcher.match(text, tokens)
+    """
+    def __init__(self, skills_db):
+        self.categories = list(skills_db.keys())
+
+        # One pattern per unique lower-cased skill.
+        # pattern_skills[pid] lists every (category, skill) that maps to it.
+        self.patterns = []
+        self.pattern_skills = []
+        self.pattern_ids = {}
+
+        for category, skills in skills_db.items():
+            for skill in skills:
+                skill_lower = skill.lower()
+                if not skill_lower:
+                    continue
+                pid = self.pattern_ids.get(skill_lower)
+                if pid is None:
+                    pid = len(self.patterns)
+                    self.pattern_ids[skill_lower] = pid
+                    self.patterns.append(skill_lower)
+                    self.pattern_skills.append([])
+                if (category, skill) not in self.pattern_skills[pid]:
+                    self.pattern_skills[pid].append((category, skill))
+
+        # Purely alphabetic skills ("Java", "R") must sit on word boundaries,
+        # anything with symbols or spaces ("C++", "Node.js", "CI/CD") is a plain substring.
+        self.needs_boundary = [p.isalpha() for p in self.patterns]
+        self.lengths = [len(p) for p in self.patterns]
+        self._build_automaton()
+
+    def _build_automaton(self):
+        """Builds the goto/fail/output tables of the Aho-Corasick automaton."""
+        goto = [{}]
+        out = [[]]
+        for pid, pattern in enumerate(self.patterns):
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto.append({})
+                    out.append([])
+                    goto[state][ch] = nxt
+                state = nxt
+            out[state].append(pid)
+
+        # Breadth-first pass to compute failure links and merge suffix outputs
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._out = [tuple(o) for o in out]
+
+    @staticmethod
+    def _is_word_char(ch):
+        # Mirrors the definition of \w used by Python's re module
+        return ch.isalnum() or ch == '_'
+
+    def iter_matches(self, text_lower):
+        """
+        Yields (start, end, pattern_id) for every skill occurrence in lower-cased text.
+        Boundary rules are applied here, so the caller only sees valid hits.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        lengths, needs_boundary = self.lengths, self.needs_boundary
+        is_word = self._is_word_char
+        n = len(text_lower)
+        state = 0
+        for i, ch in enumerate(text_lower):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if not out[state]:
+                continue
+            end = i + 1
+            for pid in out[state]:
+                start = end - lengths[pid]
+                if needs_boundary[pid]:
+                    if start > 0 and is_word(text_lower[start - 1]):
+                        continue
+                    if end < n and is_word(text_lower[end]):
+                        continue
+                yield start, end, pid
+
+    def match(self, text, tokens=(), positions=None):
+        """
+        Returns the list of (category, skill) pairs found in the text.
+        tokens: optional iterable of normalized tokens (e.g. lemmas) that count as exact hits.
+        positions: optional dict, filled with pattern id -> start offsets of its
+        occurrences in text (token-only hits have none).
+        """
+        matched = set()
+        for token in tokens:
+            pid = self.pattern_ids.get(token)
+            if pid is not None:
+                matched.add(pid)
+
+        for start, _, pid in self.iter_matches(text.lower()):
+            matched.add(pid)
+            if positions is not None:
+                positions.setdefault(pid, []).append(start)
+
+        results = []
+        for pid in sorted(matched):
+            results.extend(self.pattern_skills[pid])
+        return results
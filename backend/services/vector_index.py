@@ -0,0 +1,449 @@
+import os
+import json
+import threading
+import numpy as np
+from backend.services.keyword_index import KeywordIndex
+
+# Same weighting as MatchingEngine.evaluate
+SEMANTIC_WEIGHT = 0.6
+KEYWORD_WEIGHT = 0.4
+
+class VectorIndex:
+    """
+    Hybrid top-k index over many documents (open JDs, or stored resumes).
+    - Normalized embeddings live in one contiguous float32/float16 matrix, memory-mapped
+      from <directory>/vectors.bin (or held in RAM when directory is None)
+    - A KeywordIndex over the same documents gives the TF-IDF part of the score
+    - Exact search scans the matrix in blocks (one matrix-vector product per block);
+      after train_clusters() an IVF mode only scans the nprobe closest clusters
+    Scores combine 60% semantic + 40% keyword, like MatchingEngine.evaluate.
+    Documents can be added and removed; dead rows are compacted in bulk.
+
+    On disk, meta.json names the current generation's files (vectors, keyword and
+    cluster snapshots) and is always replaced atomically, so a crash leaves either
+    the old or the new snapshot. Every add / remove since the snapshot is appended
+    to journal-<generation>.ndjson (doc id and row only; the vector is already in the
+    vectors file) and replayed on load. A new snapshot is written every snapshot_every
+    journaled operations, which also starts an empty journal. Compaction writes the
+    live rows to a new vectors file and publishes it with the next snapshot.
+    After a crash, documents added since the last snapshot come back with their
+    vectors but without keyword statistics (semantic score only) until re-added.
+    """
+    def __init__(self, directory=None, dtype="float32", block_size=16384, snapshot_every=1000):
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self.block_size = block_size
+        self.snapshot_every = snapshot_every
+
+        self.dim = None
+        self.count = 0                   # rows used (live + removed)
+        self.doc_ids = []                # row -> doc id (None once removed)
+        self.rows = {}                   # doc id -> row
+        self.keywords = KeywordIndex()
+        self.centroids = None            # IVF: (nlist, dim) float32
+        self.assignments = np.zeros(0, dtype=np.int32)  # row -> cluster
+        self.alive = np.zeros(0, dtype=bool)             # row -> not removed
+        self._vectors = None
+        self.generation = 0
+        self.vectors_file = "vectors.bin"
+        self._journal = None
+        self._journaled = 0
+        # IVF: rows grouped by cluster (order, offsets), rebuilt after rows were added or moved
+        self._members = None
+        self._lock = threading.RLock()
+
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._load()
+
+    # --- Storage ---
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    @property
+    def capacity(self):
+        return 0 if self._vectors is None else self._vectors.shape[0]
+
+    def _open_vectors(self, name, capacity):
+        """Memory-maps (creating or growing) the vectors file with room for at least capacity rows."""
+        row_bytes = self.dim * self.dtype.itemsize
+        with open(self._path(name), 'ab') as f:
+            if f.tell() < capacity * row_bytes:
+                f.truncate(capacity * row_bytes)
+            capacity = max(capacity, f.seek(0, os.SEEK_END) // row_bytes)
+        return np.memmap(self._path(name), dtype=self.dtype, mode='r+', shape=(capacity, self.dim))
+
+    def _allocate(self, capacity):
+        """(Re)allocates the matrix with room for capacity rows, keeping existing rows."""
+        if self.directory:
+            if self._vectors is not None:
+                self._vectors.flush()
+            self._vectors = self._open_vectors(self.vectors_file, capacity)
+        else:
+            vectors = np.zeros((capacity, self.dim), dtype=self.dtype)
+            if self._vectors is not None:
+                vectors[:self.count] = self._vectors[:self.count]
+            self._vectors = vectors
+        assignments = np.full(capacity, -1, dtype=np.int32)
+        assignments[:self.count] = self.assignments[:self.count]
+        self.assignments = assignments
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self.count] = self.alive[:self.count]
+        self.alive = alive
+
+    def _load(self):
+        meta_path = self._path("meta.json")
+        try:
+            if not os.path.exists(meta_path):
+                # Never snapshotted: everything added so far is in the first journal
+                self._replay()
+                return
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta["dtype"] != self.dtype.name:
+                print(f"Vector index {self.directory} was written as {meta['dtype']}, starting over")
+                return
+            self.dim = meta["dim"]
+            self.generation = meta.get("generation", 0)
+            self.vectors_file = meta.get("vectors", "vectors.bin")
+            self.doc_ids = meta["doc_ids"]
+            self.count = len(self.doc_ids)
+            self.rows = {doc_id: row for row, doc_id in enumerate(self.doc_ids) if doc_id is not None}
+            if self.dim is not None:
+                row_bytes = self.dim * self.dtype.itemsize
+                capacity = os.path.getsize(self._path(self.vectors_file)) // row_bytes
+                self._vectors = np.memmap(self._path(self.vectors_file), dtype=self.dtype, mode='r+',
+                                          shape=(capacity, self.dim))
+                self.assignments = np.full(capacity, -1, dtype=np.int32)
+                self.alive = np.zeros(capacity, dtype=bool)
+                self.alive[list(self.rows.values())] = True
+            clusters_path = self._path(self._snapshot_name("clusters", "npz"))
+            if os.path.exists(clusters_path):
+                with np.load(clusters_path) as data:
+                    self.centroids = data["centroids"]
+                    self.assignments[:self.count] = data["assignments"][:self.count]
+            keywords_path = self._path(self._snapshot_name("keywords", "npz"))
+            if os.path.exists(keywords_path):
+                self.keywords = KeywordIndex.load(keywords_path)
+            self._replay()
+        except Exception as e:
+            print(f"Error loading vector index {self.directory}: {e}")
+            self.dim, self.count, self.doc_ids, self.rows = None, 0, [], {}
+            self.keywords = KeywordIndex()
+            self.centroids, self._vectors = None, None
+            self.assignments = np.zeros(0, dtype=np.int32)
+            self.alive = np.zeros(0, dtype=bool)
+
+    def _snapshot_name(self, kind, extension, generation=None):
+        generation = self.generation if generation is None else generation
+        # Generation 0 is the layout written before snapshots were versioned
+        return f"{kind}.{extension}" if generation == 0 else f"{kind}-{generation}.{extension}"
+
+    def _replay(self):
+        """Re-applies the adds / removes journaled since the loaded snapshot."""
+        journal_path = self._path(f"journal-{self.generation}.ndjson")
+        if not os.path.exists(journal_path):
+            return
+        replayed = []
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # torn last line: the operation never completed
+                if entry["op"] == "add":
+                    row = entry["row"]
+                    if self.dim is None:
+                        self.dim = entry["dim"]
+                    if self._vectors is None or row >= self.capacity:
+                        self._vectors = self._open_vectors(self.vectors_file, row + 1)
+                        self._grow_flags(self.capacity)
+                    self.doc_ids.extend([None] * (row + 1 - len(self.doc_ids)))
+                    self.doc_ids[row] = entry["id"]
+                    self.rows[entry["id"]] = row
+                    self.alive[row] = True
+                    if "text" in entry:
+                        # Journals written before entries were reduced to id and row
+                        self.keywords.add(entry["id"], entry["text"])
+                    self.count = max(self.count, row + 1)
+                    replayed.append(row)
+                elif entry["op"] == "remove":
+                    row = self.rows.pop(entry["id"], None)
+                    if row is not None:
+                        self.doc_ids[row] = None
+                        self.alive[row] = False
+                        self.keywords.remove(entry["id"])
+        if replayed and self.centroids is not None:
+            rows = np.array(replayed)
+            self.assignments[rows] = np.argmax(np.asarray(self._vectors[rows], dtype=np.float32) @ self.centroids.T,
+                                               axis=1)
+
+    def _grow_flags(self, capacity):
+        assignments = np.full(capacity, -1, dtype=np.int32)
+        assignments[:len(self.assignments)] = self.assignments[:capacity]
+        self.assignments = assignments
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:len(self.alive)] = self.alive[:capacity]
+        self.alive = alive
+
+    def _log(self, entries):
+        """
+        Appends operations to the current generation's journal (flushed before returning),
+        and writes a snapshot once snapshot_every operations have been journaled.
+        """
+        if not self.directory:
+            return
+        if self._journal is None:
+            self._journal = open(self._path(f"journal-{self.generation}.ndjson"), 'a', encoding='utf-8')
+        for entry in entries:
+            self._journal.write(json.dumps(entry) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journaled += len(entries)
+        if self.snapshot_every and self._journaled >= self.snapshot_every:
+            self.save()
+
+    def save(self, vectors_file=None):
+        """
+        Writes a new snapshot generation (keyword and cluster statistics, row ids)
+        and publishes it by atomically replacing meta.json; the journal starts over.
+        vectors_file: the vectors file of the new generation (default: the current one).
+        """
+        if not self.directory:
+            return
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+            previous = (self.generation, self.vectors_file)
+            generation = self.generation + 1
+            vectors_file = vectors_file or self.vectors_file
+            if self.centroids is not None:
+                with open(self._path(self._snapshot_name("clusters", "npz", generation)), 'wb') as f:
+                    np.savez(f, centroids=self.centroids, assignments=self.assignments[:self.count])
+            self.keywords.save(self._path(self._snapshot_name("keywords", "npz", generation)))
+            tmp_path = self._path("meta.json.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"dim": self.dim, "dtype": self.dtype.name, "generation": generation,
+                           "vectors": vectors_file, "doc_ids": self.doc_ids}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._path("meta.json"))
+
+            # The new generation is live: drop the files only the previous one used
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            self._journaled = 0
+            self.generation, self.vectors_file = generation, vectors_file
+            old_files = [f"journal-{previous[0]}.ndjson", self._snapshot_name("keywords", "npz", previous[0]),
+                         self._snapshot_name("clusters", "npz", previous[0])]
+            if previous[1] != vectors_file:
+                old_files.append(previous[1])
+            for name in old_files:
+                if os.path.exists(self._path(name)):
+                    os.remove(self._path(name))
+
+    # --- Updates ---
+
+    def __len__(self):
+        return len(self.rows)
+
+    def add_many(self, doc_ids, texts, vectors):
+        """Adds (or replaces) documents. vectors: L2-normalized embeddings, one row per document."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            for doc_id in doc_ids:
+                if doc_id in self.rows:
+                    self.remove(doc_id)
+
+            needed = self.count + len(doc_ids)
+            if needed > self.capacity:
+                self._allocate(max(needed, self.capacity * 2, 1024))
+            self._vectors[self.count:needed] = vectors
+            if self.directory:
+                # The rows must be on disk before the journal refers to them
+                self._vectors.flush()
+            self.alive[self.count:needed] = True
+            if self.centroids is not None:
+                self.assignments[self.count:needed] = np.argmax(vectors @ self.centroids.T, axis=1)
+            entries = []
+            for offset, (doc_id, text) in enumerate(zip(doc_ids, texts)):
+                self.rows[doc_id] = self.count + offset
+                self.doc_ids.append(doc_id)
+                self.keywords.add(doc_id, text)
+                entries.append({"op": "add", "id": doc_id, "row": self.count + offset, "dim": self.dim})
+            self.count = needed
+            self._log(entries)
+
+    def add(self, doc_id, text, vector):
+        self.add_many([doc_id], [text], np.asarray(vector)[None, :])
+
+    def remove(self, doc_id):
+        """Removes a document. Its row is only marked dead; rows are compacted in bulk."""
+        with self._lock:
+            row = self.rows.pop(doc_id, None)
+            if row is None:
+                return False
+            self.doc_ids[row] = None
+            self.alive[row] = False
+            self.keywords.remove(doc_id)
+            self._log([{"op": "remove", "id": doc_id}])
+            # Compact once a quarter of the rows are dead
+            if (self.count - len(self.rows)) * 4 > self.count:
+                self._compact()
+            return True
+
+    def _compact(self):
+        """
+        Moves live rows to the front of the matrix (in row order). On disk the rows
+        are copied to a new vectors file, published with the next snapshot, so the
+        stored row ids always match the file meta.json names.
+        """
+        live = [row for row in range(self.count) if self.doc_ids[row] is not None]
+        if self.directory:
+            vectors_file = f"vectors-{self.generation + 1}.bin"
+            if os.path.exists(self._path(vectors_file)):
+                os.remove(self._path(vectors_file))
+            compacted = self._open_vectors(vectors_file, max(self.capacity, 1))
+            for start in range(0, len(live), self.block_size):
+                rows = live[start:start + self.block_size]
+                compacted[start:start + len(rows)] = self._vectors[rows]
+            compacted.flush()
+            self._vectors = compacted
+        else:
+            for new_row, row in enumerate(live):
+                if new_row != row:
+                    self._vectors[new_row] = self._vectors[row]
+        self.assignments[:len(live)] = self.assignments[live]
+        self.alive[:len(live)] = True
+        self.alive[len(live):self.count] = False
+        self.doc_ids = [self.doc_ids[row] for row in live]
+        self.rows = {doc_id: row for row, doc_id in enumerate(self.doc_ids)}
+        self.count = len(live)
+        self._members = None
+        if self.directory:
+            self.save(vectors_file)
+
+    # --- IVF clustering ---
+
+    def train_clusters(self, nlist, iterations=10, sample_size=100000, seed=0):
+        """
+        Spherical k-means over (a sample of) the live vectors. Afterwards each row belongs
+        to its closest centroid and search(nprobe=...) only scans the probed clusters.
+        """
+        with self._lock:
+            live = np.array(sorted(self.rows.values()), dtype=np.int64)
+            if len(live) == 0 or nlist <= 0:
+                return
+            rng = np.random.default_rng(seed)
+            sample = live if len(live) <= sample_size else rng.choice(live, sample_size, replace=False)
+            data = np.asarray(self._vectors[np.sort(sample)], dtype=np.float32)
+            nlist = min(nlist, len(data))
+            centroids = data[rng.choice(len(data), nlist, replace=False)].copy()
+            for _ in range(iterations):
+                labels = np.argmax(data @ centroids.T, axis=1)
+                for cluster in range(nlist):
+                    members = data[labels == cluster]
+                    if len(members):
+                        centroid = members.sum(axis=0)
+                        centroids[cluster] = centroid / max(np.linalg.norm(centroid), 1e-12)
+
+            self.centroids = centroids
+            self._members = None
+            for start in range(0, self.count, self.block_size):
+                block = np.asarray(self._vectors[start:start + self.block_size], dtype=np.float32)
+                self.assignments[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+
+    # --- Search ---
+
+    def _candidate_rows(self, query_vector, nprobe):
+        """Rows to scan: everything, or the members of the nprobe closest clusters."""
+        if self.centroids is None or not nprobe:
+            return None
+        if self._members is None or self._members[0] != self.count:
+            order = np.argsort(self.assignments[:self.count], kind='stable')
+            offsets = np.searchsorted(self.assignments[:self.count][order], np.arange(len(self.centroids) + 1))
+            self._members = (self.count, order, offsets)
+        _, order, offsets = self._members
+        probed = np.argsort(-(self.centroids @ query_vector))[:nprobe]
+        return np.sort(np.concatenate([order[offsets[c]:offsets[c + 1]] for c in probed]))
+
+    def search(self, query_text, query_vector, top_k=10, nprobe=None, exclude=None):
+        """
+        Hybrid top-k: 0.6 * cosine of the embeddings + 0.4 * TF-IDF cosine.
+        nprobe: with trained clusters, only scan the nprobe closest clusters (approximate);
+        keyword scores are then computed for those candidates only.
+        exclude: doc id to leave out (e.g. the query document itself).
+        Returns: list of dicts with doc_id and overall / keyword / semantic percentages.
+        """
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        with self._lock:
+            if not self.rows or top_k <= 0:
+                return []
+
+            exclude_row = self.rows.get(exclude) if exclude is not None else None
+            candidates = self._candidate_rows(query_vector, nprobe)
+            best_rows, best_semantic, best_keyword, best_overall = [], [], [], []
+            if candidates is None:
+                # Exact: every row is scanned anyway, so score the keywords through the posting lists
+                keyword_scores = np.zeros(self.count, dtype=np.float32)
+                kw_ids, kw_scores = self.keywords.score_documents(query_text)
+                for doc_id, score in zip(kw_ids, kw_scores):
+                    keyword_scores[self.rows[doc_id]] = score
+                blocks = (
+                    (np.arange(start, min(start + self.block_size, self.count)),
+                     keyword_scores[start:start + self.block_size])
+                    for start in range(0, self.count, self.block_size)
+                )
+            else:
+                keyword_scores = self.keywords.score_subset(
+                    query_text, [self.doc_ids[row] for row in candidates.tolist()]
+                ).astype(np.float32)
+                blocks = (
+                    (candidates[i:i + self.block_size], keyword_scores[i:i + self.block_size])
+                    for i in range(0, len(candidates), self.block_size)
+                )
+
+            for rows, keyword in blocks:
+                if len(rows) == 0:
+                    continue
+                if candidates is None:
+                    block = self._vectors[rows[0]:rows[-1] + 1]
+                else:
+                    block = self._vectors[rows]
+                semantic = np.asarray(block, dtype=np.float32) @ query_vector
+                overall = SEMANTIC_WEIGHT * semantic + KEYWORD_WEIGHT * keyword
+                overall[~self.alive[rows]] = -np.inf
+                if exclude_row is not None:
+                    overall[rows == exclude_row] = -np.inf
+
+                # Keep only this block's top k, so memory does not grow with the index
+                if len(rows) > top_k:
+                    keep = np.argpartition(-overall, top_k - 1)[:top_k]
+                else:
+                    keep = np.arange(len(rows))
+                best_rows.append(rows[keep])
+                best_semantic.append(semantic[keep])
+                best_keyword.append(keyword[keep])
+                best_overall.append(overall[keep])
+
+            if not best_rows:
+                return []
+            rows = np.concatenate(best_rows)
+            semantic = np.concatenate(best_semantic)
+            keyword = np.concatenate(best_keyword)
+            overall = np.concatenate(best_overall)
+            order = np.lexsort((rows, -overall))[:top_k]
+
+            return [
+                {
+                    "doc_id": self.doc_ids[rows[i]],
+                    "overall_score": round(float(overall[i]) * 100, 1),
+                    "keyword_match": round(float(keyword[i]) * 100, 1),
+                    "semantic_match": round(float(semantic[i]) * 100, 1),
+                }
+                for i in order if np.isfinite(overall[i])
+            ]
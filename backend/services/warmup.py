@@ -0,0 +1,53 @@
+import threading
+import time
+
+# Only the lightweight singletons are imported here; models load in warm_up()
+from backend.services.nlp_processor import nlp_processor
+from backend.services.matching_engine import matching_engine
+from backend.services.knowledge_base import knowledge_base
+
+_warmup_thread = None
+_warmup_lock = threading.Lock()
+_warmup_seconds = None
+
+def _components():
+    return {
+        "knowledge_base": knowledge_base,
+        "nlp": nlp_processor,
+        "semantic_model": matching_engine,
+    }
+
+def warm_up():
+    """
+    Loads every model the pipeline needs.
+    Errors are recorded in each component's load_state rather than raised.
+    """
+    global _warmup_seconds
+    start = time.perf_counter()
+    for name, component in _components().items():
+        try:
+            component.warm_up()
+        except Exception as e:
+            print(f"Error warming up {name}: {e}")
+    _warmup_seconds = round(time.perf_counter() - start, 2)
+
+def start_background_warmup():
+    """Starts warm_up() in a daemon thread (only once per process)."""
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=warm_up, name="model-warmup", daemon=True)
+            _warmup_thread.start()
+    return _warmup_thread
+
+def readiness():
+    """
+    Readiness probe.
+    Returns: dict with "ready" (all models loaded) and the state of each component.
+    """
+    states = {name: component.load_state for name, component in _components().items()}
+    return {
+        "ready": all(state == "ready" for state in states.values()),
+        "components": states,
+        "warmup_seconds": _warmup_seconds,
+    }
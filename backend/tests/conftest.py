@@ -0,0 +1,26 @@
+import os
+import atexit
+import shutil
+import tempfile
+from backend.config import Config
+
+# Every on-disk cache and index the services write (empty values stay disabled)
+CACHE_PATHS = (
+    "EMBEDDING_CACHE_DIR", "KEYWORD_INDEX_PATH", "RESUME_CACHE_PATH", "KB_SNAPSHOT_PATH",
+    "VECTOR_INDEX_DIR", "PERSISTENCE_SQLITE_PATH", "PROFILE_DIR", "DEDUP_INDEX_PATH",
+)
+
+def pytest_configure(config):
+    """
+    Points the caches at a fresh temporary directory for the whole run.
+    This runs before the test modules are imported, so the module singletons
+    (resume_cache, matching_engine, duplicate_detector, ...) are created with these
+    paths and nothing is read from or left in backend/.cache.
+    """
+    cache_dir = tempfile.mkdtemp(prefix="resumexpert-tests-")
+    # Registered first, so it runs after the services' own atexit saves
+    atexit.register(shutil.rmtree, cache_dir, True)
+    for name in CACHE_PATHS:
+        value = getattr(Config, name)
+        if value and value != ":memory:":
+            setattr(Config, name, os.path.join(cache_dir, os.path.basename(value)))
@@ -34,5 +34,37 @@ def test_analytics():
 
     print("\n[SUCCESS] Analytics Test Passed!")
 
+def test_what_if_engine():
+    print("--- Testing What-If Engine ---")
+    user_skills = {"Data Science": ["Python", "Machine Learning", "Pandas", "SQL"]}
+
+    # Incremental updates agree with a full re-score
+    simulator = recommendation_engine.what_if(user_skills)
+    assert simulator.add_skill("Docker") and not simulator.add_skill("docker")
+    extended = {"Data Science": user_skills["Data Science"] + ["Docker"]}
+    full = {r['role']: r['score'] for r in role_scorer.score_roles(extended)}
+    for role, score in zip(role_scorer.role_names, simulator.percentages()):
+        assert round(score, 1) == full[role]
+    assert simulator.remove_skill("Docker")
+
+    picks = recommendation_engine.next_best_skills(user_skills, count=2)
+    for pick in picks:
+        print(f"Learn {pick['skill']}: {pick['roles']}")
+    # The missing critical skill of the best-fit role comes first
+    assert picks[0]['skill'] == "NumPy"
+    assert len({p['skill'] for p in picks}) == 2
+
+    targeted = recommendation_engine.next_best_skills(user_skills, count=1, target_role="Java Developer")
+    assert any(r['role'] == "Java Developer" for r in targeted[0]['roles'])
+
+    # The advice quotes the target role's score change, not whichever role gains the most
+    role_analysis = role_scorer.score_roles(user_skills)
+    recs = recommendation_engine.generate_recommendations(role_analysis, "DevOps Engineer", extracted_skills=user_skills)
+    high_impact = [r['text'] for r in recs if r['type'] == "High-Impact Skill"]
+    assert high_impact and all("your DevOps Engineer match" in text for text in high_impact)
+
+    print("\n[SUCCESS] What-If Test Passed!")
+
 if __name__ == "__main__":
     test_analytics()
+    test_what_if_engine()
@@ -0,0 +1,109 @@
+import io
+import time
+import threading
+from backend.config import Config
+from backend.services.job_queue import JobQueue, QueueFull
+from backend.benchmarks.documents import write_pdf
+
+def test_job_queue_coalesces_and_rejects():
+    print("--- Testing Analysis Job Queue ---")
+    release = threading.Event()
+    calls = []
+
+    def slow(value):
+        calls.append(value)
+        release.wait(5)
+        return value * 2
+
+    jobs = JobQueue(workers=1, max_pending=1)
+    first, coalesced = jobs.submit("a", slow, 1)
+    assert not coalesced
+    # Identical submission while in flight joins the same job
+    same, coalesced = jobs.submit("a", slow, 1)
+    assert coalesced and same is first
+    second, _ = jobs.submit("b", slow, 2)
+
+    try:
+        jobs.submit("c", slow, 3)
+        raise AssertionError("queue should be full")
+    except QueueFull:
+        pass
+
+    release.set()
+    assert first.wait(5) and first.result == 2
+    assert second.wait(5) and second.result == 4
+    assert jobs.get(first.id).status == "done"
+    # The coalesced submission did not run a second computation
+    assert sorted(calls) == [1, 2]
+    stats = jobs.stats()
+    assert stats["coalesced"] == 1 and stats["rejected"] == 1
+    jobs.shutdown()
+    print("[SUCCESS] Analysis Job Queue Test Passed!")
+
+def test_analyze_endpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "WARMUP_ON_START", False)
+    from backend.app import app
+
+    path = str(tmp_path / "resume.pdf")
+    write_pdf(path, [["Jane Doe - Data Scientist with Python, Machine Learning, Pandas and SQL."]])
+    with open(path, 'rb') as f:
+        pdf_bytes = f.read()
+
+    client = app.test_client()
+    response = client.post("/analyze", data={"file": (io.BytesIO(pdf_bytes), "resume.pdf")},
+                           content_type="multipart/form-data")
+    body = response.get_json()
+    if response.status_code == 202:
+        # Over the latency budget: poll the job
+        response = client.get(body["status_url"])
+        while response.status_code == 202:
+            time.sleep(0.1)
+            response = client.get(body["status_url"])
+        body = response.get_json()
+
+    assert response.status_code == 200
+    result = body["result"]
+    assert result["role_analysis"][0]["role"] == "Data Scientist"
+    assert result["kb_version"]
+    assert result["match"] is None
+
+    assert client.post("/analyze", data={}).status_code == 400
+    assert client.get("/analyze/unknown").status_code == 404
+
+    # The analysis shows up per stage on /metrics, next to the cache and queue gauges
+    response = client.get("/metrics")
+    assert response.status_code == 200 and response.mimetype == "text/plain"
+    text = response.get_data(as_text=True)
+    for stage in ("analyze", "score_roles", "recommendations"):
+        assert f'stage="{stage}",outcome="ok"' in text
+    assert "resumexpert_analysis_queue_queued" in text
+    assert "resumexpert_resume_cache_hit_ratio" in text
+
+def test_failed_analyses_map_to_status_codes(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "WARMUP_ON_START", False)
+    from backend.app import app
+    from backend.routes import resume_routes
+
+    def post(pdf_bytes):
+        response = app.test_client().post("/analyze", data={"file": (io.BytesIO(pdf_bytes), "resume.pdf")},
+                                          content_type="multipart/form-data")
+        while response.status_code == 202:
+            time.sleep(0.1)
+            response = app.test_client().get(response.get_json()["status_url"])
+        return response
+
+    # An upload without extractable text is the client's problem: 422 with the reason
+    path = str(tmp_path / "blank.pdf")
+    write_pdf(path, [[""]])
+    with open(path, 'rb') as f:
+        response = post(f.read())
+    assert response.status_code == 422
+    assert response.get_json()["error"] == "No text could be extracted from the resume"
+
+    # Anything else is a 500 that does not leak the exception text
+    def broken(*args):
+        raise RuntimeError("connection to /var/lib/secret.db failed")
+    monkeypatch.setattr(resume_routes, "analyze_resume", broken)
+    response = post(b"%PDF-1.4 other bytes")
+    assert response.status_code == 500
+    assert "secret" not in response.get_data(as_text=True)
@@ -0,0 +1,52 @@
+import io
+import json
+from backend.services.bulk_ingest import BulkIngest
+from backend.benchmarks.documents import write_pdf
+
+def test_ingest_streams_in_order_and_resumes(tmp_path):
+    print("--- Testing Bulk Ingest ---")
+    source = tmp_path / "resumes"
+    source.mkdir()
+    for i in range(5):
+        write_pdf(str(source / f"resume_{i}.pdf"),
+                  [[f"Candidate {i}: Python developer with Machine Learning, Pandas, NumPy and SQL."]])
+    (source / "broken.pdf").write_bytes(b"not a pdf")
+
+    checkpoint = str(tmp_path / "run.checkpoint")
+    output = io.StringIO()
+    count = BulkIngest(workers=2, batch_size=2).run(str(source), output, checkpoint)
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+
+    assert count == 6
+    assert [r["id"] for r in records] == ["broken.pdf"] + [f"resume_{i}.pdf" for i in range(5)]
+    assert records[0]["error"]
+    assert records[1]["top_roles"][0]["role"] == "Data Scientist"
+
+    # A restarted run skips everything already in the checkpoint
+    (source / "resume_5.pdf").write_bytes((source / "resume_0.pdf").read_bytes())
+    output = io.StringIO()
+    count = BulkIngest(workers=2, batch_size=2).run(str(source), output, checkpoint)
+    assert count == 1
+    assert json.loads(output.getvalue())["id"] == "resume_5.pdf"
+
+    print("[SUCCESS] Bulk Ingest Test Passed!")
+
+def test_failing_stage_stops_the_run(tmp_path, monkeypatch):
+    import time
+    import pytest
+    from backend.services.role_scorer import role_scorer
+
+    source = tmp_path / "resumes"
+    source.mkdir()
+    for i in range(30):
+        write_pdf(str(source / f"resume_{i:02d}.pdf"), [[f"Candidate {i}: Python developer with SQL."]])
+
+    def fail(*args, **kwargs):
+        raise RuntimeError("scoring failed")
+    monkeypatch.setattr(role_scorer, "score_roles_many", fail)
+
+    # Upstream stages blocked on full queues must not hang the run
+    start = time.monotonic()
+    with pytest.raises(RuntimeError, match="scoring failed"):
+        BulkIngest(workers=2, batch_size=1, queue_size=2).run(str(source), io.StringIO())
+    assert time.monotonic() - start < 30
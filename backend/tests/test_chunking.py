@@ -0,0 +1,64 @@
+import numpy as np
+from backend.services.chunking import split_chunks, split_sections, pool, chunk_similarity
+
+def long_resume(sentences=120):
+    return " ".join(
+        f"Sentence {i} describes a project built with Python and SQL for team {i % 7}."
+        for i in range(sentences)
+    )
+
+def test_split_chunks_windows():
+    print("--- Testing Chunked Encoding ---")
+    short = "  Python developer with Flask experience.  "
+    chunks = split_chunks(short)
+    assert len(chunks) == 1 and chunks[0].text == short.strip()
+    assert split_chunks("   ") == []
+
+    text = long_resume()
+    chunks = split_chunks(text, max_words=60, overlap_words=15, max_chunks=100)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert text[chunk.start:chunk.end] == chunk.text
+        assert len(chunk.text.split()) <= 60
+        # Windows end on sentence boundaries
+        assert chunk.text.endswith(".")
+    # Consecutive windows overlap and together cover the whole text
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.start < previous.end
+    assert chunks[0].start == 0 and chunks[-1].end == len(text)
+
+    # The cap keeps the first and last windows and spreads the rest
+    capped = split_chunks(text, max_words=60, overlap_words=15, max_chunks=4)
+    assert len(capped) == 4
+    assert capped[0].start == 0 and capped[-1].end == len(text)
+    print(f"[SUCCESS] {len(chunks)} windows, capped to {len(capped)}")
+
+def test_long_sentence_is_split_on_words():
+    text = " ".join(["word"] * 500)
+    chunks = split_chunks(text, max_words=100, overlap_words=20, max_chunks=0)
+    assert all(len(c.text.split()) <= 100 for c in chunks)
+    assert chunks[-1].end == len(text)
+
+def test_sections_share_one_chunk_budget():
+    # Ten sections, one of them long: rounding each section's share up used to give 10+ chunks
+    parts = [long_resume(60)] + [f"Section {i} lists Python and SQL work." for i in range(9)]
+    text, spans = "", []
+    for part in parts:
+        spans.append((len(text), len(text) + len(part)))
+        text += part + "\n"
+    for budget in (3, 8, 12):
+        chunks, owners = split_sections(text, spans, max_words=60, overlap_words=15, max_chunks=budget)
+        assert 0 < len(chunks) <= budget
+        assert len(chunks) == len(owners)
+        for chunk, owner in zip(chunks, owners):
+            assert spans[owner][0] <= chunk.start and chunk.end <= spans[owner][1]
+    # With enough budget every section gets a window and the long one the rest
+    chunks, owners = split_sections(text, spans, max_words=60, overlap_words=15, max_chunks=12)
+    assert set(owners) == set(range(10)) and owners.count(0) == 3
+
+def test_pooling():
+    vectors = np.array([[1.0, 0.0], [0.0, 1.0]])
+    assert np.allclose(pool(vectors, "mean"), [np.sqrt(0.5), np.sqrt(0.5)])
+    assert np.allclose(pool(vectors, "max"), [np.sqrt(0.5), np.sqrt(0.5)])
+    # One JD chunk fully covered, the other not at all
+    assert chunk_similarity(np.array([[1.0, 0.0]]), vectors) == 0.5
@@ -0,0 +1,124 @@
+from backend.services.dedup import DuplicateDetector, LSHIndex, estimate_similarity
+from backend.services.resume_cache import ResumeCache
+from backend.services.knowledge_base import knowledge_base
+from backend.benchmarks.documents import write_pdf
+
+BASE = ("Jane Doe Senior Python Developer. Built data pipelines at Acme Corp using Pandas, NumPy and SQL. "
+        "Maintained customer-facing APIs at Globex using Flask and Docker. Designed internal dashboards "
+        "with React and TypeScript. Migrated the reporting platform to AWS with Terraform. "
+        "Education: B.Sc. Computer Science, class of 2015.")
+
+def test_near_duplicates_are_found_and_clustered(tmp_path):
+    print("--- Testing Near-Duplicate Detection ---")
+    detector = DuplicateDetector(threshold=0.8, path="")
+    edited = BASE + " Also shipped release tooling."
+    other = "John Smith, nurse with ten years of ward experience in paediatrics and emergency care."
+
+    base_sig, edited_sig, other_sig = (detector.signature(t) for t in (BASE, edited, other))
+    assert estimate_similarity(base_sig, edited_sig[None, :])[0] > 0.8
+    assert estimate_similarity(base_sig, other_sig[None, :])[0] < 0.2
+
+    detector.add("base", base_sig)
+    detector.add("other", other_sig)
+    doc_id, similarity = detector.find(edited_sig)
+    assert doc_id == "base" and similarity > 0.8
+    assert detector.find(base_sig, exclude="base") is None
+
+    clusters = detector.clusters(["a", "b", "c", "d"], texts=[BASE, other, edited, BASE])
+    assert clusters == [["a", "c", "d"]]
+
+    # The index survives a round trip to disk
+    path = str(tmp_path / "index.npz")
+    detector.index.save(path)
+    loaded = LSHIndex.load(path)
+    assert len(loaded) == 2
+    assert loaded.query(edited_sig, 0.8)[0][0] == "base"
+
+    print("[SUCCESS] Near-Duplicate Detection Test Passed!")
+
+def test_resume_cache_reuses_near_duplicate(tmp_path):
+    cache = ResumeCache(path=":memory:", detector=DuplicateDetector(threshold=0.8, path=""))
+    first_path, second_path = str(tmp_path / "v1.pdf"), str(tmp_path / "v2.pdf")
+    write_pdf(first_path, [[BASE]])
+    write_pdf(second_path, [[BASE + " Kubernetes."]])
+
+    first = cache.load_resume(first_path)
+    second = cache.load_resume(second_path)
+    assert "near_duplicate" not in first
+    assert second["near_duplicate"]["added_words"] >= 1
+    # Prior skills are kept, the skills in the added words are picked up
+    assert set(first["skills"]["Programming Languages"]) <= set(second["skills"]["Programming Languages"])
+    assert any("Kubernetes" in skills for skills in second["skills"].values())
+    assert cache.stats()["near_duplicates"] == 1
+
+def test_recall_at_the_configured_threshold():
+    import random
+    from backend.config import Config
+    from backend.services.dedup import optimal_bands, shingle_hashes
+
+    # The banding makes nearly every pair at the threshold an LSH candidate
+    bands, rows = optimal_bands(Config.DEDUP_THRESHOLD, Config.DEDUP_NUM_PERM)
+    assert 1 - (1 - Config.DEDUP_THRESHOLD ** rows) ** bands >= 0.95
+
+    rng = random.Random(3)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    detector = DuplicateDetector(path="")
+    pairs = []
+    for doc in range(200):
+        words = rng.sample(vocabulary, 300)
+        detector.add(doc, detector.signature(" ".join(words)))
+        edited = list(words)
+        for position in rng.sample(range(300), rng.randint(1, 3)):
+            edited[position] = rng.choice(vocabulary)
+        pairs.append((doc, " ".join(words), " ".join(edited)))
+
+    found = total = 0
+    for doc, text, edited in pairs:
+        a, b = set(shingle_hashes(text).tolist()), set(shingle_hashes(edited).tolist())
+        if len(a & b) / len(a | b) < Config.DEDUP_THRESHOLD + 0.02:
+            continue
+        total += 1
+        match = detector.find(detector.signature(edited))
+        found += match is not None and match[0] == doc
+    print(f"Recall above the threshold: {found}/{total}")
+    assert total >= 50 and found / total >= 0.9
+
+def test_evicted_entries_leave_the_index_and_saves_merge(tmp_path):
+    detector = DuplicateDetector(path="")
+    cache = ResumeCache(path=":memory:", max_mb=2000 / 1024 / 1024, detector=detector)
+    for i in range(20):
+        digest = f"digest-{i}"
+        detector.add(digest, detector.signature(f"{BASE} revision {i}"))
+        cache.put(cache._key(digest, "v1"), "v1", {"text": "x" * 200, "entities": []})
+    # The resumes whose cache entries were evicted are no longer duplicate candidates
+    assert 0 < len(detector.index) < 20
+    assert "digest-19" in detector.index.rows and "digest-0" not in detector.index.rows
+
+    # Two processes sharing the file keep each other's additions, and save periodically
+    path = str(tmp_path / "index.npz")
+    first = DuplicateDetector(path=path, save_every=1)
+    second = DuplicateDetector(path=path, save_every=1)
+    second.index
+    first.add("first", first.signature(BASE))
+    second.add("second", second.signature("John Smith, nurse with ten years of ward experience."))
+    assert set(LSHIndex.load(path).doc_ids) == {"first", "second"}
+    first.remove("first")
+    assert LSHIndex.load(path).doc_ids == ["second"]
+
+def test_near_duplicate_entities_follow_the_diff():
+    cache = ResumeCache(path=":memory:", detector=DuplicateDetector(path=""))
+    prior_text = "Acme hired me. Worked at Acme on Go services. Globex after Acme."
+    text = "Acme hired me in 2019. Worked at Acme on services. Globex after Acme."
+    prior = {"text": prior_text, "skills": {}, "entities": [
+        ("Acme", "ORG", 0, 4), ("Acme", "ORG", 25, 29), ("Go", "LANGUAGE", 33, 35),
+        ("Globex", "ORG", 46, 52), ("Acme", "ORG", 59, 63),
+    ]}
+    payload = cache._from_near_duplicate(text, [], prior, ("other-digest", 0.95), knowledge_base.current())
+
+    # Repeated entities keep their own occurrence, the removed one is gone
+    assert [ent[:2] for ent in payload["entities"]] == [("Acme", "ORG")] * 2 + [("Globex", "ORG"), ("Acme", "ORG")]
+    for ent_text, _, start, end in payload["entities"]:
+        assert text[start:end] == ent_text
+    assert len({ent[2] for ent in payload["entities"]}) == 4
+    # The other upload's digest is not handed to this caller
+    assert "other-digest" not in str(payload["near_duplicate"])
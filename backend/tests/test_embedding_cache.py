@@ -0,0 +1,58 @@
+import os
+import numpy as np
+from backend.services.embedding_cache import EmbeddingCache
+
+def test_cache_survives_restart(tmp_path):
+    print("--- Testing Embedding Cache ---")
+    cache = EmbeddingCache("test-model", cache_dir=str(tmp_path))
+    vector = np.array([0.6, 0.8, 0.0], dtype=np.float32)
+
+    assert cache.get("Python developer") is None
+    cache.put("Python developer", vector)
+    # Whitespace differences map to the same entry
+    assert np.allclose(cache.get("  Python   developer "), vector)
+    cache.flush()
+
+    # A fresh instance reads the vector back from the memory-mapped store
+    reopened = EmbeddingCache("test-model", cache_dir=str(tmp_path))
+    assert np.allclose(reopened.get("Python developer"), vector)
+    assert reopened.stats()["disk_hits"] == 1
+
+    # Other models never see each other's vectors
+    other = EmbeddingCache("other-model", cache_dir=str(tmp_path))
+    assert other.get("Python developer") is None
+
+    print("[SUCCESS] Embedding Cache Test Passed!")
+
+def test_memory_tier_is_size_bounded():
+    # Each vector is 4 floats = 16 bytes, so only two fit
+    cache = EmbeddingCache("test-model", max_memory_bytes=32)
+    for i in range(5):
+        cache.put(f"text {i}", np.ones(4, dtype=np.float32) * i)
+
+    stats = cache.stats()
+    assert stats["memory_entries"] == 2
+    assert cache.get("text 0") is None
+    assert np.allclose(cache.get("text 4"), 4)
+
+def test_disk_tier_is_shared_and_bounded(tmp_path):
+    # Two caches on one directory stand in for two worker processes
+    first = EmbeddingCache("test-model", cache_dir=str(tmp_path))
+    second = EmbeddingCache("test-model", cache_dir=str(tmp_path))
+    first.put("Python developer", np.array([1, 0, 0], dtype=np.float32))
+    second.put("Java developer", np.array([0, 1, 0], dtype=np.float32))
+    # Each sees the other's rows, and neither overwrote the other's
+    assert np.allclose(second.get("Python developer"), [1, 0, 0])
+    assert np.allclose(first.get("Java developer"), [0, 1, 0])
+    assert first.stats()["disk_hits"] == 1 and second.stats()["disk_hits"] == 1
+
+    # Four 12-byte rows fit: the fifth starts a new, empty generation instead of growing
+    bounded_dir = str(tmp_path / "bounded")
+    cache = EmbeddingCache("test-model", cache_dir=bounded_dir, max_memory_bytes=0, max_disk_bytes=48)
+    reader = EmbeddingCache("test-model", cache_dir=bounded_dir, max_memory_bytes=0)
+    for i in range(5):
+        cache.put(f"text {i}", np.full(3, i, dtype=np.float32))
+    assert cache.stats()["disk_entries"] == 1
+    assert np.allclose(reader.get("text 4"), 4) and reader.get("text 0") is None
+    vector_files = [name for name in os.listdir(bounded_dir) if name.endswith(".vectors")]
+    assert len(vector_files) == 1 and os.path.getsize(os.path.join(bounded_dir, vector_files[0])) <= 48
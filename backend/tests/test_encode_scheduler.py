@@ -0,0 +1,79 @@
+import threading
+import numpy as np
+from backend.services.encode_scheduler import EncodeScheduler
+
+def fake_encode(calls):
+    """Deterministic stand-in for a model: vector = [length, first char code]."""
+    def encode(texts):
+        calls.append(list(texts))
+        return np.array([[len(t), ord(t[0])] for t in texts], dtype=np.float32)
+    return encode
+
+def test_concurrent_requests_share_batches():
+    print("--- Testing Encode Scheduler ---")
+    calls = []
+    scheduler = EncodeScheduler(fake_encode(calls), max_batch_size=64, max_wait_ms=50)
+    start = threading.Barrier(16)
+    results = {}
+
+    def caller(i):
+        texts = [f"resume {i} " + "x" * i, "shared job description"]
+        start.wait()
+        results[i] = (texts, scheduler.encode(texts))
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Every caller gets its own rows, in its own order
+    for texts, vectors in results.values():
+        assert vectors.tolist() == [[len(t), ord(t[0])] for t in texts]
+
+    # 16 callers, far fewer model calls; each batch sorted by length, duplicates encoded once
+    assert len(calls) < 16
+    for batch in calls:
+        assert [len(t) for t in batch] == sorted(len(t) for t in batch)
+        assert len(batch) == len(set(batch))
+
+    stats = scheduler.stats()
+    assert stats["requests"] == 16 and stats["batches"] == len(calls)
+    assert stats["mean_batch_size"] > 2
+    print(f"[SUCCESS] {stats['requests']} requests served by {stats['batches']} batches")
+
+def test_errors_reach_every_caller():
+    def broken(texts):
+        raise RuntimeError("model failed")
+    scheduler = EncodeScheduler(broken, max_wait_ms=1)
+    try:
+        scheduler.encode(["a"])
+        raise AssertionError("expected the model error")
+    except RuntimeError as e:
+        assert str(e) == "model failed"
+    # The worker survives and keeps serving
+    scheduler.encode_fn = fake_encode([])
+    assert scheduler.encode(["ab"]).tolist() == [[2, 97]]
+
+def test_worker_survives_any_batch_error_and_callers_time_out():
+    import threading
+    # Too few rows back from the model: fails while handing out results, outside the model call
+    scheduler = EncodeScheduler(lambda texts: [[0, 0]], max_wait_ms=1, timeout=5)
+    try:
+        scheduler.encode(["a", "bb"])
+        raise AssertionError("expected the batch to fail")
+    except IndexError:
+        pass
+    scheduler.encode_fn = fake_encode([])
+    assert scheduler.encode(["ab"]).tolist() == [[2, 97]]
+
+    # A caller stops waiting on a stuck model call instead of blocking forever
+    release = threading.Event()
+    scheduler.encode_fn = lambda texts: release.wait(5) and [[len(t), 0] for t in texts]
+    try:
+        scheduler.encode(["stuck"], timeout=0.1)
+        raise AssertionError("expected a timeout")
+    except TimeoutError:
+        pass
+    release.set()
+    assert scheduler.encode(["ok"]).tolist() == [[2, 0]]
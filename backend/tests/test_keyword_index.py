@@ -0,0 +1,83 @@
+from backend.services.keyword_index import KeywordIndex
+
+DOCS = {
+    "jd-python": "Python Developer with Flask, REST APIs and PostgreSQL. Machine Learning is a plus.",
+    "jd-java": "Java Developer with Spring Boot, Hibernate and Microservices on AWS.",
+    "resume-ds": "Data Scientist. Python, Pandas, NumPy, scikit-learn and Machine Learning models.",
+    "resume-design": "Graphic Designer skilled in Photoshop, Illustrator and Figma.",
+}
+
+def build_index():
+    index = KeywordIndex()
+    for doc_id, text in DOCS.items():
+        index.add(doc_id, text)
+    return index
+
+def test_keyword_index_scoring():
+    print("--- Testing Keyword Index ---")
+    index = build_index()
+
+    good = index.score_pair(DOCS["resume-ds"], DOCS["jd-python"])
+    bad = index.score_pair(DOCS["resume-design"], DOCS["jd-python"])
+    print(f"Good: {good:.3f} | Bad: {bad:.3f}")
+    assert good > bad
+    assert abs(index.score_pair(DOCS["jd-java"], DOCS["jd-java"]) - 1.0) < 1e-9
+
+    # Batch scoring agrees with pairwise scoring
+    batch = index.score_many(DOCS["jd-python"], [DOCS["resume-ds"], DOCS["resume-design"]])
+    assert abs(batch[0] - good) < 1e-9 and abs(batch[1] - bad) < 1e-9
+
+    # BM25 search finds the Java posting first
+    results = index.search("spring boot java", top_k=2)
+    assert results[0][0] == "jd-java"
+
+    print("[SUCCESS] Keyword Index Test Passed!")
+
+def test_incremental_updates_and_persistence(tmp_path):
+    index = build_index()
+    assert index.remove("jd-java")
+    assert not index.remove("jd-java")
+    assert index.document_count == 3
+    assert index.search("spring boot java") == []
+
+    # Removing and re-adding a document gives the same statistics as never removing it
+    index.add("jd-java", DOCS["jd-java"])
+    fresh = build_index()
+    for term, term_id in fresh.vocabulary.items():
+        assert index.doc_freq[index.vocabulary[term]] == fresh.doc_freq[term_id]
+
+    path = str(tmp_path / "keyword_index.npz")
+    index.save(path)
+    loaded = KeywordIndex.load(path)
+    assert loaded.document_count == index.document_count
+    assert loaded.search("spring boot java", top_k=1)[0][0] == "jd-java"
+    assert abs(
+        loaded.score_pair(DOCS["resume-ds"], DOCS["jd-python"])
+        - index.score_pair(DOCS["resume-ds"], DOCS["jd-python"])
+    ) < 1e-9
+
+def test_evicted_terms_leave_the_vocabulary(tmp_path):
+    index = build_index()
+    base_terms = len(index.terms)
+    # A stream of documents with unique words, evicted oldest-first like the matching engine does
+    for i in range(200):
+        index.add(f"doc-{i}", f"uniqueword{i} anotherword{i} shared text")
+        for old_id in index.oldest(max(0, index.document_count - 10)):
+            index.remove(old_id)
+    # Bounded by the live documents (plus those not compacted yet), not by all 200
+    assert len(index.terms) < base_terms + 10 * 8
+
+    # Saving prunes what is left, and the ids stay consistent with the statistics
+    path = str(tmp_path / "keyword_index.npz")
+    index.save(path)
+    loaded = KeywordIndex.load(path)
+    assert len(loaded.terms) == len(index.terms) and min(loaded.doc_freq) > 0
+    fresh = KeywordIndex()
+    for doc_id in index.oldest(index.document_count):
+        fresh.add(doc_id, f"uniqueword{doc_id[4:]} anotherword{doc_id[4:]} shared text")
+    assert sorted(loaded.terms) == sorted(fresh.terms)
+    assert abs(loaded.score_pair("uniqueword199 shared", "shared text") -
+               fresh.score_pair("uniqueword199 shared", "shared text")) < 1e-9
+
+if __name__ == "__main__":
+    test_keyword_index_scoring()
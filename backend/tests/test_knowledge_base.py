@@ -0,0 +1,55 @@
+import os
+import json
+import shutil
+import backend.services.knowledge_base as knowledge_base_module
+from backend.services.knowledge_base import KnowledgeBase, DATA_DIR, SOURCE_FILES
+from backend.services.skill_extractor import SkillExtractor
+from backend.services.role_scorer import RoleScorer
+
+def make_kb(tmp_path):
+    data_dir = tmp_path / "data"
+    data_dir.mkdir(exist_ok=True)
+    for filename in SOURCE_FILES.values():
+        shutil.copy(os.path.join(DATA_DIR, filename), data_dir / filename)
+    return KnowledgeBase(str(data_dir), str(tmp_path / "kb.pickle"), reload_interval=-1)
+
+def test_cold_start_from_snapshot(tmp_path, monkeypatch):
+    print("--- Testing Knowledge Base Snapshot ---")
+    first = make_kb(tmp_path).current()
+    assert os.path.exists(tmp_path / "kb.pickle")
+
+    # A second worker must load the compiled snapshot instead of rebuilding it
+    def fail_build(*args, **kwargs):
+        raise AssertionError("snapshot should be loaded from disk")
+    monkeypatch.setattr(knowledge_base_module.KnowledgeBaseSnapshot, "__init__", fail_build)
+    second = make_kb(tmp_path).current()
+
+    assert second.version == first.version
+    assert second.matcher.patterns == first.matcher.patterns
+    assert second.roles.role_names == first.roles.role_names
+    assert (second.roles.weights != first.roles.weights).nnz == 0
+    print("[SUCCESS] Knowledge Base Snapshot Test Passed!")
+
+def test_hot_reload_swaps_snapshot(tmp_path):
+    kb = make_kb(tmp_path)
+    extractor = SkillExtractor(kb)
+    scorer = RoleScorer(kb)
+    old = kb.current()
+    text = "Built dashboards in Grafana and pipelines in Python."
+    assert "Grafana" not in sum(extractor.extract_skills(text, old).values(), [])
+    assert not kb.refresh()
+
+    skills_path = tmp_path / "data" / SOURCE_FILES["skills"]
+    skills_db = json.loads(skills_path.read_text(encoding="utf-8"))
+    skills_db.setdefault("Tools", []).append("Grafana")
+    skills_path.write_text(json.dumps(skills_db), encoding="utf-8")
+    os.utime(skills_path, (old.created_at + 10, old.created_at + 10))
+
+    assert kb.refresh()
+    new = kb.current()
+    assert new.version != old.version and new.skills_version != old.skills_version
+    assert "Grafana" in extractor.extract_skills(text)["Tools"]
+    # A request that pinned the old snapshot keeps a consistent view
+    assert "Grafana" not in sum(extractor.extract_skills(text, old).values(), [])
+    assert scorer.role_names == old.roles.role_names
+    assert kb.reloads == 1
@@ -1,4 +1,10 @@
+import os
+from backend.config import Config
+from backend.benchmarks.documents import write_pdf
+from backend.services.keyword_index import KeywordIndex
 from backend.services.matching_engine import matching_engine
+from backend.services.resume_parser import clean_text, segment_sections
+from backend.services.skill_extractor import skill_extractor
 
 def test_engine():
     print("--- Testing Matching Engine ---")
@@ -42,5 +48,76 @@ def test_engine():
     
     print("\n[SUCCESS] Test Passed: Logic holds up!")
 
+def test_rank():
+    print("--- Testing Ranking API ---")
+    jd_text = "Python Developer with Flask, REST APIs and PostgreSQL experience."
+    resumes = [
+        "Graphic Designer skilled in Photoshop, Illustrator and Figma.",
+        "Python backend developer building Flask REST APIs on PostgreSQL.",
+        "",
+    ]
+
+    ranked = matching_engine.rank(jd_text, resumes)
+    print(f"Ranking: {ranked}")
+
+    assert [r['index'] for r in ranked][0] == 1, "Python developer should rank first"
+    assert ranked[-1]['index'] == 2 and ranked[-1]['overall_score'] == 0.0
+    assert len(matching_engine.rank(jd_text, resumes, top_k=1)) == 1
+
+    print("\n[SUCCESS] Ranking Test Passed!")
+
+def test_section_scores():
+    print("--- Testing Section Scores ---")
+    jd_text = "Python Developer with Flask, REST APIs and PostgreSQL experience."
+    raw_resume = ("Jane Doe\nSummary\nBackend developer who enjoys hiking.\n"
+                  "Experience\nBuilt Flask REST APIs on PostgreSQL at Acme Corp.\n"
+                  "Skills\nPython, Flask, PostgreSQL, Docker\nEducation\nB.Sc. Art History, class of 2015")
+    resume = clean_text(raw_resume)
+    sections = segment_sections(raw_resume)
+    assert [s.name for s in sections] == ["header", "summary", "experience", "skills", "education"]
+
+    # Skill hits are bucketed into sections by offset during the one extraction pass
+    skill_extractor.extract_skills(resume, sections=sections)
+    assert "Flask" in sections[2].skills and "Docker" in sections[3].skills
+    assert sections[4].skills == []
+
+    spans = [(s.start, s.end) for s in sections]
+    scores = matching_engine.evaluate(resume, jd_text, sections=spans)
+    print(f"Scores: {scores}")
+    assert len(scores["sections"]) == len(sections)
+    # The whole-resume keyword score is unchanged by the bucketing
+    assert scores["keyword_match"] == matching_engine.evaluate(resume, jd_text)["keyword_match"]
+    experience, education = scores["sections"][2], scores["sections"][4]
+    assert experience["keyword_match"] > education["keyword_match"]
+
+    print("\n[SUCCESS] Section Scores Test Passed!")
+
+def test_analysis_populates_keyword_index(tmp_path, monkeypatch):
+    print("--- Testing Corpus Keyword Index ---")
+    from backend.services.analysis_service import _analyze
+
+    index_path = str(tmp_path / "keywords.npz")
+    monkeypatch.setattr(Config, "KEYWORD_INDEX_PATH", index_path)
+    monkeypatch.setattr(Config, "KEYWORD_INDEX_SAVE_EVERY", 1)
+    monkeypatch.setattr(matching_engine, "_keyword_index", KeywordIndex())
+    jd_text = "Python Developer with Flask and PostgreSQL. Kubernetes is a plus."
+    path = str(tmp_path / "resume.pdf")
+    write_pdf(path, [["Jane Doe - Python developer. Built Flask services on PostgreSQL."]])
+    with open(path, 'rb') as f:
+        _analyze(f.read(), "resume.pdf", jd_text=jd_text)
+
+    # The production engine saw the resume and the JD, so IDF is no longer flat
+    index = matching_engine.keyword_index
+    assert index.document_count == 2
+    python, kubernetes = index.vocabulary["python"], index.vocabulary["kubernetes"]
+    print(f"IDF python={index.idf(python):.3f} kubernetes={index.idf(kubernetes):.3f}")
+    assert index.idf(python) < index.idf(kubernetes)
+    assert os.path.exists(index_path)
+    assert KeywordIndex.load(index_path).document_count == 2
+
+    print("\n[SUCCESS] Corpus Keyword Index Test Passed!")
+
 if __name__ == "__main__":
     test_engine()
+    test_rank()
+    test_section_scores()
@@ -0,0 +1,60 @@
+from backend.services.metrics import Metrics
+
+def test_spans_and_exposition():
+    print("--- Testing Metrics ---")
+    metrics = Metrics(enabled=True)
+
+    @metrics.timed("parse_resume")
+    def parse(fail=False):
+        if fail:
+            raise ValueError("bad file")
+        return "text"
+
+    assert parse() == "text"
+    try:
+        parse(fail=True)
+    except ValueError:
+        pass
+    with metrics.span("score_roles"):
+        pass
+    metrics.record_error("keyword_score")
+    metrics.register_stats("nlp_cache", lambda: {"hits": 3, "misses": 1, "hit_ratio": 0.75, "model": "md"},
+                           counters=("hits", "misses"))
+
+    snapshot = metrics.snapshot()
+    assert snapshot["parse_resume"]["ok"]["count"] == 1
+    assert snapshot["parse_resume"]["error"]["count"] == 1
+    assert snapshot["score_roles"]["ok"]["count"] == 1
+
+    text = metrics.render()
+    print(text)
+    assert '# TYPE resumexpert_stage_duration_seconds histogram' in text
+    assert 'resumexpert_stage_duration_seconds_bucket{stage="parse_resume",outcome="error",le="+Inf"} 1' in text
+    assert 'resumexpert_stage_duration_seconds_count{stage="score_roles",outcome="ok"} 1' in text
+    assert 'resumexpert_stage_errors_total{stage="keyword_score"} 1' in text
+    assert 'resumexpert_nlp_cache_hits_total 3' in text
+    assert 'resumexpert_nlp_cache_hit_ratio 0.75' in text
+    # Non-numeric stats are skipped
+    assert 'model' not in text
+
+    # Buckets are cumulative
+    metrics.observe("encode", 0.003)
+    metrics.observe("encode", 0.3)
+    text = metrics.render()
+    assert 'resumexpert_stage_duration_seconds_bucket{stage="encode",outcome="ok",le="0.005"} 1' in text
+    assert 'resumexpert_stage_duration_seconds_bucket{stage="encode",outcome="ok",le="0.5"} 2' in text
+    print("[SUCCESS] Metrics Test Passed!")
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics(enabled=False)
+
+    @metrics.timed("parse_resume")
+    def parse():
+        return "text"
+
+    assert parse() == "text"
+    with metrics.span("score_roles"):
+        pass
+    metrics.record_error("keyword_score")
+    assert metrics.snapshot() == {}
+    assert "stage=" not in metrics.render()
@@ -0,0 +1,45 @@
+import threading
+import time
+from types import SimpleNamespace
+from backend.services.nlp_processor import NLPProcessor
+
+class FakeDoc(SimpleNamespace):
+    def __iter__(self):
+        return iter(self.tokens)
+
+class FakePipeline:
+    """Stands in for spaCy: words become lemmas, capitalized words become ORG entities."""
+    pipe_names = ["tok2vec", "tagger", "attribute_ruler", "lemmatizer", "ner"]
+
+    def __call__(self, text, disable=()):
+        time.sleep(0.05)  # long enough for concurrent callers to overlap
+        tokens, ents, offset = [], [], 0
+        for word in text.split():
+            start = text.index(word, offset)
+            offset = start + len(word)
+            tokens.append(SimpleNamespace(lemma_=word, is_stop=False, is_punct=False, is_space=False))
+            if word[0].isupper():
+                ents.append(SimpleNamespace(text=word, label_="ORG", start_char=start, end_char=offset))
+        return FakeDoc(tokens=tokens, ents=ents)
+
+def test_concurrent_tasks_do_not_share_a_mutable_analysis():
+    processor = NLPProcessor()
+    processor.nlp = FakePipeline()
+    text = "worked at Acme on data pipelines"
+
+    # Prime the cache with tokens only, then ask for entities from two threads at once
+    first = processor.analyze(text, ("tokens",))
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(processor.analyze(text, ("entities",))))
+               for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # The object handed out earlier was not filled in behind its holder's back
+    assert first.entities is None
+    for result in results:
+        assert result.entities == [("Acme", "ORG", 10, 14)]
+    cached = processor.analyze(text)
+    assert cached.tokens == first.tokens and cached.entities == [("Acme", "ORG", 10, 14)]
@@ -0,0 +1,122 @@
+import json
+import threading
+from backend.services.persistence import SQLiteStore, WriteBehindWriter, analysis_rows
+
+RESULT = {
+    "file": "resume.pdf",
+    "skills": {"Programming Languages": ["Python"], "Databases": ["SQL"]},
+    "match": {"overall_score": 70.0, "keyword_match": 60.0, "semantic_match": 76.7},
+    "role_analysis": [
+        {"role": "Python Developer", "score": 80.0, "missing_critical_skills": ["Django"], "matched_skills": ["Python"]},
+        {"role": "Data Analyst", "score": 50.0, "missing_critical_skills": ["Excel"], "matched_skills": ["SQL"]},
+    ],
+    "recommendations": [{"type": "Critical Skill", "text": "Learn Django.", "priority": "High"}],
+    "roadmap_role": "Python Developer",
+    "roadmap": [{"week": "1-2", "topic": "Django basics"}],
+}
+
+class FlakyStore(SQLiteStore):
+    """Fails the first `failures` insert calls, then behaves like SQLite."""
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+        self.calls = []
+        self.attempted = threading.Event()
+
+    def insert_many(self, table, rows):
+        self.calls.append((table, len(rows)))
+        self.attempted.set()
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database unavailable")
+        super().insert_many(table, rows)
+
+class LostReplyStore(SQLiteStore):
+    """Inserts the first call's rows but reports a failure, like a response lost after the commit."""
+    def __init__(self):
+        super().__init__()
+        self.lost = False
+
+    def insert_many(self, table, rows):
+        super().insert_many(table, rows)
+        if not self.lost:
+            self.lost = True
+            raise ConnectionError("connection reset")
+
+def test_analysis_rows_link_children():
+    print("--- Testing Persistence Rows ---")
+    analysis_id, rows = analysis_rows(RESULT, "Python developer", "resume text")
+    assert rows["resume_analysis"][0]["analysis_id"] == analysis_id
+    assert rows["resume_analysis"][0]["matched_skills"] == ["Python", "SQL"]
+    assert [r["best_fit_role"] for r in rows["role_scores"]] == [True, False]
+    for table in ("role_scores", "recommendations", "learning_roadmaps"):
+        assert rows[table] and all(r["analysis_id"] == analysis_id for r in rows[table])
+    assert rows["learning_roadmaps"][0]["role_name"] == "Python Developer"
+
+def test_write_behind_bulk_flush():
+    store = SQLiteStore()
+    writer = WriteBehindWriter(store, batch_size=1000, flush_interval=60)
+    ids = []
+    for _ in range(50):
+        analysis_id, rows = analysis_rows(RESULT)
+        ids.append(analysis_id)
+        assert writer.submit(rows)
+
+    # Nothing is written until a flush; close() flushes the rest in one bulk insert per table
+    writer.close()
+    assert store.count("resume_analysis") == 50
+    assert store.count("role_scores") == 100
+    assert store.count("learning_roadmaps") == 50
+    stats = writer.stats()
+    print(f"Writer stats: {stats}")
+    assert stats["written"] == 50 * 5 and stats["flushes"] == 1 and stats["dropped"] == 0
+
+    roadmap = store._conn.execute(
+        "SELECT roadmap_json FROM learning_roadmaps WHERE analysis_id = ?", (ids[0],)
+    ).fetchone()[0]
+    assert json.loads(roadmap) == RESULT["roadmap"]
+
+def test_write_behind_retries_with_backoff():
+    store = FlakyStore(failures=2)
+    writer = WriteBehindWriter(store, batch_size=1000, flush_interval=60, backoff=0.01)
+    writer.submit(analysis_rows(RESULT)[1])
+    assert writer.flush() == 5
+    assert store.count("resume_analysis") == 1
+    # Two failed attempts on the parent table, then one insert per table
+    assert [t for t, _ in store.calls] == ["resume_analysis"] * 3 + ["role_scores", "recommendations", "learning_roadmaps"]
+
+    # A store that never recovers: the batch is given up and counted, not retried forever
+    store = FlakyStore(failures=100)
+    writer = WriteBehindWriter(store, batch_size=1000, flush_interval=60, max_retries=2, backoff=0.01)
+    writer.submit(analysis_rows(RESULT)[1])
+    assert writer.flush() == 0
+    assert writer.stats()["failed"] == 5
+    assert len(store.calls) == 3
+
+def test_submit_never_blocks_when_full():
+    writer = WriteBehindWriter(SQLiteStore(), batch_size=1000, flush_interval=60, max_queue=1)
+    # Fill the queue without letting the background thread start draining it
+    writer._thread = object()
+    assert writer.submit(analysis_rows(RESULT)[1])
+    assert not writer.submit(analysis_rows(RESULT)[1])
+    assert writer.stats()["dropped"] == 5
+
+def test_retries_are_idempotent_and_close_skips_backoff():
+    store = LostReplyStore()
+    writer = WriteBehindWriter(store, batch_size=1000, flush_interval=60, backoff=0.01)
+    writer.submit(analysis_rows(RESULT)[1])
+    # The retry re-sends rows that already landed: they are skipped, not a duplicate-key failure
+    assert writer.flush() == 5
+    assert store.count("resume_analysis") == 1 and writer.stats()["failed"] == 0
+
+    store = FlakyStore(failures=100)
+    writer = WriteBehindWriter(store, batch_size=1000, flush_interval=60, max_retries=5, backoff=1.0)
+    writer.submit(analysis_rows(RESULT)[1])
+    flushing = threading.Thread(target=writer.flush)
+    flushing.start()
+    assert store.attempted.wait(10)
+    # A flush in backoff neither blocks close() nor keeps it waiting for the remaining ~30 s
+    writer.close()
+    flushing.join(10)
+    assert not flushing.is_alive()
+    assert writer.stats()["failed"] == 5
@@ -0,0 +1,95 @@
+import os
+import json
+from backend.config import Config
+from backend.services.metrics import metrics
+from backend.services.matching_engine import MatchingEngine
+from backend.services.profiling import Profiler, run_inline
+
+def fake_pipeline():
+    with metrics.span("parse_resume"):
+        text = " ".join(f"skill{i}" for i in range(5000))
+    with metrics.span("extract_skills"):
+        return [word for word in text.split() if word.endswith("7")]
+
+def test_forced_profile_writes_dump(tmp_path):
+    print("--- Testing Sampled Profiling ---")
+    profiler = Profiler(str(tmp_path), sample_rate=0, max_bytes=10 * 1024 * 1024, store_inputs=True)
+
+    # Not sampled and not forced: nothing is profiled
+    with profiler.maybe_profile(b"resume bytes", "resume.pdf") as dump_dir:
+        fake_pipeline()
+    assert dump_dir is None and profiler.dumps() == []
+
+    with profiler.maybe_profile(b"resume bytes", "resume.pdf", forced=True, jd_text="Python") as dump_dir:
+        fake_pipeline()
+    assert sorted(os.listdir(dump_dir)) == ["input.pdf", "profile.pstats", "report.json", "request.json"]
+
+    with open(os.path.join(dump_dir, "report.json")) as f:
+        report = json.load(f)
+    print(f"Report: wall {report['wall_ms']} ms, peak {report['peak_memory_kb']} KB, stages {report['stages']}")
+    assert os.path.basename(dump_dir).endswith(report["input_sha256"][:12])
+    assert set(report["stages"]) == {"parse_resume", "extract_skills"}
+    assert any("fake_pipeline" in row["function"] for row in report["top_functions"])
+    assert report["peak_memory_kb"] > 0
+    with open(os.path.join(dump_dir, "request.json")) as f:
+        assert json.load(f) == {"jd_text": "Python", "filename": "resume.pdf"}
+
+def test_profiles_are_rotated_and_exclusive(tmp_path):
+    profiler = Profiler(str(tmp_path), sample_rate=1.0, max_bytes=1, store_inputs=False)
+    for i in range(3):
+        with profiler.maybe_profile(f"resume {i}".encode(), "resume.docx") as dump_dir:
+            fake_pipeline()
+        # Over budget: only the newest dump survives
+        assert profiler.dumps() == [dump_dir]
+    assert "input.docx" not in os.listdir(dump_dir)
+
+    # A second profile while one is running is skipped, not queued
+    with profiler.maybe_profile(b"a", "a.pdf") as outer:
+        with profiler.maybe_profile(b"b", "b.pdf") as inner:
+            pass
+    assert outer is not None and inner is None
+    assert profiler.stats()["skipped_busy"] == 1
+    # ... and the overlap is recorded, since it pollutes the memory figures
+    with open(os.path.join(outer, "report.json")) as f:
+        assert json.load(f)["concurrency"] == {"in_flight_at_start": 1, "max_in_flight": 2}
+
+def test_profiled_request_runs_worker_stages_inline(tmp_path, monkeypatch):
+    # Stub encoder and no disk cache: nothing is downloaded or written outside tmp_path
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_DIR", "")
+    monkeypatch.setattr(Config, "ENCODE_BATCHING", True)
+    engine = MatchingEngine(backend="stub")
+    profiler = Profiler(str(tmp_path), sample_rate=0, store_inputs=False)
+    assert not run_inline()
+
+    # The encode scheduler is bypassed, so the model call is timed and profiled on this thread
+    with profiler.maybe_profile(b"resume", "resume.pdf", forced=True) as dump_dir:
+        assert run_inline()
+        engine.encode(["text only encoded by the profiled request"])
+    assert not run_inline()
+    with open(os.path.join(dump_dir, "report.json")) as f:
+        assert "transformer" in json.load(f)["stages"]
+
+def test_replay_runs_the_analysis_pipeline(tmp_path, monkeypatch):
+    from backend.benchmarks.documents import write_pdf
+    from backend.services.profiling import replay
+    monkeypatch.setattr(Config, "KEYWORD_INDEX_PATH", "")
+    pdf_path = str(tmp_path / "resume.pdf")
+    write_pdf(pdf_path, [["Jane Doe. Experience: Python developer with Flask, Docker and SQL."]])
+    with open(pdf_path, 'rb') as f:
+        file_bytes = f.read()
+
+    profiler = Profiler(str(tmp_path / "dumps"), sample_rate=0, store_inputs=True)
+    with profiler.maybe_profile(file_bytes, "resume.pdf", forced=True, jd_text=None) as dump_dir:
+        pass
+    report = replay(dump_dir, output_dir=str(tmp_path / "replays"))
+    # The same stages as a request, including section segmentation and the duplicate lookup
+    assert report["error"] is None
+    assert {"analyze", "parse_resume", "extract_skills"} <= set(report["stages"])
+
+    # A dump written without its inputs cannot be replayed, and says so
+    os.remove(os.path.join(dump_dir, "request.json"))
+    try:
+        replay(dump_dir, output_dir=str(tmp_path / "replays"))
+        assert False, "replay should fail without request.json"
+    except FileNotFoundError as e:
+        assert "PROFILE_STORE_INPUTS" in str(e)
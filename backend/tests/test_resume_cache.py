@@ -0,0 +1,56 @@
+import backend.services.resume_cache as resume_cache_module
+from backend.services.resume_cache import ResumeCache
+from backend.services.knowledge_base import knowledge_base
+from backend.benchmarks.documents import write_pdf
+
+def test_resubmitted_resume_skips_parsing(tmp_path, monkeypatch):
+    print("--- Testing Resume Cache ---")
+    path = str(tmp_path / "resume.pdf")
+    write_pdf(path, [["Jane Doe - Python Developer with Flask, Docker and SQL experience."]])
+    cache = ResumeCache(path=":memory:")
+
+    first = cache.load_resume(path)
+    assert not first["cached"]
+    assert "Python" in first["skills"]["Programming Languages"]
+
+    # A second submission must not touch the parser at all
+    def fail_parse(_):
+        raise AssertionError("parse_resume should not run on a cache hit")
+    monkeypatch.setattr(resume_cache_module, "parse_resume", fail_parse)
+
+    second = cache.load_resume(path)
+    assert second["cached"]
+    assert second["text"] == first["text"] and second["skills"] == first["skills"]
+
+    # A new skills database version invalidates the entry
+    monkeypatch.setattr(knowledge_base, "refresh", lambda: False)
+    monkeypatch.setattr(knowledge_base.current(), "skills_version", "edited-taxonomy")
+    monkeypatch.setattr(resume_cache_module, "parse_resume", lambda _, raw=False: first["text"])
+    third = cache.load_resume(path)
+    assert not third["cached"]
+    assert cache.stats()["hits"] == 1
+
+    print("[SUCCESS] Resume Cache Test Passed!")
+
+def test_size_bounded_eviction():
+    cache = ResumeCache(path=":memory:", max_mb=0)
+    cache.max_bytes = 1000
+    for i in range(20):
+        cache.put(f"key-{i}", "v1", {"text": "x" * 100, "skills": {}, "entities": []})
+
+    conn = cache._connect()
+    total = conn.execute("SELECT SUM(size) FROM resume_cache").fetchone()[0]
+    assert total <= 1000
+    # The most recent entry survives, the oldest is gone
+    assert cache.get("key-19") is not None
+    assert cache.get("key-0") is None
+
+def test_sections_are_cached_with_their_skills(tmp_path):
+    path = str(tmp_path / "resume.pdf")
+    write_pdf(path, [["Jane Doe", "Experience: Built Flask APIs", "Skills: Python, Docker"]])
+    cache = ResumeCache(path=":memory:")
+
+    first = cache.load_resume(path)
+    assert [s["name"] for s in first["sections"]] == ["header", "experience", "skills"]
+    assert "Flask" in first["sections"][1]["skills"] and "Docker" in first["sections"][2]["skills"]
+    assert cache.load_resume(path)["sections"] == first["sections"]
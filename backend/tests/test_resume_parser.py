@@ -0,0 +1,148 @@
+from backend.services.resume_parser import (
+    parse_pdf_detailed, parse_resume, iter_pdf_pages, fast_text_is_usable, segment_sections
+)
+from backend.benchmarks.documents import write_pdf
+
+PAGES = [
+    ["Jane Doe - Python Developer", "Skills: Python, Flask, SQL"],
+    ["Experience: Built REST APIs with Flask and PostgreSQL"],
+    ["Education: B.Sc. Computer Science"],
+]
+
+def test_streaming_and_limits(tmp_path):
+    print("--- Testing Resume Parser ---")
+    path = str(tmp_path / "resume.pdf")
+    write_pdf(path, PAGES)
+
+    pages = list(iter_pdf_pages(path, tiered=False))
+    assert [number for number, _, _ in pages] == [0, 1, 2]
+    assert "Python Developer" in pages[0][1]
+    assert {tier for _, _, tier in pages} == {"layout"}
+
+    full = parse_pdf_detailed(path, parallel=False)
+    assert not full["truncated"] and full["pages_parsed"] == 3
+    assert "Computer Science" in full["text"]
+
+    capped = parse_pdf_detailed(path, max_pages=2, parallel=False)
+    assert capped["truncated"] and capped["reason"] == "max_pages"
+    assert "Computer Science" not in capped["text"]
+
+    small = parse_pdf_detailed(path, max_bytes=20, parallel=False)
+    assert small["reason"] == "max_bytes" and len(small["text"].encode("utf-8")) <= 20
+
+    # parse_resume keeps returning cleaned text
+    text = parse_resume(path)
+    assert text.startswith("Jane Doe") and "\n" not in text
+
+    print("[SUCCESS] Resume Parser Test Passed!")
+
+def test_tiered_extraction(tmp_path):
+    path = str(tmp_path / "resume.pdf")
+    write_pdf(path, PAGES)
+
+    result = parse_pdf_detailed(path, parallel=False)
+    layout_only = [text for _, text, _ in iter_pdf_pages(path, tiered=False)]
+    # Text-rich pages take the fast tier, the short last page falls back to layout analysis
+    assert result["page_tiers"] == ["fast", "fast", "layout"]
+    assert result["text"] == "\n".join(layout_only)
+
+    assert not fast_text_is_usable("")
+    assert not fast_text_is_usable("P y t h o n D e v e l o p e r w i t h F l a s k a n d S Q L")
+    assert not fast_text_is_usable("ExperiencedPythonBackendDeveloperSkilledInFlaskAndPostgreSQL")
+    assert fast_text_is_usable("Experienced Python backend developer skilled in Flask and PostgreSQL.")
+
+def test_parallel_extraction_matches_sequential(tmp_path, monkeypatch):
+    from backend.config import Config
+    monkeypatch.setattr(Config, "PDF_WORKERS", 2)
+    monkeypatch.setattr(Config, "PDF_PARALLEL_MIN_PAGES", 2)
+
+    path = str(tmp_path / "long.pdf")
+    write_pdf(path, PAGES * 4)
+
+    sequential = parse_pdf_detailed(path, parallel=False)
+    parallel = parse_pdf_detailed(path, parallel=True)
+    assert parallel["text"] == sequential["text"]
+    assert parallel["pages_parsed"] == 12
+
+    # A timed-out request cancels only its own ranges; the shared workers stay up
+    from backend.services import resume_parser
+    rushed = parse_pdf_detailed(path, parallel=True, time_budget=0.001)
+    assert rushed["truncated"] and rushed["reason"] == "time_budget"
+    pool = resume_parser._pdf_pool
+    again = parse_pdf_detailed(path, parallel=True)
+    assert resume_parser._pdf_pool is pool and again["text"] == sequential["text"]
+    # Workers are never forked from this (multi-threaded) process
+    assert pool._mp_context.get_start_method() in ("forkserver", "spawn")
+
+def test_pdf_is_parsed_once(tmp_path, monkeypatch):
+    from backend.services import resume_parser
+    path = str(tmp_path / "resume.pdf")
+    write_pdf(path, PAGES)
+    readers = []
+    real_reader = resume_parser.PdfReader
+
+    def counting_reader(*args, **kwargs):
+        readers.append(args)
+        return real_reader(*args, **kwargs)
+    monkeypatch.setattr(resume_parser, "PdfReader", counting_reader)
+
+    # One reader serves the page count and the page texts
+    result = parse_pdf_detailed(path, parallel=False)
+    assert result["pages_parsed"] == 3 and len(readers) == 1
+
+def test_slow_page_respects_time_budget(tmp_path, monkeypatch):
+    import time
+    from backend.services import resume_parser
+    path = str(tmp_path / "resume.pdf")
+    write_pdf(path, PAGES)
+    real_iter = resume_parser.iter_pdf_pages
+
+    def stuck_on_second_page(*args, **kwargs):
+        for page in real_iter(*args, **kwargs):
+            if page[0] == 1:
+                time.sleep(2)
+            yield page
+    monkeypatch.setattr(resume_parser, "iter_pdf_pages", stuck_on_second_page)
+
+    # The deadline is enforced while a page is still being extracted, not only between pages
+    started = time.monotonic()
+    result = parse_pdf_detailed(path, parallel=False, time_budget=0.5)
+    assert time.monotonic() - started < 1.5
+    assert result["reason"] == "time_budget" and result["pages_parsed"] == 1
+    assert "Python Developer" in result["text"]
+
+def test_segment_sections(tmp_path):
+    path = str(tmp_path / "resume.pdf")
+    write_pdf(path, PAGES)
+    raw_text = parse_resume(path, raw=True)
+    text = parse_resume(path)
+
+    # Headings are found on the raw lines and the spans tile the cleaned text
+    sections = segment_sections(raw_text)
+    assert [s.name for s in sections] == ["header", "skills", "experience", "education"]
+    assert sections[0].start == 0 and sections[-1].end == len(text)
+    assert all(a.end == b.start for a, b in zip(sections, sections[1:]))
+    assert text[sections[2].start:sections[2].end].startswith("Experience: Built REST APIs")
+    assert text[sections[3].start:].startswith("Education: B.Sc.")
+
+    # Heading words inside sentences, job titles, company names and bullets are not headings
+    raw_text = "\n".join([
+        "Jane Doe",
+        "Customer Experience Manager",
+        "Data scientist with 5 years of Experience in ML.",
+        "WORK EXPERIENCE",
+        "Experience Team Lead, Acme 2019",
+        "Employment Hero (2020 - 2023)",
+        "Managed Key Projects For enterprise clients",
+        "  Skills  ",
+        "Python, Summit Technologies Inc",
+        "Experience",
+        "Kept inside the skills section",
+    ])
+    sections = segment_sections(raw_text)
+    assert [s.name for s in sections] == ["header", "experience", "skills"]
+    text = " ".join(raw_text.split())
+    assert text[sections[1].start:sections[1].end].startswith("WORK EXPERIENCE Experience Team Lead")
+    assert text[sections[2].start:] == "Skills Python, Summit Technologies Inc Experience Kept inside the skills section"
+    assert segment_sections("Python developer with experience in Flask.") == []
+    assert segment_sections("Customer Experience Manager\nEmployment Hero (2020 - 2023)") == []
@@ -0,0 +1,58 @@
+import random
+from backend.services.role_scorer import role_scorer
+
+def legacy_score_roles(extracted_skills):
+    """The original per-role loop, kept here as the reference implementation."""
+    user_skills_set = {skill.lower() for skills in extracted_skills.values() for skill in skills}
+    results = []
+    for role, data in role_scorer.role_requirements.items():
+        critical = data.get("critical_skills", [])
+        recommended = data.get("recommended_skills", [])
+        critical_matches = [s for s in critical if s.lower() in user_skills_set]
+        rec_matches = [s for s in recommended if s.lower() in user_skills_set]
+        missing_critical = [s for s in critical if s.lower() not in user_skills_set]
+        max_score = (len(critical) * 2) + len(recommended) or 1
+        my_score = (len(critical_matches) * 2) + len(rec_matches)
+        results.append({
+            "role": role,
+            "score": round((my_score / max_score) * 100, 1),
+            "missing_critical_skills": missing_critical,
+            "matched_skills": critical_matches + rec_matches
+        })
+    results.sort(key=lambda x: x['score'], reverse=True)
+    return results
+
+def random_candidates(count, seed=7):
+    vocabulary = sorted({
+        skill for data in role_scorer.role_requirements.values()
+        for skill in data.get("critical_skills", []) + data.get("recommended_skills", [])
+    }) + ["Photoshop", "COBOL"]
+    rng = random.Random(seed)
+    return [
+        {"Skills": [s.upper() if rng.random() < 0.2 else s for s in rng.sample(vocabulary, rng.randint(0, 12))]}
+        for _ in range(count)
+    ]
+
+def test_matches_legacy_scoring():
+    print("--- Testing vectorized Role Scorer ---")
+    candidates = random_candidates(300) + [{}]
+    for extracted_skills in candidates:
+        assert role_scorer.score_roles(extracted_skills) == legacy_score_roles(extracted_skills)
+    print("[SUCCESS] Vectorized scoring matches legacy output!")
+
+def test_top_k_and_batch_api():
+    candidates = random_candidates(50, seed=11)
+    batch = role_scorer.score_roles_many(candidates, top_k=3)
+    matrix = role_scorer.score_matrix(candidates)
+    assert matrix.shape == (len(candidates), len(role_scorer.role_names))
+
+    for extracted_skills, ranked, row in zip(candidates, batch, matrix):
+        expected = legacy_score_roles(extracted_skills)
+        assert role_scorer.score_roles(extracted_skills, top_k=3) == expected[:3]
+        assert ranked == expected[:3]
+        for result in expected:
+            assert row[role_scorer.role_names.index(result["role"])] == result["score"]
+
+if __name__ == "__main__":
+    test_matches_legacy_scoring()
+    test_top_k_and_batch_api()
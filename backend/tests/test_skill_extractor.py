@@ -0,0 +1,88 @@
+import re
+from backend.services.skill_extractor import skill_extractor
+from backend.services.nlp_processor import nlp_processor
+
+# Small regression corpus covering the tricky skill shapes (symbols, dots, slashes, multi-word)
+CORPUS = [
+    "Senior Python developer. Built REST APIs with Flask, FastAPI and Node.js services.",
+    "Skills: C, C++, C#, Java, Go; CI/CD with Jenkins and GitHub Actions on AWS (Amazon Web Services).",
+    "Frontend engineer - React.js, Next.js, Vue.js, HTML5/CSS3, Tailwind CSS and TypeScript.",
+    "Data Scientist: Machine Learning, Deep Learning, NLP with PyTorch, TensorFlow, Pandas & NumPy.",
+    "Databases: PostgreSQL, MySQL, MongoDB, Redis, Microsoft SQL Server, SQLite, NoSQL stores.",
+    "Graphic Designer with 5 years of experience in Photoshop, Illustrator and Figma.",
+    "Javascript-heavy stack; gopher at heart; r&d projects in scala and rust.",
+    "",
+]
+
+def legacy_extract_skills(text, tokens):
+    """The original per-skill regex loop, kept here as the reference implementation."""
+    found_skills = {category: [] for category in skill_extractor.skills_db.keys()}
+    if not text:
+        return found_skills
+    text_lower = text.lower()
+    for category, skill_list in skill_extractor.skills_db.items():
+        for skill in skill_list:
+            skill_lower = skill.lower()
+            if skill_lower in tokens:
+                found_skills[category].append(skill)
+                continue
+            escaped_skill = re.escape(skill_lower)
+            if re.search(r'\b' + escaped_skill + r'\b', text_lower):
+                found_skills[category].append(skill)
+            elif skill_lower in text_lower and not skill_lower.isalpha():
+                found_skills[category].append(skill)
+    for category in found_skills:
+        found_skills[category] = list(set(found_skills[category]))
+    return found_skills
+
+def test_matches_legacy_output():
+    print("--- Testing Skill Extractor against legacy matcher ---")
+    for text in CORPUS:
+        tokens = set(nlp_processor.preprocess_text(text))
+        expected = legacy_extract_skills(text, tokens)
+        actual = skill_extractor.extract_skills(text)
+
+        assert expected.keys() == actual.keys()
+        for category in expected:
+            assert sorted(expected[category]) == sorted(actual[category]), \
+                f"Mismatch in '{category}' for: {text!r}"
+
+    print("[SUCCESS] Compiled matcher matches legacy output!")
+
+def test_special_character_skills():
+    found = skill_extractor.extract_skills("Worked with C++, C#, Node.js and CI/CD pipelines.")
+    flat = {skill for skills in found.values() for skill in skills}
+    for skill in ["C++", "C#", "Node.js", "CI/CD"]:
+        assert skill in flat, f"{skill} should be detected"
+    # 'Go' must not be found inside other words
+    assert "Go" not in flat
+
+def test_bulk_extraction_preserves_order():
+    bulk = list(skill_extractor.extract_skills_many(iter(CORPUS), batch_size=3))
+    assert len(bulk) == len(CORPUS)
+    for text, result in zip(CORPUS, bulk):
+        single = skill_extractor.extract_skills(text)
+        for category in single:
+            assert sorted(single[category]) == sorted(result[category])
+
+def test_update_drops_removed_short_skills():
+    # 'R' and 'Go' are deleted but their letters live on inside other words
+    before = "Data analyst using R, Go and SQL. Previously at Google on reporting."
+    after = "Data analyst using SQL. Previously at Google on reporting, then JavaScript."
+    prior = skill_extractor.extract_skills(before)
+    prior_flat = {skill for skills in prior.values() for skill in skills}
+    assert {"R", "Go"} <= prior_flat
+
+    updated = skill_extractor.update_skills(after, prior, "then JavaScript.")
+    full = skill_extractor.extract_skills(after)
+    for category in full:
+        assert sorted(updated[category]) == sorted(full[category]), \
+            f"Mismatch in '{category}' after removing skills"
+    flat = {skill for skills in updated.values() for skill in skills}
+    assert not {"R", "Go"} & flat
+
+if __name__ == "__main__":
+    test_matches_legacy_output()
+    test_special_character_skills()
+    test_bulk_extraction_preserves_order()
+    test_update_drops_removed_short_skills()
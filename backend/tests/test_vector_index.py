@@ -0,0 +1,120 @@
+import os
+import json
+import random
+import numpy as np
+from backend.config import Config
+from backend.services.vector_index import VectorIndex
+from backend.services.matching_engine import MatchingEngine
+
+WORDS = ["python", "java", "sql", "flask", "react", "docker", "aws", "pandas", "design", "figma",
+         "kubernetes", "spring", "testing", "linux", "excel", "marketing"]
+
+def random_documents(count, dim=16, seed=3):
+    rng = random.Random(seed)
+    texts = [" ".join(rng.sample(WORDS, 4)) for _ in range(count)]
+    vectors = np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return [f"doc-{i}" for i in range(count)], texts, vectors
+
+def brute_force(index, ids, texts, vectors, query_text, query_vector, top_k):
+    keyword = index.keywords.score_many(query_text, texts)
+    overall = 0.6 * (vectors @ query_vector) + 0.4 * keyword
+    order = sorted(range(len(ids)), key=lambda i: (-overall[i], i))[:top_k]
+    return [ids[i] for i in order]
+
+def test_exact_search_matches_brute_force(tmp_path):
+    print("--- Testing Vector Index ---")
+    ids, texts, vectors = random_documents(500)
+    index = VectorIndex(str(tmp_path / "jobs"), block_size=64)
+    index.add_many(ids, texts, vectors)
+
+    query_text, query_vector = "python flask sql", vectors[7]
+    expected = brute_force(index, ids, texts, vectors, query_text, query_vector, 10)
+    assert [r["doc_id"] for r in index.search(query_text, query_vector, 10)] == expected
+
+    # Removals (with compaction) and a reload from disk
+    for doc_id in ids[:200]:
+        index.remove(doc_id)
+    index.save()
+    reloaded = VectorIndex(str(tmp_path / "jobs"), block_size=64)
+    expected = brute_force(reloaded, ids[200:], texts[200:], vectors[200:], query_text, query_vector, 10)
+    assert [r["doc_id"] for r in reloaded.search(query_text, query_vector, 10)] == expected
+    assert len(reloaded) == 300
+    assert reloaded.search(query_text, query_vector, 1, exclude=expected[0])[0]["doc_id"] == expected[1]
+    print("[SUCCESS] Vector Index Test Passed!")
+
+def test_restart_after_compaction_and_unsaved_adds(tmp_path):
+    ids, texts, vectors = random_documents(8, seed=11)
+    directory = str(tmp_path / "jobs")
+    index = VectorIndex(directory)
+    index.add_many(ids, texts, vectors)
+    index.save()
+    # Compaction moves rows; later adds are never followed by a save()
+    for doc_id in ids[:3]:
+        index.remove(doc_id)
+    extra_ids, extra_texts, extra_vectors = random_documents(2, seed=12)
+    index.add_many(["late-0", "late-1"], extra_texts, extra_vectors)
+    index.remove("d-unknown")
+
+    reopened = VectorIndex(directory)
+    assert len(reopened) == 7
+    for doc_id, vector in list(zip(ids[3:], vectors[3:])) + list(zip(["late-0", "late-1"], extra_vectors)):
+        top = reopened.search("", vector, 1)[0]
+        assert top["doc_id"] == doc_id and top["semantic_match"] == 100.0
+    assert ids[0] not in reopened.rows
+
+def test_journal_is_small_and_snapshotted(tmp_path):
+    ids, texts, vectors = random_documents(25, seed=13)
+    directory = str(tmp_path / "jobs")
+    index = VectorIndex(directory, snapshot_every=10)
+    for doc_id, text, vector in zip(ids, texts, vectors):
+        index.add(doc_id, text, vector)
+
+    # Two snapshots were written; the journal only holds the 5 adds since, as id and row
+    assert index.generation == 2
+    journals = [name for name in os.listdir(directory) if name.startswith("journal-")]
+    assert journals == ["journal-2.ndjson"]
+    with open(os.path.join(directory, journals[0])) as f:
+        entries = [json.loads(line) for line in f]
+    assert [entry["id"] for entry in entries] == ids[20:]
+    assert all(set(entry) == {"op", "id", "row", "dim"} for entry in entries)
+
+    # Snapshotted documents keep their keyword statistics across a restart
+    reopened = VectorIndex(directory)
+    assert len(reopened) == 25 and reopened.keywords.document_count == 20
+    top = reopened.search(texts[3], vectors[3], 1)[0]
+    assert top["doc_id"] == ids[3] and top["keyword_match"] > 0
+
+def test_ivf_search():
+    ids, texts, vectors = random_documents(2000, seed=5)
+    index = VectorIndex(None, dtype="float16")
+    index.add_many(ids, texts, vectors)
+    index.train_clusters(nlist=16)
+
+    query_text, query_vector = "docker aws kubernetes", vectors[42]
+    exact = [r["doc_id"] for r in index.search(query_text, query_vector, 10)]
+    # Probing every cluster is exact again; fewer clusters scan a fraction of the rows
+    assert [r["doc_id"] for r in index.search(query_text, query_vector, 10, nprobe=16)] == exact
+    approximate = index.search(query_text, query_vector, 10, nprobe=4)
+    assert approximate[0]["doc_id"] == "doc-42"
+    candidates = index._candidate_rows(query_vector, 4)
+    assert len(candidates) < 2000
+    # Candidate-only keyword scoring agrees with scoring through the posting lists
+    subset = index.keywords.score_subset(query_text, [ids[row] for row in candidates])
+    everything = dict(zip(*index.keywords.score_documents(query_text)))
+    assert np.allclose(subset, [everything.get(ids[row], 0.0) for row in candidates])
+
+def test_reverse_matching_with_stub_backend(monkeypatch):
+    monkeypatch.setattr(Config, "EMBEDDING_CACHE_DIR", "")
+    monkeypatch.setattr(Config, "VECTOR_INDEX_DIR", "")
+    engine = MatchingEngine(backend="stub")
+    engine.add_to_index("jobs", ["jd-1", "jd-2", "jd-3"], [
+        "Graphic Designer with Photoshop and Figma.",
+        "Python Developer with Flask, REST APIs and PostgreSQL.",
+        "Java Developer with Spring Boot and Microservices.",
+    ])
+    top = engine.top_jobs_for_resume("Python backend developer building Flask REST APIs on PostgreSQL.", top_k=2)
+    assert top[0]["doc_id"] == "jd-2" and len(top) == 2
+
+    engine.add_to_index("resumes", ["r-1"], ["Java Spring Boot engineer"])
+    assert engine.top_resumes_for_job("Java Developer with Spring Boot")[0]["doc_id"] == "r-1"